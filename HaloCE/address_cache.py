@@ -0,0 +1,76 @@
+"""
+Persistent cache of everything attach() otherwise works out through QMP on every start: the guest to host region
+table, the page translations and the resolved globals.
+
+Entries are keyed by the xemu executable's hash and the xbe's hash (calculate_game_hash() in halocaster.py). Host
+addresses are stored relative to where xemu's guest RAM starts (gpa2hva(0)), since that base is the only part of the
+layout that moves when xemu is restarted. A handful of canary addresses get translated through QMP on startup and
+compared against the cached translations before any of it is trusted; if one doesn't match, everything is resolved
+from scratch and the entry is replaced.
+"""
+
+import hashlib
+import json
+import os
+
+# how many xemu/xbe combinations to remember
+max_entries = 8
+
+
+class AddressCache:
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.data = {}
+        self.data.setdefault('binaries', {})
+        self.data.setdefault('entries', {})
+
+    def binary_hash(self, path):
+        """sha1 of a file, remembered by path, size and modification time so xemu.exe only gets hashed once per build"""
+
+        stat = os.stat(path)
+        memo_key = f'{path}|{stat.st_size}|{int(stat.st_mtime)}'
+        if memo_key not in self.data['binaries']:
+            digest = hashlib.sha1()
+            with open(path, 'rb') as f:
+                while chunk := f.read(1 << 20):
+                    digest.update(chunk)
+            self.data['binaries'][memo_key] = digest.hexdigest()
+        return self.data['binaries'][memo_key]
+
+    def get(self, key):
+        return self.data['entries'].get(key)
+
+    def put(self, key, ram_base, regions, pages, resolved_globals, canaries):
+        """
+        regions are (guest start, guest end, host base), pages are (guest page number, host page address) and
+        canaries are (guest address, host address); every host address gets stored relative to ram_base.
+        """
+
+        self.data['entries'][key] = {
+            'order': max((entry['order'] for entry in self.data['entries'].values()), default=0) + 1,
+            'regions': [(start, end, host - ram_base) for start, end, host in regions],
+            'pages': [(page, host - ram_base) for page, host in pages],
+            'globals': resolved_globals,
+            'canaries': [(guest, host - ram_base) for guest, host in canaries],
+        }
+        entries = sorted(self.data['entries'].items(), key=lambda item: item[1]['order'])[-max_entries:]
+        self.data['entries'] = dict(entries)
+        self.save()
+
+    def save(self):
+        with open(self.path, 'w') as f:
+            json.dump(self.data, f)
+
+
+def relocate(entry, ram_base):
+    """Returns (regions, pages, canaries) of a cache entry with host addresses moved to ram_base"""
+
+    regions = [(start, end, ram_base + offset) for start, end, offset in entry['regions']]
+    pages = [(page, ram_base + offset) for page, offset in entry['pages']]
+    canaries = [(guest, ram_base + offset) for guest, offset in entry['canaries']]
+    return regions, pages, canaries
@@ -0,0 +1,583 @@
+"""
+Benchmarks that don't need xemu running, the extraction ones read a raw capture instead (see raw_capture.py).
+
+The suite (benchmark_suite()) times extraction, event detection, every serializer and every sink on 2, 8 and 16
+player stretches of a capture, and compares ticks per second and allocations per tick against a JSON baseline.
+It exits with 1 if anything got more than --threshold worse, so it can gate an upgrade of the caster.
+
+With --synthetic the suite runs on scripted games from synthetic.py instead of a capture, followed by a load test
+of the whole tick (extraction, events, serializing and fan-out to 1, 10 and 50 websocket clients) with 16 players
+and a few hundred projectiles in flight.
+
+usage: python benchmarks.py [capture.hcraw] [--suite] [--synthetic] [--baseline benchmark_baseline.json]
+                            [--update-baseline] [--threshold 0.1]
+"""
+
+import argparse
+import copy
+import ctypes
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import scatter_read
+
+
+def run_target_process(size, connection):
+    """Stands in for xemu: holds a block of memory, sends its address to the parent and waits to be told to exit"""
+
+    memory = bytearray(size)
+    for i in range(0, size, 4):
+        struct.pack_into('<I', memory, i, i)
+    connection.send(ctypes.addressof((ctypes.c_char * size).from_buffer(memory)))
+    connection.recv()
+
+
+def time_ms(fn, iterations):
+    """Median wall time of fn() in milliseconds"""
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def scatter_read_benchmark(object_count=512, fields_per_object=24, object_stride=0x200, iterations=200):
+    """
+    Per-field reads vs one scatter read of the same fields, against a local process acting as the target.
+
+    The field layout mimics get_objects(): object_count objects, each with fields_per_object 4 byte fields.
+    """
+
+    print('Starting scatter read benchmark')
+    if not sys.platform.startswith('linux'):
+        print('   process_vm_readv is Linux only, skipping')
+        return {}
+
+    size = object_count * object_stride
+    context = multiprocessing.get_context('spawn')
+    parent_connection, child_connection = context.Pipe()
+    target = context.Process(target=run_target_process, args=(size, child_connection), daemon=True)
+    target.start()
+    try:
+        base_address = parent_connection.recv()
+        reader = scatter_read.ScatterReader(target.pid, probe_address=base_address)
+        print(f'   target pid {target.pid}, backend {reader.backend}')
+
+        ranges = [(base_address + object_stride * i + 4 * field, 4)
+                  for i in range(object_count) for field in range(fields_per_object)]
+        expected = [struct.pack('<I', address - base_address) for address, _ in ranges]
+        assert reader.read_many(ranges) == expected, 'scatter read returned the wrong bytes'
+
+        def per_field():
+            # what read_memory() does today: one read (syscall) per field
+            return [reader.read_many([r])[0] for r in ranges]
+
+        def batched():
+            return reader.read_many(ranges)
+
+        def one_region():
+            block = reader.read_many([(base_address, size)])[0]
+            return [block[address - base_address:address - base_address + length] for address, length in ranges]
+
+        results = {
+            'per_field_ms': time_ms(per_field, iterations),
+            'batched_ms': time_ms(batched, iterations),
+            'one_region_ms': time_ms(one_region, iterations),
+        }
+        reader.close()
+    finally:
+        parent_connection.send('exit')
+        target.join(timeout=1)
+
+    print(f'   {len(ranges)} fields, median of {iterations} iterations:')
+    print(f"      per field:   {results['per_field_ms']:.3f}ms")
+    print(f"      batched:     {results['batched_ms']:.3f}ms ({results['per_field_ms'] / results['batched_ms']:.1f}x faster)")
+    print(f"      one region:  {results['one_region_ms']:.3f}ms ({sizeof_fmt(size)} copied)")
+    return results
+
+
+def parallel_extraction_benchmark(capture_path, player_counts=(8, 16), worker_counts=(2, 4, 8), iterations=20):
+    """
+    get_game_info() on one thread vs split across extraction_workers threads, on the first in game tick of a raw
+    capture with each of player_counts players.
+
+    Run it with a regular and a free-threaded interpreter (e.g. python3.13t) to compare the two. Snapshot reads are
+    plain slicing rather than an OS call, so unlike pymem they never let go of the GIL: with the GIL on, this mostly
+    measures what the threads cost.
+    """
+
+    import halocaster
+    import raw_capture
+    import snapshot
+
+    print('Starting parallel extraction benchmark')
+    gil_enabled = sys._is_gil_enabled() if hasattr(sys, '_is_gil_enabled') else True
+    print(f'   python {sys.version.split()[0]}, GIL {"enabled" if gil_enabled else "disabled"}')
+    results = {'python': sys.version.split()[0], 'gil_enabled': gil_enabled, 'player_counts': {}}
+
+    process = snapshot.SnapshotProcess()
+    halocaster.extraction_scheduler.budget_ms = None
+    remaining = set(player_counts)
+    attached = False
+
+    def game_info(workers):
+        halocaster.extraction_workers = workers
+        return halocaster.get_game_info()
+
+    for captured in raw_capture.RawCaptureReader(capture_path):
+        process.load(captured.regions)
+        if captured.new_map:
+            if not attached:
+                halocaster.attach(process, snapshot.IdentityTranslator())
+                attached = True
+            else:
+                halocaster.resolve_globals()
+            halocaster.clear_caches()
+
+        player_count = halocaster.read_u16(halocaster.player_datum_array + 0x2E)
+        if player_count not in remaining or not halocaster.read_u32(0x2F9110):  # no game engine globals outside a game
+            continue
+        remaining.discard(player_count)
+
+        serial = game_info(0)
+        timings = {0: time_ms(lambda: game_info(0), iterations)}
+        for workers in worker_counts:
+            threaded = game_info(workers)
+            for key in ('players', 'damage_counts', 'objects'):
+                # repr so nan fields still compare equal
+                assert repr(threaded[key]) == repr(serial[key]), f'{key} differ with {workers} workers'
+            timings[workers] = time_ms(lambda: game_info(workers), iterations)
+        halocaster.extraction_workers = 0
+        results['player_counts'][player_count] = timings
+
+        print(f"   tick {captured.tick}: {player_count} players, {len(serial['objects'])} objects, "
+              f"median of {iterations} iterations:")
+        print(f'      serial:      {timings[0]:.3f}ms')
+        for workers in worker_counts:
+            print(f'      {workers} workers:   {timings[workers]:.3f}ms ({timings[0] / timings[workers]:.2f}x)')
+        if not remaining:
+            break
+
+    for player_count in sorted(remaining):
+        print(f'   no in game tick with {player_count} players in {capture_path}')
+    return results
+
+
+class CaptureScenario:
+    """
+    The first ticks in game with player_count players in a raw capture, replayed into halocaster.
+
+    Ticks are decoded again on every replay() rather than kept, a game state block is a few MB per tick.
+    """
+
+    def __init__(self, capture_path, player_count, ticks=30):
+        self.capture_path = capture_path
+        self.player_count = player_count
+        self.ticks = ticks
+
+    def replay(self):
+        """Loads each tick into a SnapshotProcess attached to halocaster, yielding once it's ready to read"""
+
+        import halocaster
+        import raw_capture
+        import snapshot
+
+        process = snapshot.SnapshotProcess()
+        halocaster.extraction_scheduler.budget_ms = None
+        attached = False
+        replayed = 0
+        for captured in raw_capture.RawCaptureReader(self.capture_path):
+            process.load(captured.regions)
+            if captured.new_map:
+                if not attached:
+                    halocaster.attach(process, snapshot.IdentityTranslator())
+                    attached = True
+                else:
+                    halocaster.resolve_globals()
+                halocaster.clear_caches()
+
+            player_count = halocaster.read_u16(halocaster.player_datum_array + 0x2E)
+            if player_count != self.player_count or not halocaster.read_u32(0x2F9110):  # not in game
+                continue
+            yield captured.tick
+            replayed += 1
+            if replayed == self.ticks:
+                return
+
+
+class SyntheticScenario:
+    """
+    A scripted game from synthetic.py (random play, see SyntheticGame.simulate_tick()) replayed into halocaster,
+    projectiles is how many get fired before the first tick (they stay in flight for the whole replay).
+
+    The seed is fixed, so every replay() plays out the same game.
+    """
+
+    def __init__(self, player_count, ticks=30, projectiles=0, seed=0):
+        self.player_count = player_count
+        self.ticks = ticks
+        self.projectiles = projectiles
+        self.seed = seed
+        self.process = None
+
+    def replay(self):
+        import halocaster
+        import snapshot
+        import synthetic
+
+        first_replay = self.process is None
+        if first_replay:
+            self.process = snapshot.SnapshotProcess()
+        game = synthetic.SyntheticGame(self.player_count, seed=self.seed, projectile_lifetime=self.ticks + 1,
+                                       process=self.process)
+        halocaster.extraction_scheduler.budget_ms = None
+        if first_replay:
+            halocaster.attach(self.process, snapshot.IdentityTranslator())
+        else:
+            halocaster.resolve_globals()
+        halocaster.clear_caches()
+
+        shooter = 0
+        while len(game.projectiles) < self.projectiles:
+            game.fire(shooter % self.player_count)
+            shooter += 1
+        for _ in range(self.ticks):
+            game.simulate_tick()
+            halocaster.clear_caches()
+            yield game.tick
+
+
+class FakeClient:
+    """Stands in for a SimpleWebSocketServer connection, sendMessage() frames the message like it would"""
+
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+
+    def sendMessage(self, data):
+        payload = data.encode() if isinstance(data, str) else data
+        length = len(payload)
+        if length <= 125:
+            header = struct.pack('!BB', 0x81, length)
+        elif length <= 0xFFFF:
+            header = struct.pack('!BBH', 0x81, 126, length)
+        else:
+            header = struct.pack('!BBQ', 0x81, 127, length)
+        frame = header + payload
+        self.messages += 1
+        self.bytes += len(frame)
+
+
+def synthetic_load_test(player_count=16, projectiles=300, client_counts=(1, 10, 50), ticks=150):
+    """
+    Runs whole ticks the way main_loop() does on a synthetic game, with client_count fake clients on both the
+    game info and the minimap websocket, and prints the time each stage takes per tick.
+    """
+
+    import halocaster
+    import model
+
+    print(f'Starting synthetic load test ({player_count} players, {projectiles} projectiles, {ticks} ticks)')
+    results = {}
+    for client_count in client_counts:
+        clients = [FakeClient() for _ in range(client_count)]
+        minimap_clients = [FakeClient() for _ in range(client_count)]
+        stages = {name: [] for name in ('read', 'extract_events', 'serialize', 'send')}
+        last_tick = None
+        halocaster.game_meta.clear()
+        scenario = SyntheticScenario(player_count, ticks, projectiles)
+        for _ in scenario.replay():
+            start = time.perf_counter()
+            game_info = halocaster.get_game_info()
+            read = time.perf_counter()
+            tick = model.Tick.from_game_info(game_info)
+            tick.events = halocaster.extract_events(last_tick, tick) if last_tick else []
+            extracted = time.perf_counter()
+            game_info_copy = tick.to_dict()
+            data = json.dumps(game_info_copy, default=str)
+            frame = halocaster.minimap_stream.pack(game_info_copy)
+            serialized = time.perf_counter()
+            for client in clients:
+                client.sendMessage(data)
+            for client in minimap_clients:
+                client.sendMessage(frame)
+            sent = time.perf_counter()
+            last_tick = tick
+
+            for name, (stage_start, stage_end) in (('read', (start, read)), ('extract_events', (read, extracted)),
+                                                   ('serialize', (extracted, serialized)),
+                                                   ('send', (serialized, sent))):
+                stages[name].append((stage_end - stage_start) * 1000)
+
+        tick_ms = [sum(times) for times in zip(*stages.values())]
+        results[client_count] = {
+            'ticks_per_second': len(tick_ms) / (sum(tick_ms) / 1000),
+            'tick_ms': {'mean': statistics.mean(tick_ms), 'max': max(tick_ms)},
+            'stages_ms': {name: {'mean': statistics.mean(times), 'max': max(times)} for name, times in stages.items()},
+            'sent_per_tick': sizeof_fmt(sum(client.bytes for client in clients + minimap_clients) / len(tick_ms)),
+        }
+        result = results[client_count]
+        stage_text = ', '.join(f"{name} {times['mean']:.2f}ms" for name, times in result['stages_ms'].items())
+        print(f"   {client_count:>3} clients: {result['tick_ms']['mean']:.2f}ms per tick "
+              f"(max {result['tick_ms']['max']:.2f}ms, {result['ticks_per_second']:.0f} ticks/s), {stage_text}, "
+              f"{result['sent_per_tick']} sent per tick")
+    return results
+
+
+# a benchmark only regresses once it's slower than the baseline by this many times the two runs' spread combined
+NOISE_FACTOR = 3
+
+
+def measure(fn, items, repeats=7, min_sample_s=0.2):
+    """
+    Runs fn(item) for every item, over and over. Like timeit's autorange(), a sample keeps going through the items
+    until it has taken at least min_sample_s, and repeats samples are taken after one warmup sample.
+    Returns operations per second (the median sample), the spread of the samples (their median absolute deviation,
+    as a fraction of the median), the average peak of new allocations during one call, in KB, from a separate pass
+    under tracemalloc, and the GC collections and time spent collecting per call, from a pass with the GC on.
+    items can also be a function returning a fresh iterable for each pass (e.g. CaptureScenario.replay).
+    """
+
+    def each_item():
+        return items() if callable(items) else items
+
+    def sample():
+        total = 0.0
+        count = 0
+        while total < min_sample_s:
+            calls = count
+            for item in each_item():
+                start = time.perf_counter()
+                fn(item)
+                total += time.perf_counter() - start
+                count += 1
+            if count == calls:
+                break
+        return count / max(total, 1e-9) if count else None
+
+    if sample() is None:
+        return None
+    rates = [sample() for _ in range(repeats)]
+    per_second = statistics.median(rates)
+    spread = statistics.median(abs(rate - per_second) for rate in rates) / per_second
+    count = sum(1 for _ in each_item())
+
+    tracemalloc.start()
+    allocated = 0
+    for item in each_item():
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        fn(item)
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+
+    collections = 0
+    collecting_ns = 0
+    started_ns = 0
+
+    def on_collection(phase, info):
+        nonlocal collections, collecting_ns, started_ns
+        if phase == 'start':
+            started_ns = time.perf_counter_ns()
+        else:
+            collections += 1
+            collecting_ns += time.perf_counter_ns() - started_ns
+
+    was_enabled = gc.isenabled()
+    gc.enable()
+    gc.collect()
+    gc.callbacks.append(on_collection)
+    try:
+        for item in each_item():
+            fn(item)
+    finally:
+        gc.callbacks.remove(on_collection)
+        if not was_enabled:
+            gc.disable()
+
+    return {'per_second': per_second, 'spread': spread, 'alloc_kb': allocated / count / 1024,
+            'gc_collections': collections / count, 'gc_ms': collecting_ns / count / 1e6}
+
+
+def benchmark_suite(scenarios, repeats=7):
+    """
+    scenarios are {name: object with replay()}, e.g. CaptureScenario. Returns {name: {benchmark: measure() result}}.
+
+    get_game_info() and get_objects() run against the replayed memory. Everything downstream runs on the game infos
+    of one untimed replay: extract_events() on consecutive pairs of model.Ticks, then each serializer and each sink on
+    every tick. tick_to_dict times the copy main_loop() makes of each tick for the background threads.
+    """
+
+    import channels
+    import halocaster
+    import minimap
+    import model
+    import orjson
+
+    results = {}
+    for name, scenario in scenarios.items():
+        print(f'   {name}')
+        # get_game_info() refills its records from tick to tick (see records.py), these are copies
+        game_infos = [model.Tick.from_game_info(halocaster.get_game_info()).to_dict() for _ in scenario.replay()]
+        if not game_infos:
+            print('      no matching ticks, skipping')
+            continue
+
+        def replayed(fn):
+            return measure(lambda _: fn(), scenario.replay, repeats)
+
+        ticks = [model.Tick.from_dict(game_info) for game_info in game_infos]
+
+        def events(pair):
+            return halocaster.extract_events(*pair)
+
+        def deepcopy(game_info):
+            return copy.deepcopy(game_info)
+
+        def to_json(game_info):
+            return json.dumps(game_info, default=str)
+
+        def to_orjson(game_info):
+            return orjson.dumps(game_info, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+        minimap_stream = minimap.MinimapStream(trail_length=8)
+        recorder_queue = channels.BoundedQueue('benchmark_recorder', maxsize=300)
+        latest_value = channels.LatestValue('benchmark_websocket')
+
+        def recorder_sink(game_info):
+            recorder_queue.put(game_info)
+            recorder_queue.get()
+
+        def latest_value_sink(game_info):
+            latest_value.put(game_info)
+            latest_value.get()
+
+        with tempfile.TemporaryDirectory() as directory:
+            outfile = os.path.join(directory, 'replay.json')
+
+            def file_sink(game_info):
+                halocaster.send_to_file(game_info, outfile)
+
+            pairs = list(zip(ticks, ticks[1:]))
+            halocaster.game_meta.clear()
+            benchmarks = {
+                'get_game_info': replayed(halocaster.get_game_info),
+                'get_objects': replayed(halocaster.get_objects),
+                'extract_events': measure(events, pairs, repeats),
+                'tick_to_dict': measure(model.Tick.to_dict, ticks, repeats),
+                'serialize_tick_orjson': measure(model.Tick.to_orjson, ticks, repeats),
+                'serialize_deepcopy': measure(deepcopy, game_infos, repeats),
+                'serialize_json': measure(to_json, game_infos, repeats),
+                'serialize_orjson': measure(to_orjson, game_infos, repeats),
+                'serialize_minimap': measure(minimap_stream.pack, game_infos, repeats),
+                'sink_file': measure(file_sink, game_infos, repeats),
+                'sink_recorder_queue': measure(recorder_sink, game_infos, repeats),
+                'sink_latest_value': measure(latest_value_sink, game_infos, repeats),
+            }
+        results[name] = {benchmark: result for benchmark, result in benchmarks.items() if result}
+        for benchmark, result in results[name].items():
+            print(f"      {benchmark:<22}{result['per_second']:>12.1f}/s {result['spread']:>6.1%} "
+                  f"{result['alloc_kb']:>10.1f}KB {result['gc_collections']:>6.2f} gc {result['gc_ms']:>7.3f}ms")
+    return results
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """
+    Every benchmark that allocates more than threshold (a fraction) more than the baseline, or whose median is more
+    than threshold slower, or more than NOISE_FACTOR times the baseline's and this run's spread added up if that's
+    more, since a benchmark that jitters by 10% can't be held to 10%
+    """
+
+    regressions = []
+    for scenario, benchmarks in results.items():
+        for benchmark, result in benchmarks.items():
+            base = baseline.get(scenario, {}).get(benchmark)
+            if not base:
+                continue
+            # baselines saved before spreads were measured only have the threshold to go on
+            allowed = max(threshold, NOISE_FACTOR * (base.get('spread', 0) + result['spread']))
+            if result['per_second'] < base['per_second'] * (1 - allowed):
+                regressions.append(f"{scenario} {benchmark}: {result['per_second']:.1f}/s, "
+                                   f"baseline {base['per_second']:.1f}/s (allowed {allowed:.0%} slower)")
+            # 1KB of slack, so a tiny allocation doesn't fail on noise
+            if result['alloc_kb'] > base['alloc_kb'] * (1 + threshold) + 1:
+                regressions.append(f"{scenario} {benchmark}: {result['alloc_kb']:.1f}KB allocated, "
+                                   f"baseline {base['alloc_kb']:.1f}KB")
+    return regressions
+
+
+def run_suite(capture_path, baseline_path, update_baseline=False, threshold=0.1, player_counts=(2, 8, 16)):
+    """
+    Runs benchmark_suite() on a capture (synthetic games if capture_path is None) and checks it against (or saves)
+    the baseline, returns False on regressions
+    """
+
+    print('Starting benchmark suite')
+    if capture_path:
+        scenarios = {f'{player_count}_players': CaptureScenario(capture_path, player_count)
+                     for player_count in player_counts}
+    else:
+        scenarios = {f'synthetic_{player_count}_players': SyntheticScenario(player_count)
+                     for player_count in player_counts}
+        scenarios['synthetic_16_players_300_projectiles'] = SyntheticScenario(16, projectiles=300)
+    results = benchmark_suite(scenarios)
+
+    if update_baseline or not os.path.exists(baseline_path):
+        with open(baseline_path, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'platform': platform.platform(), 'capture': capture_path or 'synthetic',
+                       'scenarios': results}, f, indent=2)
+        print(f'   saved baseline to {baseline_path}')
+        return True
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = compare_to_baseline(results, baseline['scenarios'], threshold)
+    if baseline.get('python') != sys.version.split()[0] or baseline.get('platform') != platform.platform():
+        print(f"   NOTE: baseline was recorded on python {baseline.get('python')}, {baseline.get('platform')}")
+    for regression in regressions:
+        print(f'   REGRESSION: {regression}')
+    if not regressions:
+        print(f'   no regressions beyond {threshold:.0%} of {baseline_path}')
+    return not regressions
+
+
+def sizeof_fmt(num, suffix="B"):
+    for unit in ("", "Ki", "Mi", "Gi"):
+        if abs(num) < 1024.0:
+            return f"{num:3.1f}{unit}{suffix}"
+        num /= 1024.0
+    return f"{num:.1f}Ti{suffix}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks that run without xemu')
+    parser.add_argument('capture', nargs='?', help='raw capture to run the extraction benchmarks on')
+    parser.add_argument('--suite', action='store_true', help='only run the benchmark suite')
+    parser.add_argument('--synthetic', action='store_true', help='run the suite and a load test on synthetic games')
+    parser.add_argument('--baseline', default='benchmark_baseline.json')
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.1, help='allowed regression, as a fraction of the baseline')
+    args = parser.parse_args()
+
+    if not args.suite:
+        scatter_read_benchmark()
+    if args.capture:
+        if not args.suite:
+            parallel_extraction_benchmark(args.capture)
+        if not run_suite(args.capture, args.baseline, args.update_baseline, args.threshold):
+            sys.exit(1)
+    elif args.synthetic:
+        synthetic_load_test()
+        if not run_suite(None, args.baseline, args.update_baseline, args.threshold):
+            sys.exit(1)
@@ -0,0 +1,219 @@
+"""
+Bounded channels between the memory reader thread and its consumers (recorder, UI, websockets).
+
+Plain queue.Queue objects grow forever when a consumer falls behind, and with gc disabled in halocaster.py that turns
+into runaway memory over a long event. The channels here never hold more than a fixed number of ticks:
+
+    BoundedQueue    lossless, blocks the producer when full (backpressure), for consumers that need every tick
+    LatestValue     lossy single slot, a new value replaces an unread one, for consumers that only draw the latest tick
+
+Both keep the get/put/qsize/empty interface of queue.Queue (including raising queue.Empty/queue.Full) so existing
+consumers like ui.py don't need to change, and both record per-channel stats (drops, lag, time spent blocked).
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+
+# every channel created, by name, so the main loop can report on all of them at once
+registry = {}
+
+
+class ChannelStats:
+    """Counters for a single channel, times are in milliseconds"""
+
+    __slots__ = ('puts', 'gets', 'dropped', 'blocked_puts', 'blocked_ms', 'high_watermark', 'last_lag_ms', 'max_lag_ms')
+
+    def __init__(self):
+        self.puts = 0
+        self.gets = 0
+        self.dropped = 0
+        self.blocked_puts = 0
+        self.blocked_ms = 0.0
+        self.high_watermark = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    def record_lag(self, put_time):
+        lag_ms = (time.perf_counter() - put_time) * 1000
+        self.last_lag_ms = lag_ms
+        if lag_ms > self.max_lag_ms:
+            self.max_lag_ms = lag_ms
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class BoundedQueue:
+    """
+    Lossless FIFO with a maximum size.
+
+    put() blocks while the queue is full, so a slow consumer slows the producer down instead of eating memory.
+    Time spent blocked is recorded so it's obvious which consumer is holding up the reader.
+    """
+
+    def __init__(self, name, maxsize=300):
+        self.name = name
+        self.maxsize = maxsize
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.stats = ChannelStats()
+        registry[name] = self
+
+    def put(self, item, block=True, timeout=None):
+        entry = (time.perf_counter(), item)
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            if not block:
+                self.stats.dropped += 1
+                raise
+            self.stats.blocked_puts += 1
+            blocked_start = time.perf_counter()
+            try:
+                self._queue.put(entry, timeout=timeout)
+            finally:
+                self.stats.blocked_ms += (time.perf_counter() - blocked_start) * 1000
+        self.stats.puts += 1
+        size = self._queue.qsize()
+        if size > self.stats.high_watermark:
+            self.stats.high_watermark = size
+
+    def put_nowait(self, item):
+        return self.put(item, block=False)
+
+    def get(self, block=True, timeout=None):
+        put_time, item = self._queue.get(block, timeout)
+        self.stats.gets += 1
+        self.stats.record_lag(put_time)
+        return item
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def empty(self):
+        return self._queue.empty()
+
+    def full(self):
+        return self._queue.full()
+
+
+class LatestValue:
+    """
+    Single slot mailbox that only ever holds the most recent value.
+
+    put() never blocks; if the previous value wasn't picked up yet it gets replaced and counted as dropped.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.maxsize = 1
+        self._condition = threading.Condition()
+        self._item = None
+        self._put_time = None
+        self._has_item = False
+        self.stats = ChannelStats()
+        registry[name] = self
+
+    def put(self, item, block=True, timeout=None):
+        with self._condition:
+            if self._has_item:
+                self.stats.dropped += 1
+            self._item = item
+            self._put_time = time.perf_counter()
+            self._has_item = True
+            self.stats.puts += 1
+            self.stats.high_watermark = 1
+            self._condition.notify()
+
+    def put_nowait(self, item):
+        return self.put(item, block=False)
+
+    def get(self, block=True, timeout=None):
+        with self._condition:
+            if not self._has_item:
+                if not block:
+                    raise queue.Empty
+                if not self._condition.wait_for(lambda: self._has_item, timeout):
+                    raise queue.Empty
+            item = self._item
+            self.stats.gets += 1
+            self.stats.record_lag(self._put_time)
+            self._item = None
+            self._has_item = False
+            return item
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def qsize(self):
+        return int(self._has_item)
+
+    def empty(self):
+        return not self._has_item
+
+    def full(self):
+        return self._has_item
+
+
+class ProcessLatestValue:
+    """
+    LatestValue that can be handed to another process (e.g. the ui process when use_reader_process is enabled).
+
+    Backed by a multiprocessing.Queue with room for one item; the producer throws away the unread value to make room.
+    Stats are only kept on the producer side.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.maxsize = 1
+        self._queue = multiprocessing.Queue(maxsize=1)
+        self.stats = ChannelStats()
+        registry[name] = self
+
+    def put(self, item, block=True, timeout=None):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.stats.dropped += 1
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                # the consumer can't have put anything back, but don't block the reader if something odd happens
+                pass
+        self.stats.puts += 1
+        self.stats.high_watermark = 1
+
+    def put_nowait(self, item):
+        return self.put(item, block=False)
+
+    def get(self, block=True, timeout=None):
+        item = self._queue.get(block, timeout)
+        self.stats.gets += 1
+        return item
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def empty(self):
+        return self._queue.empty()
+
+    def full(self):
+        return self._queue.full()
+
+
+def get_stats():
+    """Returns stats for every registered channel, keyed by channel name"""
+
+    return {name: dict(channel.stats.as_dict(), size=channel.qsize(), maxsize=channel.maxsize)
+            for name, channel in registry.items()}
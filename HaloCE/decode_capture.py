@@ -0,0 +1,66 @@
+"""
+Decodes a raw capture (see raw_capture.py) with the current get_game_info() and extract_events().
+
+Writes one json line per tick, same as send_to_file() with no compression.
+
+usage: python decode_capture.py <capture.hcraw> <output.json>
+"""
+
+import datetime
+import sys
+
+import halocaster
+import model
+import raw_capture
+import snapshot
+
+
+def decode(capture_path, outfile):
+    reader = raw_capture.RawCaptureReader(capture_path)
+    process = snapshot.SnapshotProcess()
+    last_tick = None
+    events = []
+    decoded_ticks = 0
+    # nothing runs in real time here, so never defer anything
+    halocaster.extraction_scheduler.budget_ms = None
+
+    for captured in reader:
+        process.load(captured.regions)
+        if captured.new_map:
+            # globals like the tag instance array move with every map
+            if decoded_ticks == 0:
+                halocaster.attach(process, snapshot.IdentityTranslator())
+            else:
+                halocaster.resolve_globals()
+            halocaster.clear_caches()
+
+        game_info = halocaster.get_game_info()
+        game_info['current_time'] = datetime.datetime.fromtimestamp(captured.wall_time)
+
+        if game_info['game_time_info']['game_time'] != captured.tick:
+            print(f"  WARNING: mismatched game time (expected {captured.tick}, got {game_info['game_time_info']['game_time']})")
+
+        tick = model.Tick.from_game_info(game_info)
+        if last_tick:
+            if last_tick.game_engine_running and not tick.game_engine_running:
+                events = []
+            else:
+                events += halocaster.extract_events(last_tick, tick)
+        tick.events = events
+        last_tick = tick
+
+        halocaster.send_to_file(tick, outfile)
+        decoded_ticks += 1
+
+    print(f'decoded {decoded_ticks} ticks from {capture_path} to {outfile}')
+    if process.missing_reads:
+        print(f'{len(process.missing_reads)} addresses were read but not captured, most read:')
+        for address, count in process.missing_reads.most_common(20):
+            print(f'    {address:#x}: {count}')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    decode(sys.argv[1], sys.argv[2])
@@ -0,0 +1,142 @@
+"""
+Flight recorder for slow ticks.
+
+The last history ticks' stage timings and read counts (instrumentation.end_tick()) are kept in a ring, and with
+sample_ms set, StackSampler grabs the main loop's stack every sample_ms into another ring (that's a thread taking the
+GIL every sample, so it's off by default). When a tick runs over budget_ms (a tick's length by default), or ticks were
+missed before it, a dump goes to directory with:
+
+    the tick's breakdown (stage times, reads, QMP calls per extractor)
+    the ticks leading up to it
+    a summary of the stacks sampled while it ran (most common stacks, and the functions they were sampled in), if any
+    the game state that tick produced
+
+Dumps are written on a background thread, at most one every min_interval_s (a stall tends to make several slow
+ticks in a row), and only the newest max_dumps are kept. Stalls seen live during a broadcast can then be looked into
+afterwards instead of having to be reproduced.
+"""
+
+import datetime
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+TICK_MS = 1000 / 30
+
+
+class StackSampler:
+    """Samples one thread's stack every interval_ms on a background thread, keeping the newest max_samples"""
+
+    def __init__(self, thread_id, interval_ms=5, max_samples=2000):
+        self.thread_id = thread_id
+        self.interval_ms = interval_ms
+        self.samples = deque(maxlen=max_samples)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True, name='stack_sampler')
+        self.thread.start()
+
+    def run(self):
+        while not self.stopped.wait(self.interval_ms / 1000):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append((os.path.basename(frame.f_code.co_filename), frame.f_code.co_name, frame.f_lineno))
+                frame = frame.f_back
+            if stack:
+                self.samples.append((time.perf_counter_ns(), tuple(reversed(stack))))
+
+    def summary(self, start_ns, end_ns, top=15):
+        """The most common stacks and innermost functions sampled between start_ns and end_ns (perf_counter_ns)"""
+
+        stacks = [stack for sample_time, stack in list(self.samples) if start_ns <= sample_time <= end_ns]
+        functions = Counter(f'{name} ({filename})' for filename, name, _ in (stack[-1] for stack in stacks))
+        return {
+            'samples': len(stacks),
+            'interval_ms': self.interval_ms,
+            'stacks': [{'count': count, 'stack': [f'{name} ({filename}:{line})' for filename, name, line in stack]}
+                       for stack, count in Counter(stacks).most_common(top)],
+            'functions': functions.most_common(top),
+        }
+
+    def stop(self):
+        self.stopped.set()
+
+
+class FlightRecorder:
+
+    def __init__(self, directory, budget_ms=TICK_MS, history=300, max_dumps=50, min_interval_s=1.0, sample_ms=None):
+        self.directory = directory
+        self.budget_ms = budget_ms
+        self.history = deque(maxlen=history)
+        self.max_dumps = max_dumps
+        self.min_interval_s = min_interval_s
+        # sample the thread the recorder is created on, i.e. the main loop; None turns sampling off
+        self.sampler = StackSampler(threading.get_ident(), interval_ms=sample_ms) if sample_ms else None
+        self.last_dump_time = 0.0
+        self.dumps = 0
+        self.skipped_dumps = 0
+        self.dump_queue = queue.Queue(maxsize=4)
+        os.makedirs(directory, exist_ok=True)
+        threading.Thread(target=self.write_dumps, daemon=True, name='flight_recorder').start()
+
+    def end_tick(self, tick_metrics, tick_start_ns, tick_end_ns, missed_ticks, game_info):
+        """
+        Call once per tick with what instrumentation.end_tick() returned, dumps the tick if it went wrong.
+        game_info gets queued as is and serialized on the background thread, so it mustn't change afterwards (main_loop()
+        passes the tick's to_dict() copy).
+        """
+
+        tick_ms = (tick_end_ns - tick_start_ns) / 1e6
+        entry = dict(tick_metrics, tick_ms=tick_ms, missed_ticks=missed_ticks)
+        self.history.append(entry)
+
+        reasons = []
+        if tick_ms > self.budget_ms:
+            reasons.append(f'tick took {tick_ms:.2f}ms (budget {self.budget_ms:.1f}ms)')
+        if missed_ticks > 0:
+            reasons.append(f'missed {missed_ticks} ticks')
+        if not reasons:
+            return
+
+        now = time.monotonic()
+        if now - self.last_dump_time < self.min_interval_s:
+            self.skipped_dumps += 1
+            return
+        self.last_dump_time = now
+        dump = {
+            'reasons': reasons,
+            'time': datetime.datetime.now().isoformat(),
+            'tick': entry,
+            # stalls before this one were only counted, not dumped
+            'skipped_dumps': self.skipped_dumps,
+            'history': list(self.history),
+            'stack_summary': self.sampler.summary(tick_start_ns, tick_end_ns) if self.sampler else None,
+            # serialized by write_dumps(), this tick is already over budget
+            'game_info': game_info,
+        }
+        try:
+            self.dump_queue.put_nowait(dump)
+        except queue.Full:
+            self.skipped_dumps += 1
+
+    def write_dumps(self):
+        while True:
+            dump = self.dump_queue.get()
+            name = f"{datetime.datetime.now():%Y-%m-%d_%H-%M-%S}_tick{dump['tick']['tick']:07d}.json"
+            with open(os.path.join(self.directory, name), 'w') as f:
+                json.dump(dump, f, indent=1, default=str)
+            self.dumps += 1
+            print(f"  flight recorder: {', '.join(dump['reasons'])}, wrote {name}")
+
+            # rotate, names sort oldest first
+            dumps = sorted(name for name in os.listdir(self.directory) if name.endswith('.json'))
+            for old_name in dumps[:-self.max_dumps]:
+                os.remove(os.path.join(self.directory, old_name))
+
+    def stop(self):
+        if self.sampler:
+            self.sampler.stop()
@@ -1,14 +1,16 @@
 # Standard Library Imports
 import asyncio
-import copy
+import concurrent.futures
 import ctypes
 import dataclasses
 import datetime
 import gc
 import gzip
+import hashlib
 import json
 import lzma
 import math
+import multiprocessing
 import os
 import queue
 import re
@@ -34,6 +36,24 @@ from SimpleWebSocketServer import SimpleWebSocketServer, WebSocket
 from qmp import QEMUMonitorProtocol
 
 # Custom Imports
+import address_cache
+import channels
+import flight_recorder
+import instrumentation
+import map_store
+import minimap
+import model
+import raw_capture
+import records
+import region_map
+import scheduler
+import projectile_tracker
+import scatter_read
+import spatial_index
+import spawn_predictor
+import tick_context
+import tick_ring
+import translation_cache
 import ui  # Consider renaming the alias if 'ui#2' is necessary
 # from database import DBConnector
 # from memory_mappings_and_offsets import *
@@ -55,6 +75,46 @@ def get_pid():
 
 
 use_pymem = True
+# split capture across a reader process, this process and a ui process, see tick_ring.py
+use_reader_process = False
+# drop ticks the reader process could only copy torn (see tick_ring.py) instead of decoding them with a warning
+skip_torn_ticks = False
+# only copy raw memory regions each tick and decode them later with decode_capture.py, see raw_capture.py
+use_raw_capture = False
+raw_capture_directory = 'E:\\h1_demo_creation\\raw_captures\\'
+# copy every region a tick needs back to back and check game_time didn't change mid-copy, see take_tick_snapshot()
+use_consistent_snapshots = False
+# copies of a tick take_tick_snapshot() retries after a torn one before decoding it anyway with a warning
+snapshot_retries = 3
+# ms of each 33ms tick get_game_info() may spend before lower priority extractors get deferred, see scheduler.py
+tick_budget_ms = 20
+# threads get_game_info() splits the players and the object table across, 0 reads everything on this thread
+extraction_workers = 0
+# refill last tick but one's dicts and lists for players, weapons and objects instead of new ones, see records.py
+reuse_tick_records = True
+# run with the GC on instead of disabling it, see records.py for what a tick still allocates
+collect_garbage = False
+# count reads, bytes, cache hits and QMP calls per extractor, see instrumentation.py (stages are always timed)
+instrument_reads = True
+# running totals in the Prometheus text format, rewritten once a second (e.g. 'halocaster.prom' for node_exporter)
+metrics_path = None
+# rank the likely next spawns of every dead player each tick and send them to the overlays, see spawn_predictor.py
+predict_spawns = True
+# dump a profile of every tick that runs over a tick's length or follows missed ticks, see flight_recorder.py
+use_flight_recorder = False
+flight_recorder_directory = 'flight_recorder'
+# ms between samples of the main loop's stack for the dumps, None to skip (the sampler thread takes the GIL each time)
+flight_recorder_sample_ms = None
+# timestamps main_loop() stages of every tick on, set by latency.py's end to end benchmark
+latency_probe = None
+# region table, translations and globals saved per xemu build and xbe so restarts skip most QMP, see address_cache.py
+address_cache_path = 'address_cache.json'
+# translated through QMP on startup and compared to the saved translations before trusting them
+address_canaries = (0x10000, 0x2FAD28, 0x39CE24, 0x80000000)
+# keep a side table of where every QMP translation came from (see analyze_offset_map()), only needed for debugging
+track_translation_provenance = False
+# spawns, items and tag names of every map version seen so far, and the replays recorded on them, see map_store.py
+map_store_path = 'maps.sqlite'
 pid, pm = None, None
 
 
@@ -73,10 +133,67 @@ def wait_for_xemu():
         print(f'xemu pid is {pid} ({hex(pid)})')
         pm = Pymem()
         pm.open_process_from_id(process_id=pid)
+        bind_memory_functions(pm)
         return pm
 
 
-wait_for_xemu()
+def reattach():
+    """
+    Called after a read error. The guest may have been reset, so every cached translation gets dropped; if xemu itself
+    was restarted, the region map and globals get rebuilt too.
+    """
+
+    previous_pid = pid
+    wait_for_xemu()
+    if pid != previous_pid:
+        attach()
+    else:
+        forget_translations()
+        resolve_addresses()
+
+
+def attach(process=None, translator=None):
+    """
+    Connects to xemu and resolves the global addresses everything else reads through.
+
+    This used to happen at import time, but the reader and ui processes (see tick_ring.py) import this module again
+    when they're spawned on Windows and must not connect to xemu or start servers of their own.
+
+    process/translator replace the pymem process and QmpProxy, e.g. with snapshot.SnapshotProcess and
+    snapshot.IdentityTranslator to decode captured memory offline.
+    """
+
+    global t, pid, pm, static_map_store, saved_addresses, game_hash
+    if static_map_store is None:
+        static_map_store = map_store.MapStore(map_store_path)
+    if saved_addresses is None:
+        saved_addresses = address_cache.AddressCache(address_cache_path)
+    game_hash = None
+    if process is None:
+        wait_for_xemu()
+    else:
+        pm = process
+        pid = getattr(process, 'process_id', 0)
+        bind_memory_functions(process)
+    t = translator if translator is not None else QmpProxy()
+    forget_translations()
+    resolve_addresses()
+
+
+def resolve_addresses():
+    """Restores the region table, translations and globals from the address cache, or resolves them from scratch"""
+
+    start = time.perf_counter()
+    # nothing from before is trusted until the canaries say so
+    host_regions.clear()
+    if restore_addresses():
+        print(f'Restored addresses from {address_cache_path} in {(time.perf_counter() - start) * 1000:.0f}ms')
+        return
+    map_guest_regions()
+    resolve_globals()
+    save_addresses()
+    print(f'Resolved addresses in {time.perf_counter() - start:.2f}s')
+
 
 clients = []
 server = None
@@ -100,8 +217,60 @@ def run_websocket_server():
     server.serveforever()
 
 
-server_thread = threading.Thread(target=run_websocket_server, daemon=True, name='websocket_server_thread')
-server_thread.start()
+# binary position frames for the live minimap, see minimap.py for the frame layout
+minimap_clients = []
+minimap_server = None
+minimap_stream = minimap.MinimapStream(trail_length=8)
+
+
+class MinimapWSServer(WebSocket):
+    def handleConnected(self):
+        print('Minimap websocket client connected', self.client, self.address)
+        minimap_clients.append(self)
+
+    def handleClose(self):
+        print('Minimap websocket client disconnected', self.client, self.address)
+        minimap_clients.remove(self)
+
+
+def run_minimap_websocket_server():
+    global minimap_server
+    minimap_server = SimpleWebSocketServer('0.0.0.0', 9001, MinimapWSServer,
+                                           selectInterval=(1000.0 / 60) / 1000)
+    print('Minimap websocket server started', minimap_server.serversocket)
+    minimap_server.serveforever()
+
+
+# per-tick read counts and stage times, see instrumentation.py
+metrics_clients = []
+metrics_server = None
+
+
+class MetricsWSServer(WebSocket):
+    def handleConnected(self):
+        print('Metrics websocket client connected', self.client, self.address)
+        metrics_clients.append(self)
+
+    def handleClose(self):
+        print('Metrics websocket client disconnected', self.client, self.address)
+        metrics_clients.remove(self)
+
+
+def run_metrics_websocket_server():
+    global metrics_server
+    metrics_server = SimpleWebSocketServer('0.0.0.0', 9002, MetricsWSServer,
+                                           selectInterval=(1000.0 / 60) / 1000)
+    print('Metrics websocket server started', metrics_server.serversocket)
+    metrics_server.serveforever()
+
+
+def start_websocket_servers():
+    server_thread = threading.Thread(target=run_websocket_server, daemon=True, name='websocket_server_thread')
+    server_thread.start()
+    minimap_server_thread = threading.Thread(target=run_minimap_websocket_server, daemon=True, name='minimap_websocket_server_thread')
+    minimap_server_thread.start()
+    metrics_server_thread = threading.Thread(target=run_metrics_websocket_server, daemon=True, name='metrics_websocket_server_thread')
+    metrics_server_thread.start()
 
 
 class hexdump:
@@ -152,6 +321,7 @@ class QmpProxy:
 
     def __init__(self):
         self._qmp = None
+        self.lock = threading.Lock()
         self.connect()
 
     def connect(self):
@@ -172,7 +342,7 @@ class QmpProxy:
                     continue
             break
 
-    def run_cmd(self, cmd):
+    def run_cmd(self, cmd, quiet=False):
         # print(f'running command: {cmd}')
         now = datetime.datetime.now()
         delta = (now - self.last_request_time).total_seconds()
@@ -186,14 +356,16 @@ class QmpProxy:
                 "arguments": {}
             }
         self.cmd_counter += 1
-        if (datetime.datetime.now() - self.cmd_counter_reset).total_seconds() > 1.0:
+        instrumentation.record_qmp()
+        if not quiet and (datetime.datetime.now() - self.cmd_counter_reset).total_seconds() > 1.0:
             print(f'qmp commands in last {(datetime.datetime.now() - self.cmd_counter_reset).total_seconds()} seconds: {self.cmd_counter}')
             self.cmd_counter = 0
             self.cmd_counter_reset = datetime.datetime.now()
-            import traceback
             print(cmd)
             traceback.print_stack()
-        resp = self._qmp.cmd_obj(cmd)
+        # players can be read on several threads (see extraction_workers), one command at a time on the socket
+        with self.lock:
+            resp = self._qmp.cmd_obj(cmd)
         if resp is None:
             raise Exception('Disconnected!')
         # print(cmd, resp)
@@ -207,6 +379,7 @@ class QmpProxy:
         return self.run_cmd('cont')
 
     def restart(self):
+        forget_translations()
         return self.run_cmd('system_reset')
 
     def screenshot(self):
@@ -260,10 +433,11 @@ class QmpProxy:
         data = int(data_string, 16)
         return data
 
-    def gva2gpa(self, addr):
+    def gva2gpa(self, addr, quiet=False):
         """
         See https://github.com/qemu/qemu/blob/5e05c40ced78ed9a3c25a82ec1f144bb7baffe3f/monitor/misc.c#L684
         :param addr:
+        :param quiet: don't print unmapped addresses or the command rate, e.g. while probing page after page
         :return:
         """
         cmd = {
@@ -271,98 +445,331 @@ class QmpProxy:
             "arguments": {"command-line": "gva2gpa {}".format(addr)}
         }
         # print('Getting guest physical address of guest virtual address {}'.format(hex(addr)))
-        response = self.run_cmd(cmd)
+        response = self.run_cmd(cmd, quiet)
         # print(cmd, response)
         lines = response['return'].replace('\r', '').split('\n')
         data_string = ' '.join(l.partition('gpa: ')[2] for l in lines).strip()
         try:
             data = int(data_string, 16)
         except ValueError:
-            print(f'Error converting gpa {hex(addr)} to gva (got {response})')
+            if not quiet:
+                print(f'Error converting gpa {hex(addr)} to gva (got {response})')
             raise
         return data
 
-    def gva2hva(self, addr):
-        return self.gpa2hva(self.gva2gpa(addr))
+    def gva2hva(self, addr, quiet=False):
+        return self.gpa2hva(self.gva2gpa(addr, quiet))
 
     def translate(self, addr):
         return self.gva2hva(addr)
 
 
-t = QmpProxy()
+# QmpProxy instance, connected in attach()
+t = None
 
 
-"""
-known_addresses is a map of guest address to host address translations
-
-it has the form:
-    known_addresses = {
-                        <int guest address>: {
-                             'host_address': <int host address>
-                             'value': <int value>
-                             'type': <str value type>
-                         }
-                      }
-"""
-known_addresses = defaultdict(dict)
+# guest page to host page translations from QMP, bounded and LRU evicted, see translation_cache.py
+translations = translation_cache.TranslationCache(max_pages=4096)
+# where each QMP translation came from, only filled in with track_translation_provenance
+translation_provenance = translation_cache.Provenance()
+# last value of every address read with retry_on_value_change
+watched_values = {}
+# coalesced guest to host ranges, filled in by map_guest_regions()
+host_regions = region_map.RegionMap()
 pymem_counter = 0
 # stores start time of current game and various cross-tick stats
 # this will eventually be replaced by a full game class
 game_meta = {}
+# players, objects, items and spawns of the latest tick extract_events() saw, for proximity queries
+spatial = spatial_index.SpatialIndex()
+# every projectile from spawn to detonation, and the damage it did, see projectile_tracker.py
+projectiles = projectile_tracker.ProjectileTracker()
 memory_cache = {}
 object_type_datum_sizes = dict()
 
 
-def populate_memory_cache():
+def get_probe_ranges():
     """
-    Cache snapshots of large segments of contiguous memory for future lookups.
-    This cache should be invalidated and repopulated every tick by calling invalidate_memory_cache().
+    Guest ranges map_guest_regions() probes, as (description, guest start, guest end, gallop).
+    See region_map.probe() for why only main RAM gets galloped over.
+    """
+
+    ranges = [
+        # the parts of the xbe get_capture_regions() and get_snapshot_regions() read, not the 150 pages in between
+        ("xbe image", 0x10000, 0x1F8000, False),
+        ("globals", 0x1F8000, 0x2FD000, False),
+        ("tag globals", 0x39B000, 0x39D000, False),
+        ("ram", 0x80000000, 0x84000000, True),
+    ]
+    # the tag cache is only known once the xbe image is mapped, it's allocated as one block so gallop over it too
+    if host_regions:
+        tag_cache_address = read_u32(0x2E2D18)
+        if tag_cache_address and tag_cache_address < 0x80000000:
+            ranges.append(("tag cache", tag_cache_address, tag_cache_address + read_u32(0x32E5D), True))
+    return ranges
+
+
+def map_guest_regions(descriptions=None):
+    """
+    Fills host_regions with every contiguous guest to host range in get_probe_ranges().
+
+    descriptions limits probing to some of the ranges, e.g. ('tag cache',) while a new map is loading.
+    """
+
+    if descriptions is None:
+        host_regions.clear()
+    else:
+        # translations already handed out for the remapped ranges may be stale now
+        forget_translations()
+    probe_start = time.perf_counter()
+    probed = set()
+    # probe in passes, the tag cache range can only be read once the xbe image is mapped
+    for _ in range(2):
+        for description, guest_start, guest_end, gallop in get_probe_ranges():
+            if description in probed or (descriptions is not None and description not in descriptions):
+                continue
+            probed.add(description)
+            host_regions.remove(guest_start, guest_end)
+            host_regions.update(region_map.probe(lambda page: t.gva2hva(page, quiet=True), guest_start, guest_end,
+                                                 gallop=gallop))
+    print(f'Mapped {len(host_regions)} guest memory regions in {time.perf_counter() - probe_start:.2f}s')
+
+
+# opened in attach()
+saved_addresses = None
+
+
+def get_address_cache_key():
+    """xemu build and xbe the saved addresses are valid for, None when not attached to a real xemu"""
+
+    if not pid or saved_addresses is None:
+        return None
+    return f'{saved_addresses.binary_hash(psutil.Process(pid).exe())}|{calculate_game_hash()}'
+
+
+def restore_addresses():
+    """
+    Loads the region table, translations and globals saved for this xemu build and xbe, once the canary addresses
+    translate the same as when they were saved. Returns False if everything has to be resolved from scratch.
+    """
+
+    key = get_address_cache_key()
+    entry = saved_addresses.get(key) if key else None
+    if not entry:
+        return False
+
+    try:
+        ram_base = t.gpa2hva(0)
+        regions, pages, canaries = address_cache.relocate(entry, ram_base)
+        for guest_address, host_address in canaries:
+            if t.gva2hva(guest_address) != host_address:
+                print(f'Address cache canary {guest_address:#x} moved, resolving addresses from scratch')
+                return False
+    except ValueError as e:
+        print(f'Address cache canary check failed ({e}), resolving addresses from scratch')
+        return False
+
+    host_regions.clear()
+    host_regions.update(regions)
+    translations.load(pages)
+
+    # the globals only move when the game reallocates them, check a couple against memory before trusting the rest
+    saved_globals = entry['globals']
+    if (read_u32(0x2FAD28) == saved_globals['player_datum_array']
+            and read_u32(0x2F8CA0) == saved_globals['game_time_globals_address']
+            and read_u32(0x39CE24) == saved_globals['global_tag_instances_address']):
+        globals().update(saved_globals)
+    else:
+        resolve_globals()
+    return True
+
+
+def save_addresses():
+    """Saves the current region table, translations and globals to the address cache"""
+
+    key = get_address_cache_key()
+    if not key:
+        return
+    saved_addresses.put(key, t.gpa2hva(0), list(host_regions), translations.items(),
+                        {name: globals()[name] for name in resolved_global_names},
+                        [(guest_address, t.gva2hva(guest_address)) for guest_address in address_canaries])
+
+
+def get_tick_regions():
+    """
+    Large segments of contiguous memory that get copied in one read per tick, as (description, guest address, size).
+    Used by populate_memory_cache() and by the reader process (see tick_ring.py).
     """
-    def add_range_to_cache(base_address, size, description=None):
-        """Helper function to add a memory range to the cache."""
-        if base_address and size > 0:
-            add_to_cache(base_address, size)
-        else:
-            if description:
-                print(f"Warning: Skipping caching {description} due to invalid address or size.")
 
     # Game state
-    add_range_to_cache(read_u32(0x2E2D14), read_u32(0x32E4A), "game state")
+    regions = [("game state", read_u32(0x2E2D14), read_u32(0x32E4A))]
 
     # Spawns from tags cache
     global_scenario_address = read_u32(0x39BE5C)
     first_spawn_address = read_s32(global_scenario_address + 856)
     if first_spawn_address:
         spawn_count = read_s32(global_scenario_address + 852)
-        add_range_to_cache(first_spawn_address, 52 * spawn_count, "spawns from tags cache")
+        regions.append(("spawns from tags cache", first_spawn_address, 52 * spawn_count))
 
     # Observer camera
-    add_range_to_cache(0x271550, 688 * 4, "observer camera")
+    regions.append(("observer camera", 0x271550, 688 * 4))
 
     # Object type definitions
     # FIXME: Adjust size calculation for accuracy
-    add_range_to_cache(0x1FC0D0, (0x1FCBA4 - 0x1FC0D0) * 2, "object type definitions")
+    regions.append(("object type definitions", 0x1FC0D0, (0x1FCBA4 - 0x1FC0D0) * 2))
+
+    return regions
+
+
+def get_snapshot_regions():
+    """
+    Tick regions plus the .data/.bss globals, which together cover nearly every read get_game_info() makes.
+    Reads outside these regions still go to live memory.
+    """
+
+    return get_tick_regions() + [
+        # datum array pointers, game time globals, input state, network game, scores, observer cameras...
+        ("globals", 0x1F8000, 0x2FD000 - 0x1F8000),
+    ]
+
+
+def populate_memory_cache():
+    """
+    Cache snapshots of large segments of contiguous memory for future lookups.
+    This cache should be invalidated and repopulated every tick by calling invalidate_memory_cache().
+    """
+
+    requests = []
+    for description, base_address, size in get_tick_regions():
+        if base_address and size > 0:
+            requests.append((base_address, size))
+        else:
+            print(f"Warning: Skipping caching {description} due to invalid address or size.")
+
+    for (base_address, size), data in zip(requests, read_many(requests)):
+        memory_cache[(base_address, base_address + size, get_host_address(base_address))] = data
+
+
+def take_tick_snapshot():
+    """
+    Copies every snapshot region into memory_cache back to back, reading game_time right before and right after.
+
+    get_game_info() makes hundreds of reads while xemu keeps running, so without this a tick can mix state from two
+    ticks. If game_time changed during the copy the copy is torn and gets retried (up to snapshot_retries times);
+    if it still doesn't settle, the last copy is used anyway and flagged with consistent=False.
+    Host addresses are resolved before the first copy so the copy itself is nothing but reads.
+    """
+
+    regions = [(base_address, size, get_host_address(base_address))
+               for _, base_address, size in get_snapshot_regions() if base_address and size > 0]
+    game_time_host_address = get_host_address(game_time_address)
+    ranges = [(host_address, size) for _, size, host_address in regions]
+
+    for attempt in range(snapshot_retries + 1):
+        copy_start = time.perf_counter()
+        before = read_u32(game_time_host_address, is_host_address=True)
+        buffers = scatter_reader.read_many(ranges)
+        after = read_u32(game_time_host_address, is_host_address=True)
+        copy_ms = (time.perf_counter() - copy_start) * 1000
+        if before == after:
+            break
+
+    invalidate_memory_cache()
+    for (base_address, size, host_address), data in zip(regions, buffers):
+        memory_cache[(base_address, base_address + size, host_address)] = data
+
+    return {
+        'consistent': before == after,
+        'retries': attempt,
+        'game_time': after - 1,
+        'copy_ms': copy_ms,
+        'bytes': sum(size for _, size, _ in regions),
+    }
+
+
+def load_snapshot_into_cache(snapshot):
+    """Same as populate_memory_cache(), but with regions the reader process already copied into the tick ring"""
+
+    for guest_address, host_address, data in snapshot.regions:
+        memory_cache[(guest_address, guest_address + len(data), host_address)] = data
+
+
+def get_capture_regions():
+    """
+    Everything get_game_info() reads, for raw captures (see raw_capture.py).
+    Returns (per_tick, per_map) lists of (description, guest address, size). The player datum array, object header
+    table and object datums all live inside the game state block, so they're covered by get_tick_regions().
+    """
+
+    per_tick = get_snapshot_regions()
+    per_map = [
+        # code immediates (e.g. the cache sizes at 0x32E4A) and object type definition strings
+        ("xbe image", 0x10000, 0x1F8000 - 0x10000),
+        # global scenario and tag instance pointers
+        ("tag globals", 0x39B000, 0x39D000 - 0x39B000),
+        ("tag cache", read_u32(0x2E2D18), read_u32(0x32E5D)),
+        ("kernel header", 0x80010000, 200),
+    ]
+    return per_tick, per_map
+
+
+def capture_raw_tick(capture, game_time):
+    """Copies this tick's capture regions into a raw_capture.RawCaptureWriter, and the map regions if the map changed"""
+
+    per_tick, per_map = get_capture_regions()
+    map_key = (read_u32(0x39BE5C), read_u32(0x39CE24))  # global scenario and tag instances move on every map load
+    if map_key != capture.map_key:
+        requests = [(base_address, size) for _, base_address, size in per_map if base_address and size > 0]
+        capture.write_map(map_key, [(base_address, data) for (base_address, _), data in zip(requests, read_many(requests))])
+    requests = [(base_address, size) for _, base_address, size in per_tick if base_address and size > 0]
+    capture.write_tick(game_time, [(base_address, data) for (base_address, _), data in zip(requests, read_many(requests))])
+
+
+def get_read_plan():
+    """Host addresses of everything the reader process needs to copy each tick"""
+
+    tick_regions = get_snapshot_regions() if use_consistent_snapshots else get_tick_regions()
+    regions = [(base_address, get_host_address(base_address), size)
+               for _, base_address, size in tick_regions if base_address and size > 0]
+    return tick_ring.ReadPlan(get_host_address(game_time_address), regions)
 
 def invalidate_memory_cache():
     memory_cache.clear()
 
 
+def forget_translations():
+    """Drops every cached guest to host translation, e.g. after the emulator was reset"""
+    translations.invalidate()
+    translation_provenance.clear()
+    watched_values.clear()
+
+
 def add_to_cache(address, size):
     memory_cache[(address, address + size, get_host_address(address))] = read_bytes(address, size, keep_value=False)
 
 
-memory_functions = {
-    '<B': pm.read_uchar,
-    '<H': pm.read_ushort,
-    '<I': pm.read_uint,
-    '<Q': pm.read_ulonglong,
-    '<b': pm.read_char,
-    '<h': pm.read_short,
-    '<i': pm.read_int,
-    '<f': pm.read_float,
-    'bytes': pm.read_bytes,
-    'string': pm.read_string,
-}
+# filled in by bind_memory_functions() once we're attached to a process
+memory_functions = {}
+scatter_reader = None
+
+
+def bind_memory_functions(process):
+    global scatter_reader
+    if scatter_reader:
+        scatter_reader.close()
+    scatter_reader = scatter_read.ScatterReader(getattr(process, 'process_id', 0), fallback_read=process.read_bytes)
+    memory_functions.update({
+        '<B': process.read_uchar,
+        '<H': process.read_ushort,
+        '<I': process.read_uint,
+        '<Q': process.read_ulonglong,
+        '<b': process.read_char,
+        '<h': process.read_short,
+        '<i': process.read_int,
+        '<f': process.read_float,
+        'bytes': process.read_bytes,
+        'string': process.read_string,
+    })
 
 struct_objects = {
     '<B': struct.Struct('<B'),
@@ -376,18 +783,35 @@ struct_objects = {
 }
 
 
+def read_size(fn, kwargs):
+    """Bytes a read_memory() call covers, for instrumentation"""
+    if fn in struct_objects:
+        return struct_objects[fn].size
+    return kwargs.get('length') or kwargs.get('byte', 0)
+
+
 def read_from_cache(address, fmt, length=128, **kwargs):
     """
     Returns an empty dict if the address is not found in the cache.
     If the address is found, returns a dict with 'value' and 'host_address'.
+    Reads that run past the end of a cached region aren't served from it (strings are just cut short).
     """
+    if fmt in struct_objects:
+        size = struct_objects[fmt].size
+    elif fmt == 'bytes':
+        size = length
+    elif fmt == 'string':
+        size = 1
+    else:
+        size = struct.calcsize(fmt)
+
     for (start, end, host_address), cached_bytes in memory_cache.items():
-        if not (start <= address <= end):
+        if not (start <= address and address + size <= end):
             continue
 
         # Address is found in the cache
         offset = address - start
-        host_addr_offset = get_host_address(start) + offset
+        host_addr_offset = host_address + offset
         result = {'host_address': host_addr_offset}
 
         # Determine the format and extract the value
@@ -414,25 +838,27 @@ def read_from_cache(address, fmt, length=128, **kwargs):
 
 def get_host_address_from_cache(address):
     for (start, end, host_address), cached_bytes in memory_cache.items():
-        if start <= address <= end:
-            return get_host_address(start) + (address - start)
+        if start <= address < end:
+            return host_address + (address - start)
     return -1
 
 
 # FIXME: avoid the forced qmp lookup in get_host_address
 def get_host_address(address):
-    # Check if the address is already known
-    if address in known_addresses:
-        return known_addresses[address]['host_address']
-
-    # Attempt to retrieve the host address from the cache
+    # Attempt to retrieve the host address from the cache, then from the probed regions and earlier translations
     host_address = get_host_address_from_cache(address)
     if host_address >= 0:
-        known_addresses[address] = {'host_address': host_address}
-    else:
+        return host_address
+    host_address = host_regions.lookup(address)
+    if host_address is None:
+        host_address = translations.lookup(address)
+    if host_address is None:
         # Fallback to translating the address if not found in cache
         host_address = t.translate(address)
-        known_addresses[address] = {'host_address': host_address}
+        translations.insert(address, host_address)
+        if track_translation_provenance:
+            # the line that called get_host_address()
+            translation_provenance.record(address, host_address, 'qmp', stack_depth=3)
 
     return host_address
 
@@ -445,40 +871,44 @@ def read_memory(address, fn, retry_on_value_change=False, is_host_address=False,
 
     global pymem_counter
 
-    def update_known_address(addr, val, host_addr):
-        """Helper function to update the known_addresses dictionary."""
-        known_addresses[addr] = {
-            'host_address': host_addr,
-            'value': val if keep_value else 0,
-            'type': memory_functions[fn].__name__
-        }
-
     # Read directly if address is a host address
     if is_host_address:
         value = memory_functions[fn](address, **kwargs)
         pymem_counter += 1
+        if instrument_reads:
+            instrumentation.record_read(read_size(fn, kwargs), cache_hit=False)
         return value
 
     # Check memory cache
     cached_value = read_from_cache(address, fn, **kwargs)
+    if instrument_reads:
+        instrumentation.record_read(read_size(fn, kwargs), cache_hit=bool(cached_value))
     if cached_value:
-        update_known_address(address, cached_value['value'], cached_value['host_address'])
         return cached_value['value']
 
-    # Check known addresses
-    if address in known_addresses:
-        host_address = known_addresses[address]['host_address']
+    # Look the address up in the probed guest to host ranges
+    host_address = host_regions.lookup(address)
+    if host_address is not None:
+        value = memory_functions[fn](host_address, **kwargs)
+        pymem_counter += 1
+        return value
+
+    # Check earlier translations
+    host_address = translations.lookup(address)
+    if host_address is not None:
         value = memory_functions[fn](host_address, **kwargs)
         pymem_counter += 1
 
         # Retry if the value changes unexpectedly
-        if retry_on_value_change and value != known_addresses[address]['value']:
-            print(f'WARNING: value for {hex(address)} changed from {hex(known_addresses[address]["value"])} to {hex(value)}')
-            host_address = t.gva2hva(address)
-            value = memory_functions[fn](host_address, **kwargs)
-            pymem_counter += 1
+        if retry_on_value_change:
+            if address in watched_values and value != watched_values[address]:
+                print(f'WARNING: value for {hex(address)} changed from {hex(watched_values[address])} to {hex(value)}')
+                host_address = t.gva2hva(address)
+                translations.insert(address, host_address)
+                value = memory_functions[fn](host_address, **kwargs)
+                pymem_counter += 1
+            watched_values[address] = value
 
-        update_known_address(address, value, host_address)
         return value
 
     # Handle contiguous RAM assumption
@@ -488,24 +918,55 @@ def read_memory(address, fn, retry_on_value_change=False, is_host_address=False,
         host_address = base_address + offset
         value = memory_functions[fn](host_address, **kwargs)
         pymem_counter += 1
-        update_known_address(address, value, host_address)
+        translations.insert(address, host_address)
         return value
 
     # Translate guest address to host address (fallback)
     host_address = t.gva2hva(address)
     value = memory_functions[fn](host_address, **kwargs)
     pymem_counter += 1
-    update_known_address(address, value, host_address)
-    
-    # Debugging information
-    known_addresses[address]['qmp'] = True  # Marking as a QMP translation
-    known_addresses[address]['qmp_traceback'] = traceback.extract_stack()[-3].line
-    
+    translations.insert(address, host_address)
+    if retry_on_value_change:
+        watched_values[address] = value
+
+    # Debugging information, the extractor line that called read_u32() (or another read_memory() wrapper)
+    if track_translation_provenance:
+        translation_provenance.record(address, host_address, 'qmp', stack_depth=4)
+
     return value
 
 
 
 
+def read_many(requests):
+    """
+    Reads a batch of (guest address, size) ranges and returns their bytes in request order.
+
+    Ranges that are entirely inside memory_cache come from there. Host addresses for the rest are resolved first,
+    then they all go out as one scatter read (a single process_vm_readv on Linux, see scatter_read.py).
+    """
+
+    global pymem_counter
+
+    results = [None] * len(requests)
+    pending = []
+    for i, (address, size) in enumerate(requests):
+        cached_value = read_from_cache(address, 'bytes', length=size)
+        if instrument_reads:
+            instrumentation.record_read(size, cache_hit=bool(cached_value))
+        if cached_value:
+            results[i] = cached_value['value']
+        else:
+            pending.append((i, get_host_address(address), size))
+
+    if pending:
+        buffers = scatter_reader.read_many([(host_address, size) for _, host_address, size in pending])
+        pymem_counter += 1
+        for (i, _, _), data in zip(pending, buffers):
+            results[i] = data
+    return results
+
+
 def read_u8(address, *args, **kwargs):
     return read_memory(address, '<B', *args, **kwargs)
 
@@ -548,29 +1009,54 @@ def write_bytes(address, value, length, is_guest_address=True, *args, **kwargs):
 
 
 def get_formatted_bytes(address, length, columns=32):
+    return format_bytes(read_bytes(address, length), columns)
+
+
+def format_bytes(data, columns=32):
 
-    data = read_bytes(address, length)
     data_string = [data.hex(' ')[i:i+3*columns].strip() for i in range(0, len(data.hex(' ')), 3*columns)]
     return data_string
 
 
-# FIXME: qmp lookups outside functions
-player_datum_array = read_u32(0x2FAD28)
-player_datum_array_max_count = read_u16(player_datum_array + 0x20)
-player_datum_array_element_size = read_u16(player_datum_array + 0x22)
-player_datum_array_first_element_address = read_u32(player_datum_array + 0x34)
-players_globals_address = read_u32(0x2FAD20)
-teams_address = read_u32(0x2FAD24)
-game_globals_address = read_u32(0x27629C)
-global_game_globals_address = read_u32(0x39BE4C)
-game_server_address = read_u32(0x2E3628)
-game_client_address = read_u32(0x2E362C)
-game_connection_address = 0x2E3684
-is_team_game_address = read_u8(0x2F90C4)
-game_time_globals_address = read_u32(0x2F8CA0)
-global_tag_instances_address = read_u32(0x39CE24)
-hud_messages_pointer = read_u32(0x276B40)
-something_saying_main_menu = read_u32(0x2E4000 + 4)
+def resolve_globals():
+    """
+    Looks up the global addresses that the rest of the reads are relative to.
+    Called from attach(), and needs to be called again whenever we reattach to xemu.
+    """
+
+    global player_datum_array, player_datum_array_max_count, player_datum_array_element_size
+    global player_datum_array_first_element_address, players_globals_address, teams_address, game_globals_address
+    global global_game_globals_address, game_server_address, game_client_address, game_connection_address
+    global is_team_game_address, game_time_globals_address, global_tag_instances_address, hud_messages_pointer
+    global something_saying_main_menu, game_time_address
+
+    player_datum_array = read_u32(0x2FAD28)
+    player_datum_array_max_count = read_u16(player_datum_array + 0x20)
+    player_datum_array_element_size = read_u16(player_datum_array + 0x22)
+    player_datum_array_first_element_address = read_u32(player_datum_array + 0x34)
+    players_globals_address = read_u32(0x2FAD20)
+    teams_address = read_u32(0x2FAD24)
+    game_globals_address = read_u32(0x27629C)
+    global_game_globals_address = read_u32(0x39BE4C)
+    game_server_address = read_u32(0x2E3628)
+    game_client_address = read_u32(0x2E362C)
+    game_connection_address = 0x2E3684
+    is_team_game_address = read_u8(0x2F90C4)
+    game_time_globals_address = read_u32(0x2F8CA0)
+    global_tag_instances_address = read_u32(0x39CE24)
+    hud_messages_pointer = read_u32(0x276B40)
+    something_saying_main_menu = read_u32(0x2E4000 + 4)
+    game_time_address = game_time_globals_address + 12
+
+
+# everything resolve_globals() sets, saved by save_addresses()
+resolved_global_names = (
+    'player_datum_array', 'player_datum_array_max_count', 'player_datum_array_element_size',
+    'player_datum_array_first_element_address', 'players_globals_address', 'teams_address', 'game_globals_address',
+    'global_game_globals_address', 'game_server_address', 'game_client_address', 'game_connection_address',
+    'is_team_game_address', 'game_time_globals_address', 'global_tag_instances_address', 'hud_messages_pointer',
+    'something_saying_main_menu', 'game_time_address',
+)
 
 spawns_cache = []
 
@@ -651,7 +1137,7 @@ def get_items(cache_results=True):
 
         tag_index_short = tag_index & 0xFFFF
         tag_name_address = global_tag_instances_address + 32 * tag_index_short
-        tag_name = read_string(read_s32(tag_name_address + 0x10))
+        tag_name = get_tag_name(tag_index_short)
         item_spawn_interval = read_s16(read_s32(tag_name_address + 0x14) + 0xC)
         
         # Create item dictionary and append to the list
@@ -675,9 +1161,86 @@ def get_items(cache_results=True):
 
 
 
+tag_names = {}
+
+
+def get_tag_name(tag_index):
+    """Name of the tag at tag_index (the low 16 bits of a tag id), cached until the next map"""
+
+    tag_index &= 0xFFFF
+    tag_name = tag_names.get(tag_index)
+    if tag_name is None:
+        tag_name = tag_names[tag_index] = read_string(read_u32(global_tag_instances_address + 32 * tag_index + 0x10))
+    return tag_name
+
+
 def clear_caches():
     spawns_cache.clear()
     items_cache.clear()
+    tag_names.clear()
+    extraction_scheduler.clear()
+
+
+def get_map_key():
+    """Changes whenever a new map loads, the global scenario and tag instances are allocated per map"""
+    return read_u32(0x39BE5C), read_u32(0x39CE24)
+
+
+# map key warm_up_map() last ran for, and the fingerprint of that map (see calculate_map_hash())
+warmed_map_key = None
+current_map_hash = None
+# opened in attach()
+static_map_store = None
+
+
+def warm_up_map():
+    """
+    Does the once per map work while the map is loading or sitting in the pregame lobby, instead of on the first
+    ticks of the game: remaps the tag cache, re-resolves the globals, reads the scenario spawns and items, looks up
+    the name of every tag the placed objects use, and resolves the object table pages.
+    """
+
+    global warmed_map_key, current_map_hash
+
+    start = time.perf_counter()
+    misses_before = translations.misses
+    map_guest_regions(('tag cache',))
+    resolve_globals()
+    clear_caches()
+
+    # a map version we've seen before doesn't need its scenario read again
+    current_map_hash = calculate_map_hash()
+    stored = static_map_store.get(current_map_hash) if static_map_store else None
+    if stored:
+        spawns_cache[:] = stored['spawns']
+        items_cache[:] = stored['items']
+        tag_names.update(stored['tag_names'])
+    spawns = get_spawns()
+    items = get_items()
+
+    object_header_datum_array = read_u32(0x2FC6AC)
+    max_objects = read_u16(object_header_datum_array + 0x20)
+    first_object_header_address = read_u32(object_header_datum_array + 0x34)
+    for page in range(first_object_header_address, first_object_header_address + 12 * max_objects, 0x1000):
+        get_host_address(page)
+    for i in range(read_u16(object_header_datum_array + 0x2E)):
+        object_address = read_u32(first_object_header_address + 12 * i + 8)
+        if object_address:
+            get_host_address(object_address)
+            get_tag_name(read_s16(object_address))
+
+    if static_map_store and not stored:
+        # 'address' has this session's host addresses in it, which are wrong after a restart
+        spawns_to_store = [{key: value for key, value in spawn.items() if key != 'address'} for spawn in spawns]
+        items_to_store = [{key: value for key, value in item.items() if key != 'address'} for item in items]
+        static_map_store.put(current_map_hash, read_string(0x2E37CD),
+                             dict(spawns=spawns_to_store, items=items_to_store, tag_names=tag_names))
+    # the tag cache may have moved and globals were re-resolved, keep the next restart from starting stale
+    save_addresses()
+
+    warmed_map_key = get_map_key()
+    print(f'Warmed up map {read_string(0x2E37CD)!r} ({current_map_hash}, {"stored" if stored else "new"}): {len(spawns)} spawns, {len(items)} items, {len(tag_names)} tags, '
+          f'{translations.misses - misses_before} translation misses in {(time.perf_counter() - start) * 1000:.1f}ms')
 
 
 last_game_connection = ''
@@ -709,7 +1272,7 @@ def get_game_time_info():
         game_time_speed=read_float(game_time_globals_address + 24),  # 1.0 is normal speed
         game_time_leftover_dt=read_float(game_time_globals_address + 28),
         update_client_maximum_actions=read_u32(0x2E87E8) - read_u32(0x2E87E4) + 1,  # typically gets set to 1 then decremented back to 0
-        game_time_globals_address_hex=f'{game_time_globals_address:#x} -> {known_addresses[game_time_globals_address]["host_address"]:#x}',
+        game_time_globals_address_hex=f'{game_time_globals_address:#x} -> {get_host_address(game_time_globals_address):#x}',
         real_time_elapsed=str(datetime.timedelta(seconds=read_u32(game_time_globals_address + 12)/30)).split('.')[0],  # FIXME duplicated read
     )
 
@@ -746,16 +1309,17 @@ def datum_size_from_object_type(object_type):
     return datum_size
 
 
-def get_objects():
+def get_objects(context=None):
     """
     Every 30 seconds, the object header table gets rearranged.
     Retrieves objects and their details.
     """
 
-    objects = []
     object_header_datum_array = read_u32(0x2FC6AC)
     object_header_datum_array_total_count = read_u16(object_header_datum_array + 0x2E)
-    object_header_datum_array_first_element_address = read_u32(object_header_datum_array + 0x34)
+    if context is None:
+        context = new_tick_context()
+    context.bind(object_header_datum_array, global_tag_instances_address)
 
     # Early exit if no objects
     if object_header_datum_array_total_count <= 0:
@@ -766,23 +1330,39 @@ def get_objects():
     unit_datum_size = read_u16(0x1FC188)
     item_datum_size = read_u16(0x1FC380)
 
-    for i in range(object_header_datum_array_total_count):
-        base_address = object_header_datum_array_first_element_address + 12 * i
-        object_address = read_u32(base_address + 8)
+    # one contiguous slice of the table per worker, see extraction_workers
+    slice_size = -(-object_header_datum_array_total_count // max(extraction_workers, 1))
+    slices = [(context, first, min(first + slice_size, object_header_datum_array_total_count), item_datum_size)
+              for first in range(0, object_header_datum_array_total_count, slice_size)]
+    objects = tick_record_list('objects')
+    for slice_objects in map_extraction(get_object_slice, slices):
+        objects.extend(slice_objects)
+    return objects
+
+
+@instrumentation.tagged('objects')
+def get_object_slice(context, first, last, item_datum_size):
+    """Objects first to last (exclusive) of the object header table, see get_objects()"""
+
+    objects = tick_record_list(('object_slice', first))
+    for i in range(first, last):
+        object_address = context.objects.address_at(i)
         if object_address == 0x0:
             continue
 
         # Gather basic object information
         tag_index = read_s16(object_address)
-        tag_name = read_string(read_u32(32 * tag_index + global_tag_instances_address + 0x10))
+        tag_name = get_tag_name(tag_index)
         object_type = read_u8(object_address + 0x64)
         object_type_string = object_string_from_type(object_type)
+        owner_unit_ref = read_u32(object_address + 0x70)
+        context.objects.set_owner(i, owner_unit_ref)
 
         # Object details
         obj_details = {
             'object_id': i,
-            'address': f'{hex(object_address)} -> {hex(known_addresses[object_address]["host_address"])}',
-            'header_data': get_formatted_bytes(base_address, 12),
+            'address': f'{hex(object_address)} -> {hex(get_host_address(object_address))}',
+            'header_data': format_bytes(context.objects.header_bytes(i)),
             'flags': hex(read_u32(object_address + 0x4)),
             'x': read_float(object_address + 0xC),
             'y': read_float(object_address + 0x10),
@@ -795,7 +1375,7 @@ def get_objects():
             'ang_vel_z': read_float(object_address + 0x44),
             'time_existing': read_s16(object_address + 0x6C),
             'unk_damage_1': read_s16(object_address + 0x68),
-            'owner_unit_ref': hex(read_u32(object_address + 0x70)),
+            'owner_unit_ref': hex(owner_unit_ref),
             'owner_object_ref': hex(read_u32(object_address + 0x74)),
             'parent_ref': hex(read_u32(object_address + 0xCC)),
             'ultimate_parent': hex(read_u32(object_address + 0x1E4)),
@@ -809,9 +1389,9 @@ def get_objects():
         # Handle projectile-specific data
         if object_type_string == 'projectile':
             projectile_address = object_address + item_datum_size
-            obj_details['type_specific_data'] = {
+            obj_details['type_specific_data'] = tick_record(('projectile', i), {
                 'flags': read_u32(projectile_address),
-                'address': f'{hex(projectile_address)} -> {hex(known_addresses[projectile_address]["host_address"])}',
+                'address': f'{hex(projectile_address)} -> {hex(get_host_address(projectile_address))}',
                 'action': read_s16(projectile_address + 0x4),
                 'hit_material_type': read_s16(projectile_address + 0x6),
                 'ignore_object_index': read_s32(projectile_address + 0x8),
@@ -830,10 +1410,10 @@ def get_objects():
                 'rotation_axis_z': read_float(projectile_address + 0x44),
                 'rotation_sine': read_float(projectile_address + 0x48),
                 'rotation_cosine': read_float(projectile_address + 0x4C),
-            }
+            })
 
         # Append the object to the list
-        objects.append(obj_details)
+        objects.append(tick_record(('object', i), obj_details, model.GameObject))
 
     return objects
 
@@ -936,7 +1516,8 @@ def get_player_ui_globals(local_player):
     )
 
 
-def get_input_data(local_player_index, player_id):
+@instrumentation.tagged('input')
+def get_input_data(context, local_player_index, player_id):
     """
     Retrieves input data for the specified player, including control states and raw gamepad input.
     """
@@ -950,17 +1531,17 @@ def get_input_data(local_player_index, player_id):
     action_field = read_u8(update_client_player_address + player_offset + 0x5)
 
     # Define dictionaries for different input states
-    player_control_state = {
+    player_control_state = tick_record(('player_control_state', player_id), {
         'player_desired_yaw': read_float((local_player_index << 6) + player_control_address + 0x1C),
         'player_desired_pitch': read_float((local_player_index << 6) + player_control_address + 0x20),
         'player_zoom_level': read_s16((local_player_index << 6) + player_control_address + 16 + 0x24),
         'player_aim_assist_target': hex(read_u32((local_player_index << 6) + player_control_address + 16 + 0x28)),
         'player_aim_assist_near': read_float((local_player_index << 6) + player_control_address + 16 + 0x2C),
         'player_aim_assist_far': read_float((local_player_index << 6) + player_control_address + 16 + 0x30)
-    } if local_player_index != -1 else {}
+    }) if local_player_index != -1 else {}
 
-    input_abstraction_input_state = {
-        'address': f'{hex(get_host_address(0x2E4600))}',
+    input_abstraction_input_state = tick_record(('input_abstraction_input_state', player_id), {
+        'address': f'{hex(context.host_address(0x2E4600))}',
         'a': read_u8(0x2E4600 + local_player_offset + 0x0),
         'black': read_u8(0x2E4600 + local_player_offset + 0x1),
         'x': read_u8(0x2E4600 + local_player_offset + 0x2),
@@ -977,11 +1558,11 @@ def get_input_data(local_player_index, player_id):
         'left_stick_horizontal': read_float(0x2E4600 + local_player_offset + 0x10),
         'right_stick_horizontal': read_float(0x2E4600 + local_player_offset + 0x14),
         'right_stick_vertical': read_float(0x2E4600 + local_player_offset + 0x18)
-    } if local_player_index != -1 else {}
+    }) if local_player_index != -1 else {}
 
-    input_gamepad_state = {
-        'address': f'{hex(get_host_address(0x276AFC + player_offset))}',
-        'address2': f'{hex(get_host_address(0x276A5C + player_offset))}',
+    input_gamepad_state = tick_record(('input_gamepad_state', player_id), {
+        'address': f'{hex(context.host_address(0x276AFC + player_offset))}',
+        'address2': f'{hex(context.host_address(0x276A5C + player_offset))}',
         'a': read_u8(0x276A5C + player_offset + 0x0),
         'b': read_u8(0x276A5C + player_offset + 0x1),
         'x': read_u8(0x276A5C + player_offset + 0x2),
@@ -1008,10 +1589,10 @@ def get_input_data(local_player_index, player_id):
         'left_stick_vertical': read_s16(0x276A5C + player_offset + 0x22),
         'right_stick_horizontal': read_s16(0x276A5C + player_offset + 0x24),
         'right_stick_vertical': read_s16(0x276A5C + player_offset + 0x26)
-    } if local_player_index != -1 else {}
+    }) if local_player_index != -1 else {}
 
-    update_queue_values = {
-        'address': f'{hex(get_host_address(update_client_player_address + player_offset))}',
+    update_queue_values = tick_record(('update_queue_values', player_id), {
+        'address': f'{hex(context.host_address(update_client_player_address + player_offset))}',
         'unit_ref': f'{hex(read_u16(update_client_player_address + player_offset))}',
         'button_field': f'{hex(button_field)}',
         'button_crouch': button_field & 0x1,
@@ -1031,26 +1612,27 @@ def get_input_data(local_player_index, player_id):
         'desired_weapon': read_u16(update_client_player_address + player_offset + 0x20),
         'desired_grenades': read_u16(update_client_player_address + player_offset + 0x22),
         'zoom_level': read_s16(update_client_player_address + player_offset + 0x24)
-    }
+    })
 
     # Return the final dictionary
-    return {
+    return tick_record(('input_data', player_id), {
         'local_player_index': local_player_index,
         'look_yaw_rate': read_float(0x2E4684 + 4 * local_player_index),
         'look_pitch_rate': read_float(0x2E4694 + 4 * local_player_index),
-        'input_abstraction_globals': f'{hex(read_u32(0x2E45A0))} @ {hex(get_host_address(0x2E45A0))}',
-        'player_control_pointer': f'{hex(player_control_address)} @ {hex(get_host_address(0x276794))}',
-        'player_control': f'{hex(read_u32(player_control_address))} @ {hex(get_host_address(player_control_address))}',
+        'input_abstraction_globals': f'{hex(read_u32(0x2E45A0))} @ {hex(context.host_address(0x2E45A0))}',
+        'player_control_pointer': f'{hex(player_control_address)} @ {hex(context.host_address(0x276794))}',
+        'player_control': f'{hex(read_u32(player_control_address))} @ {hex(context.host_address(player_control_address))}',
         'player_control_state': player_control_state,
         'input_abstraction_input_state': input_abstraction_input_state,
         'input_gamepad_state': input_gamepad_state,
         'update_queue_values': update_queue_values,
-        'player_ui_globals': get_player_ui_globals(local_player_index)
-    }
+        'player_ui_globals': extraction_scheduler.get('player_ui_globals', local_player_index)
+    }, model.InputState)
 
 
 
-def get_first_person_weapon(local_player_index):
+@instrumentation.tagged('weapons')
+def get_first_person_weapon(context, local_player_index):
     """
     Weapon states:
         0   idle
@@ -1066,8 +1648,8 @@ def get_first_person_weapon(local_player_index):
 
     weapon_address = read_u32(0x276B48) + 7840 * local_player_index
 
-    return dict(
-        address=f'{weapon_address:#x} -> {get_host_address(weapon_address):#x}',
+    return tick_record(('first_person_weapon', local_player_index), dict(
+        address=f'{weapon_address:#x} -> {context.host_address(weapon_address):#x}',
         weapon_rendered=read_u32(weapon_address),  # TODO: confirm if this is actually weapon_rendered
         player_object=f'{read_u32(weapon_address + 4):#x}',  # player object id?
         weapon_object=f'{read_u32(weapon_address + 8):#x}',  # weapon object id?
@@ -1076,18 +1658,22 @@ def get_first_person_weapon(local_player_index):
         idle_animation_counter=read_s16(weapon_address + 16),
         animation_id=read_s16(weapon_address + 22),  # TODO: not sure if this is animation id or something else
         animation_tick=read_s16(weapon_address + 24),
-    )
+    ))
 
 
-def get_observer_camera_info(local_player_index):
+def get_observer_camera_info(context, local_player_index):
 
     if local_player_index == -1:
         return {}
+    return context.observer_camera(local_player_index, read_observer_camera)
+
+
+def read_observer_camera(context, local_player_index):
 
     observer_camera_address = 0x271550 + 167 * 4 * local_player_index  # 668 * player
 
-    return dict(
-        address=f'{observer_camera_address:#x} -> {get_host_address(observer_camera_address):#x}',
+    return tick_record(('observer_camera_info', local_player_index), dict(
+        address=f'{observer_camera_address:#x} -> {context.host_address(observer_camera_address):#x}',
         x=read_float(observer_camera_address),
         y=read_float(observer_camera_address + 4),
         z=read_float(observer_camera_address + 8),
@@ -1098,10 +1684,11 @@ def get_observer_camera_info(local_player_index):
         y_aim=read_float(observer_camera_address + 36),
         z_aim=read_float(observer_camera_address + 40),
         fov=read_float(observer_camera_address + 56),  # vertical fov in radians
-    )
+    ))
 
 
-def get_model_nodes(base_address):
+def get_model_nodes(base_address, model_nodes=None):
+    """model_nodes is a list to fill instead of a new one"""
 
     model_node_offsets = [
         # 0x438,  # player location
@@ -1126,7 +1713,8 @@ def get_model_nodes(base_address):
         0x850,
     ]
 
-    model_nodes = []
+    if model_nodes is None:
+        model_nodes = []
 
     for offset in model_node_offsets:
         model_nodes.append((
@@ -1237,6 +1825,7 @@ def get_network_game_data(network_game_data_address):
     )
 
 
+@instrumentation.tagged('network')
 def get_network_game_client():
 
     network_game_client_address = 0x2FB180
@@ -1256,6 +1845,7 @@ def get_network_game_client():
     )
 
 
+@instrumentation.tagged('network')
 def get_network_game_server():
 
     # from network_game_server_create(), network_game_server_memory_do_not_use_directly
@@ -1332,7 +1922,7 @@ def dump_game_update_contents():
 
 
 
-def get_animation_debug_info(unk_handle, animation_id, animation_tick):
+def get_animation_debug_info(context, unk_handle, animation_id, animation_tick):
     """
     from animation_update_internal()
 
@@ -1342,7 +1932,7 @@ def get_animation_debug_info(unk_handle, animation_id, animation_tick):
     :return:
     """
 
-    tag_address = read_u32(32 * (unk_handle & 0xFFFF) + global_tag_instances_address + 20)
+    tag_address = context.tag_definition(unk_handle)
     animation_address = read_u32(tag_address + 120) + 180 * animation_id
 
     animation_length = read_s16(animation_address + 34)
@@ -1384,35 +1974,512 @@ def arrange_objects_by_type(objects):
     objects_meta = dict(
         object_indexes_by_type=defaultdict(list),
         object_ids_by_type=defaultdict(list),
-        projectiles_by_unit_id=defaultdict(list)
     )
 
+    # projectiles by owner are ProjectileTracker's job, it only has to look at the new ones
     for i, o in enumerate(objects):
-        object_type = o['object_type_string']
+        object_type = o.object_type_string
         objects_meta['object_indexes_by_type'][object_type].append(i)
-        objects_meta['object_ids_by_type'][object_type].append(o['object_id'])
-        if object_type == 'projectile':
-            # player_id = int(o['ultimate_parent'], 16) & 0xFFFF
-            objects_meta['projectiles_by_unit_id'][o['owner_unit_ref']].append(i)
-
-    # if objects_by_type['projectiles_by_unit_id']:
-    #     print(objects_by_type['projectiles_by_unit_id'])
+        objects_meta['object_ids_by_type'][object_type].append(o.object_id)
 
     return objects_meta
 
 
-def get_game_info():
+# created on first use and whenever extraction_workers changes, see map_extraction()
+extraction_pool = None
+extraction_pool_workers = 0
+
+
+def map_extraction(fn, args_list):
+    """
+    fn(*args) for every args in args_list, results in the same order.
+
+    Spread across extraction_workers threads when that's set. pymem lets go of the GIL during the
+    ReadProcessMemory call itself, so on a regular interpreter the reads overlap and the unpacking doesn't; on a
+    free-threaded build both do. pymem_counter can come out a little low while threads are in use.
+    """
+
+    global extraction_pool, extraction_pool_workers
+    if extraction_workers <= 1 or len(args_list) <= 1:
+        return [fn(*args) for args in args_list]
+    if extraction_pool_workers != extraction_workers:
+        if extraction_pool is not None:
+            extraction_pool.shutdown()
+        extraction_pool = concurrent.futures.ThreadPoolExecutor(max_workers=extraction_workers,
+                                                                thread_name_prefix='extraction')
+        extraction_pool_workers = extraction_workers
+    return list(extraction_pool.map(lambda args: fn(*args), args_list))
+
+
+# dicts and lists get_game_info() refills every other tick, see records.py
+tick_records = records.RecordPool()
+
+
+def tick_record(key, fields, cls=None):
+    """
+    fields, moved into last tick but one's dict for key when reuse_tick_records is on. With cls (a model record),
+    last tick but one's cls record for key, refilled with fields
+    """
+    if cls is not None:
+        return tick_records.record(key, cls, fields) if reuse_tick_records else cls(**fields)
+    return tick_records.dict(key, fields) if reuse_tick_records else fields
+
+
+def tick_record_list(key):
+    return tick_records.list(key) if reuse_tick_records else []
+
+
+def new_tick_context():
+    """Object, tag and host address lookups shared by the extractors of one tick, see tick_context.py"""
+    return tick_context.TickContext(read_u32, read_u16, read_bytes, get_host_address)
+
+
+# everything get_game_info() doesn't need fresh every tick, see scheduler.py
+extraction_scheduler = scheduler.ExtractionScheduler(budget_ms=tick_budget_ms)
+extraction_scheduler.register('network_game_server', get_network_game_server, scheduler.EVERY_N, interval=30)
+extraction_scheduler.register('network_game_client', get_network_game_client, scheduler.EVERY_N, interval=30)
+extraction_scheduler.register('memory_info', get_memory_info, scheduler.EVERY_N, interval=300)
+extraction_scheduler.register('player_ui_globals', get_player_ui_globals, scheduler.EVERY_N, interval=30, cost_ms=0.5)
+extraction_scheduler.register('items', get_items, scheduler.ON_CHANGE, change_key=get_map_key, cost_ms=5.0)
+extraction_scheduler.register('spawns', get_spawns, scheduler.ON_CHANGE, change_key=get_map_key, cost_ms=2.0)
+extraction_scheduler.register('fog', get_fog, scheduler.ON_DEMAND)
+
+
+@instrumentation.tagged('weapons')
+def get_weapon(context, weapon_object_handle):
+    """
+    starting weapons owned by players appear to have object ids adjacent to their owners
+        if player is id 28, his weapons are 29 and 30
+        player object ids appear to go 28, 31, 34, ... not sure if this is a strict rule
+        (probably just because they get allocated right after their player is allocated.)
+    :param weapon_object_handle:
+    :return:
+    """
+
+    # TODO: don't even call get_weapon if we have a 0xFFFFFFFF handle
+    if weapon_object_handle == 0xFFFFFFFF:
+        return None
+
+    weapon_object_address = context.object_address(weapon_object_handle)
+    # TODO: better early exit logic
+    if weapon_object_address == 0x0:
+        return None
+    tag_id = read_s16(weapon_object_address)
+    tag_address = context.tag_address(tag_id)
+    weapon_definition = context.tag_definition(tag_id)
+    weapon_type = read_u8(weapon_definition + 0x309)
+    is_energy_weapon = bool(weapon_type & 8)
+
+    return tick_record(('weapon', weapon_object_handle & 0xFFFF), dict(
+        tag_id=tag_id,
+        # x=read_float(weapon_object_address + 0x50),
+        # y=read_float(weapon_object_address + 0x54),
+        # z=read_float(weapon_object_address + 0x58),
+        heat_meter=read_float(weapon_object_address + 0xD4),  # FIXME: seems to also be used for human weapons, need to figure out what
+        used_energy=read_float(weapon_object_address + 0xE0),  # only if energy weapon
+        charge_amount=read_float(weapon_object_address + 0xF0),  # remaining energy for PR, current overcharge for PP
+        reloading=read_u8(weapon_object_address + 0x258),  # 1 while reloading until reload_time hits 2
+        can_fire=read_u8(weapon_object_address + 0x259),
+        reload_time=read_s16(weapon_object_address + 0x25A),
+        backpack_ammo_count=read_s16(weapon_object_address + 0x25E),
+        magazine_ammo_count=read_s16(weapon_object_address + 0x260),
+        weapon_tag_address=f'{read_u32(tag_address)} @ {hex(tag_address)} -> {hex(context.host_address(tag_address))}',
+        # owner=read_u32(weapon_object_address + 0x1E0),  # TODO: this isn't really owner, seems to correlate to current action
+        # owner_hex=hex(read_u32(weapon_object_address + 0x1E0)),
+        energy_used=read_float(weapon_object_address + 0x1F0),  # used for whether to delete dropped energy weapon (if == 1.0)
+        weapon_type=weapon_type,  # from weapon_trigger_fire()
+        is_energy_weapon=is_energy_weapon,
+        zoom_levels=read_s16(weapon_definition + 986),
+        zoom_min=read_float(weapon_definition + 988),
+        zoom_max=read_float(weapon_definition + 992),
+        autoaim_angle=read_float(weapon_definition + 996),  # radians, from unit_get_aim_assist_parameters()
+        autoaim_range=read_float(weapon_definition + 1000),
+        magnetism_angle=read_float(weapon_definition + 1004),
+        magnetism_range=read_float(weapon_definition + 1008),
+        deviation_angle=read_float(weapon_definition + 1012),
+        # tag_plus_16=f'{read_u32(tag_plus_16)} :: {hex(tag_plus_16)} -> {hex(get_host_address(tag_plus_16))}',
+        # tag_plus_20=f'{read_u32(tag_plus_20)} :: {hex(tag_plus_20)} -> {hex(get_host_address(tag_plus_20))}',
+        tag_name=get_tag_name(tag_id),
+        object_id=weapon_object_handle & 0xFFFF,
+    ), model.Weapon)
+
+
+def get_weapons(context, player_index, first_weapon_address):
+    weapons = tick_record_list(('weapons', player_index))
+    for weapon_index in range(4):
+        weapon = get_weapon(context, read_u32(first_weapon_address + 4 * weapon_index))
+        if weapon:
+            weapons.append(weapon)
+    return weapons
+
+
+@instrumentation.tagged('players')
+def get_player_stats(context, player_index, game_time, game_engine_globals_address, object_header_datum_array):
+    """
+    Everything get_game_info() reads for one player.
+    Returns (player_stats, damage_taken), damage_taken being {<player index dealing damage>: <damage amount>}.
+    Only reads memory, so players can be read on separate threads, see extraction_workers.
+    """
+
+    # looks like this in IDA: *(_DWORD *)(player_data + 52) + 212 * a1;
+    static_player_address = player_datum_array_first_element_address + player_index * player_datum_array_element_size
+
+    player_object_handle = read_s32(static_player_address + 0x34)
+    previous_player_object_handle = read_s32(static_player_address + 0x38)
+    player_object_id = player_object_handle & 0xFFFF
+
+    # *(_DWORD *)(*(_DWORD *)(object_header_data + 52) + 12 * (unsigned __int16)v3 + 8);
+    dynamic_player_address = context.object_address(player_object_handle)
+    previous_dynamic_player_address = context.object_address(previous_player_object_handle)
+
+    # print('dynamic player address: {} | {}'.format(hex(dynamic_player_address), dynamic_player_address))
+    # print('player_object_handle: {} | {}'.format(hex(player_object_handle), player_object_handle))
+
+    player_object_debug = dict(
+        player_object_handle=hex(player_object_handle),
+        # player_object_handle_u32=hex(read_u32(static_player_address + 0x34)),
+        object_header_datum_array=f'{hex(read_u32(object_header_datum_array))} @ {hex(object_header_datum_array)} -> {hex(context.host_address(object_header_datum_array))}',
+        object_header_datum_array_first_element_address=hex(context.first_object_address),
+        dynamic_player_address=f'{hex(dynamic_player_address)} -> {hex(context.host_address(dynamic_player_address))}' if player_object_handle != -1 else "",
+        player_object_id=player_object_id,
+        static_player_address=f'{hex(static_player_address)} -> {hex(context.host_address(static_player_address))}',
+        # object_header_datum_array_max_elements=object_header_datum_array_max_elements,
+        # object_header_datum_array_element_size=object_header_datum_array_element_size,
+        # object_header_datum_array_allocated_object_count=object_header_datum_array_allocated_object_count,
+        # object_header_datum_array_element_count=object_header_datum_array_element_count,
+    )
+
+    # see game_statistics_record_kill() for assist logic
+    #   track the last 4 damagers
+    #   on death, find the max total damage for the damagers who damaged in the past 6 seconds
+    #   the assist damage threshold is 40% of that max damage amount
+    #
+    # NOTE: dynamic player object is unassigned on the same tick as death, so we need to look at the old object
+    #       to see the final damage that killed them.
+    # FIXME: if saving full game replay takes too long, this will return 0x0 + 0x3E0
+    if player_object_handle == -1:
+        # the old object can already be gone (its slot maybe reused), and its damage table with it
+        damage_table_address = previous_dynamic_player_address + 0x3E0 if previous_dynamic_player_address else 0
+    else:
+        damage_table_address = dynamic_player_address + 0x3E0
+    player_object_debug['damage_table_address'] = f'{hex(damage_table_address)} -> {hex(context.host_address(damage_table_address))}' if damage_table_address else ''
+    damage_table = tick_record_list(('damage_table', player_index))
+    damage_taken = {}
+    for i in range(4 if damage_table_address else 0):
+        damage_time = read_u32(damage_table_address + 16 * i)
+        if damage_time != 0xFFFFFFFF:
+            damage_amount = read_float(damage_table_address + 16 * i + 4)
+            # note: dynamic object id doesn't change if the player dies and re-damages with a new object id
+            dynamic_player = read_u32(damage_table_address + 16 * i + 8)
+            static_player = read_u32(damage_table_address + 16 * i + 12)
+            damage_table.append(tick_record(('damage', player_index, i), dict(
+                damage_time=damage_time,
+                damage_amount=damage_amount,
+                dynamic_player=dynamic_player,
+                static_player=static_player,
+                # FIXME: temporary for debug purposes, remove
+                dynamic_player_hex=hex(dynamic_player),
+                static_player_hex=hex(static_player),
+            ), model.DamageEntry))
+            # FIXME: should we exclude overkill damage? (e.g. shooting a rocket at someone with 5 health)
+            last_death = read_u32(static_player_address + 0x84)
+            if player_object_handle != -1 or last_death == game_time - 1:
+                damage_taken[static_player & 0xFFFF] = damage_amount
+
+    if player_object_handle != -1:
+
+        # FIXME: avoid the forced qmp lookup in get_host_address
+        # player_object_debug.update(dynamic_player_address_hex=f'{hex(dynamic_player_address)} -> {hex(get_host_address(dynamic_player_address))}')
+
+        # selected_weapon_handle = read_u32(dynamic_player_address + 4 * read_u16(dynamic_player_address + 0x2A2) + 0x2A8)
+        # selected_weapon_address = read_u32(read_u32(object_header_datum_array + 52) + 12 * (selected_weapon_handle & 0xFFFF) + 8)
+
+        r'''
+        v6 = *(_DWORD *)(32
+             * (**(_DWORD **)(*(_DWORD *)(object_header_data + 52) + 12 * (unsigned __int16)v5 + 8) & 0xFFFF)
+             + global_tag_instances
+             + 20);
+             
+            70 61 65 77 6D 65 74 69 65 6A 62 6F 6B 01 DF E2 B4 71 3B 80 B4 7B 81 80 00 00 00 00 00 00 00 00
+            \___________________,________________/          |           |
+                          paewmetiejbo                     +16         +20
+         '''
+        # selected_weapon_tag_address = 32 * read_s16(selected_weapon_address) + global_tag_instances_address# + 20
+        # tag_plus_16 = read_u32(selected_weapon_tag_address + 16)
+        # tag_plus_20 = read_u32(selected_weapon_tag_address + 20)
+
+        # selected_weapon_tag_address = read_u32(32 * read_s16(selected_weapon_address) + global_tag_instances_address + 20)
+
+        biped_tag_address = context.tag_definition(read_u32(dynamic_player_address))
+        biped_camera_height_standing = read_float(biped_tag_address + 0x400)
+        biped_camera_height_crouching = read_float(biped_tag_address + 0x404)
+        crouchscale = read_float(dynamic_player_address + 0x464)
+
+        player_object_debug['biped_tag_address'] = f'{hex(biped_tag_address)} -> {hex(context.host_address(biped_tag_address))}'
+
+        # filled into a model.BipedState, so these keys have to be its fields
+        player_object_data = tick_record(('player_object_data', player_index), dict(
+            flags=read_u32(dynamic_player_address + 0x4),  # & 0x10000 is garbage_bit, & 8 is connected_to_map_bit, & 1 is 1 for vehicle weapons (checked in find_aim_assist_targets_recursive())
+            x=read_float(dynamic_player_address + 0xC),
+            y=read_float(dynamic_player_address + 0x10),
+            z=read_float(dynamic_player_address + 0x14),
+            x_vel=read_float(dynamic_player_address + 0x18),  # object.translational_velocity
+            y_vel=read_float(dynamic_player_address + 0x1C),
+            z_vel=read_float(dynamic_player_address + 0x20),
+            legs_pitch=read_float(dynamic_player_address + 0x24),  # legs? TODO: see end of sub_152E40() in 2276betaP, looks like object.forward and object.up for next 6 floats
+            legs_yaw=read_float(dynamic_player_address + 0x28),  # legs?
+            legs_roll=read_float(dynamic_player_address + 0x2C),  # legs?
+            pitch1=read_float(dynamic_player_address + 0x30),  # these get set in biped_snap_facing(), not sure what it is. (0, 0, 1) in most cases
+            yaw1=read_float(dynamic_player_address + 0x34),
+            roll1=read_float(dynamic_player_address + 0x38),
+            ang_vel_x=read_float(dynamic_player_address + 0x3C),
+            ang_vel_y=read_float(dynamic_player_address + 0x40),
+            ang_vel_z=read_float(dynamic_player_address + 0x44),
+            aim_assist_sphere_x=read_float(dynamic_player_address + 0x50),  # center point? used in find_aim_assist_targets_recursive()
+            aim_assist_sphere_y=read_float(dynamic_player_address + 0x54),
+            aim_assist_sphere_z=read_float(dynamic_player_address + 0x58),
+            aim_assist_sphere_radius=read_float(dynamic_player_address + 0x5C),  # sphere radius? find_aim_assist_targets_recursive()
+            scale=read_float(dynamic_player_address + 0x60),  # object.scale (items only?)
+            type=read_u16(dynamic_player_address + 0x64),
+            render_flags=read_u16(dynamic_player_address + 0x66),
+            weapon_owner_team=read_s16(dynamic_player_address + 0x68),  # weapon.owner_team_index (e.g. ctf) -- also used in find_aim_assist_targets_recursive() for team check
+            powerup_unk2=read_s16(dynamic_player_address + 0x6A),
+            idle_ticks=read_s16(dynamic_player_address + 0x6C),
+            # animation_unk_1=hex(read_u32(dynamic_player_address + 0x7C)),
+            # animation_unk_2=hex(read_s16(dynamic_player_address + 0x80)),
+            # animation_unk_3=hex(read_s16(dynamic_player_address + 0x82)),
+            max_health=read_float(dynamic_player_address + 0x88),
+            max_shields=read_float(dynamic_player_address + 0x8C),
+            health=read_float(dynamic_player_address + 0x90),
+            shields=read_float(dynamic_player_address + 0x94),
+            unk_dmg_countdown_0x98=read_float(dynamic_player_address + 0x98),  # starts counting down immediately
+            unk_dmg_countdown_0x9C=read_float(dynamic_player_address + 0x9C),
+            unk_dmg_countdown_0xA4=read_float(dynamic_player_address + 0xA4),  # starts counting down after 2 second delay (after 0xAC counts up to 60), initial value is higher for higher damage amount?
+            unk_dmg_countdown_0xA8=read_float(dynamic_player_address + 0xA8),
+            unk3=read_s32(dynamic_player_address + 0xAC),  # from object_damage_update(), tied to countdowns 0x98 and 0xA4, -1 normally, counts up to ~75 when damaged
+            unk4=read_s32(dynamic_player_address + 0xB0),  # from object_damage_update(), tied to countdowns 0x9C and 0xA8, -1 normally
+            # shields_status_2=hex(read_u16(dynamic_player_address + 0xB2)),
+            shields_charge_delay=read_u16(dynamic_player_address + 0xB4),  # from object_damage_update()
+
+            # 0x4096 when shields are charging, 0x4112 when overshield charging
+            shields_status=read_u16(dynamic_player_address + 0xB6),  # 0x0 normally, 0x10 while overshield charging, 0x1000 while shields charging, 0x8 while shields are fully depleted
+            shields_status_hex=hex(read_u16(dynamic_player_address + 0xB6)),
+
+            next_object=read_s32(dynamic_player_address + 0xC4),
+            next_object_2=hex(read_u32(dynamic_player_address + 0xC8)),  # used in find_aim_assist_targets_recursive(), seems to be object handle for next object in object table
+            # seems like normal path for players goes to biped_get_sight_position()
+            parent_object=hex(read_s32(dynamic_player_address + 0xCC)),  # e.g. vehicle
+            # unk_camera_0xB6=read_u8(dynamic_player_address + 0xB6),  # both of these are 0 for players, from unit_get_camera_position()
+            # unk_camera_0x64=read_s16(dynamic_player_address + 0x64),
+
+            camo=read_u8(dynamic_player_address + 0x1B4),  # 65=nocamo (01000001), 81=camo (01010001)
+            flashlight=read_u8(dynamic_player_address + 0x1B6),
+            current_action=read_u32(dynamic_player_address + 0x1B8),    # multi bitfield: some functions only check second byte
+                                                                        # 0x0000=no_action
+                                                                        # 0x0001=crouch
+                                                                        # 0x0002=jump
+                                                                        # 0x0008=fire
+                                                                        # 0x0010=flashlight    immediately goes back to 0x0 even if held
+                                                                        # 0x0440=press_action    cycles back to 0x0 before going to 0x4000
+                                                                        # 0x0800=shooting
+                                                                        # 0x2fc4=grenade
+                                                                        # 0x4000=hold_action
+            # stunned=read_s32(dynamic_player_address + 0x1CB),  # from biped_jump -- this isn't actually stunned
+            stunned=read_float(dynamic_player_address + 0x3D4),  # from biped_jump -- this isn't actually stunned
+            # maybe_desired_facing_vector_x=read_float(dynamic_player_address + 0x1C8),
+            # maybe_desired_facing_vector_y=read_float(dynamic_player_address + 0x1CC),  # FIXME: y is null
+            # maybe_desired_facing_vector_z=read_float(dynamic_player_address + 0x1D0),
+            xunk0=read_float(dynamic_player_address + 0x1D4),  # unknown, from biped_update_turning(), gets multiplied by leg rotation 24, 28, 2c.
+            yunk0=read_float(dynamic_player_address + 0x1D8),
+            zunk0=read_float(dynamic_player_address + 0x1DC),  # z seems to stay at 0.0, but periodically will briefly flip to same z as others
+            xaima=read_float(dynamic_player_address + 0x1E0),  # unit vectors, -1 to 1 on x y z axes.
+            yaima=read_float(dynamic_player_address + 0x1E4),
+            zaima=read_float(dynamic_player_address + 0x1E8),
+            aiming_vector_x=read_float(dynamic_player_address + 0x1EC),  # used in first_person_camera_deterministic(), which gets used in player_aim_projectile()
+            aiming_vector_y=read_float(dynamic_player_address + 0x1F0),
+            aiming_vector_z=read_float(dynamic_player_address + 0x1F4),
+            xaim0=read_float(dynamic_player_address + 0x1F8),  # these seem to be used for projectiles -- see projectile_update()
+            yaim0=read_float(dynamic_player_address + 0x1FC),
+            zaim0=read_float(dynamic_player_address + 0x200),
+            xaim1=read_float(dynamic_player_address + 0x204),  # look in players_update_before_game() and unit_control()
+            yaim1=read_float(dynamic_player_address + 0x208),
+            zaim1=read_float(dynamic_player_address + 0x20C),
+            looking_vector_x=read_float(dynamic_player_address + 0x210),
+            looking_vector_y=read_float(dynamic_player_address + 0x214),
+            looking_vector_z=read_float(dynamic_player_address + 0x218),
+            move_forward=read_float(dynamic_player_address + 0x228),  # throttle?
+            move_left=read_float(dynamic_player_address + 0x22C),
+            move_up=read_float(dynamic_player_address + 0x230),  # not sure if this is used anywhere? banshee controls? observer?
+
+            # note: check out search for header->event_type in 2276betaP, animation types? (not sure if these are the same animations, but noting here anyway for later)
+            #       & 0xFC == 8     _playback_animation_state_set
+            #       & 0xFC == 12    _playback_aiming_speed_set
+            #       & 0xFC == 16    _playback_control_flags_set
+            #       & 0xFC == 20    _playback_weapon_index_set
+            #       & 0xFC == 24    _playback_throttle_set
+            melee_damage_type=read_u8(dynamic_player_address + 0x239),  # see unit_cause_continuous_melee_damage(), if =4 then continuous melee damage, if =3 then impact melee damage, players are =0
+            animation_1=read_u8(dynamic_player_address + 0x253),  # see unit_update_animation() and unit_get_custom_animation_time(), 0x253 and 0x254 both seem related to animations (movement, grenade throwing, melee, etc)
+            animation_2=read_u8(dynamic_player_address + 0x254),
+            animation_debug=get_animation_debug_info(context, read_u32(dynamic_player_address + 0x7C), read_s16(dynamic_player_address + 0x80), read_s16(dynamic_player_address + 0x82)),
+            selected_weapon_index=read_s16(dynamic_player_address + 0x2A2),  # 0 or 1 for primary/secondary, -1 for none, see first_person_weapon_index_from_weapon_index()
+            # selected_weapon_index_2=read_s16(dynamic_player_address + 0x2A4),  # seems to only matter if you fully drop a weapon without picking up a replacement
+            # primary_weapon_object=read_u32(dynamic_player_address + 0x2A8),
+            # secondary_weapon_object=read_u32(dynamic_player_address + 0x2AC),
+            # selected_weapon_object=read_u32(dynamic_player_address + 4 * read_u16(dynamic_player_address + 0x2A2) + 0x2A8),
+            # selected_weapon_object_hex=f'{hex(selected_weapon_handle)} -> {hex(selected_weapon_handle & 0xFFFF)=}',
+            # selected_weapon_address=selected_weapon_address,
+            # selected_weapon_address_hex=f'{read_u32(selected_weapon_address)} @ {hex(selected_weapon_address)} -> {hex(get_host_address(selected_weapon_address))}',
+            # weapons=[get_weapon(read_u32(dynamic_player_address + 0x2A8 + 4 * weapon_index)) for weapon_index in range(4)],
+            weapons=get_weapons(context, player_index, dynamic_player_address + 0x2A8),
+            # weapon_0=get_weapon(read_u32(dynamic_player_address + 0x2A8)),
+            # weapon_1=get_weapon(read_u32(dynamic_player_address + 0x2AC)),
+            # weapon_2=get_weapon(read_u32(dynamic_player_address + 0x2B0)),
+            # weapon_3=get_weapon(read_u32(dynamic_player_address + 0x2B4)),
+            # selected_weapon=get_weapon(read_u32(dynamic_player_address + 4 * read_u16(dynamic_player_address + 0x2A2) + 0x2A8)),
+            current_equipment=hex(read_u32(dynamic_player_address + 0x2C8)),
+            primary_nades=read_u8(dynamic_player_address + 0x2CE),
+            secondary_nades=read_u8(dynamic_player_address + 0x2CF),
+            zoom_level=read_s8(dynamic_player_address + 0x2D0),
+
+            camo_amount=read_float(dynamic_player_address + 0x32C),  # 0=nocamo, 1=fullcamo, from game_engine_player_depower_active_camo(), also see unit_update()
+            # camo_thing2=read_float(dynamic_player_address + 0x330),  # from first_person_weapon_draw() and unit_update()
+
+            # 0 normally, 1 when player has camo and is revealed by shooting (but not being shot at)
+            camo_self_revealed=read_u16(dynamic_player_address + 0x3D2),  # from player_powerup_on(), not sure when this actually gets set
+
+            # see game_statistics_record_kill() and unit_record_damage()
+            damagers_list_address=hex(context.host_address(dynamic_player_address + 0x3E0)),
+            crouchscale=crouchscale,
+
+            # seems like if x or y is greater than z, you start sliding or falling? you can watch it change when slowly walking off a ledge
+            facing1=read_float(dynamic_player_address + 0x46C),  # used in biped_snap_facing, not sure purpose (usually 0,0,1 on flat ground)
+            facing2=read_float(dynamic_player_address + 0x470),  # except when on small ledges? e.g. on flat part of zyos ledge x increases as you get farther from wall
+            facing3=read_float(dynamic_player_address + 0x474),  # on zyos ledge diagonal part the z value starts decreasing from 1. also changes on small depressions in priz floor and ramps
+
+            # from biped_get_sight_position()
+            camera_x=read_float(dynamic_player_address + 0xC),
+            camera_y=read_float(dynamic_player_address + 0x10),
+            camera_z=(1 - crouchscale) * biped_camera_height_standing + crouchscale * biped_camera_height_crouching + read_float(dynamic_player_address + 0x14),
+
+            air_1_0x64=read_s16(dynamic_player_address + 0x64),  # any_player_is_in_the_air() and unit_get_camera_position()
+            airborne=read_u8(dynamic_player_address + 0x424),  # &1 = airborne, &2 = slipping, 0 = standing, from biped_update()
+            landing_stun_current_duration=read_u8(dynamic_player_address + 0x428),  # any_player_is_in_the_air(), when you land from a jump, seems to be impact intensity (1 or 2 being flat ground jump, 30 for jumping off top priz fall damage). slowly ramps up to value of 0x429
+            landing_stun_target_duration=read_u8(dynamic_player_address + 0x429),  # biped_start_landing(), looks like the target for 0x428, max of 30?
+            airborne_ticks=read_u8(dynamic_player_address + 0x459),  # biped_flying_through_air(), seems to be number of ticks since leaving ground
+
+            # TODO: need to verify padding on these. crouchscale doesn't line up with the end of `short landing`
+            slipping_ticks=read_u8(dynamic_player_address + 0x45A),
+            stop_ticks=read_u8(dynamic_player_address + 0x45B),
+            jump_recovery_timer=read_u8(dynamic_player_address + 0x45C),
+            melee_animation_remaining=read_u8(dynamic_player_address + 0x45D),
+            melee_animation_damage_tick=read_u8(dynamic_player_address + 0x45E),  # from biped_update() and unit_cause_player_melee_damage()
+            melee_impact_this_tick=read_u8(dynamic_player_address + 0x45D) == read_u8(dynamic_player_address + 0x45E),  # TODO: move to computed?
+            landing=read_u16(dynamic_player_address + 0x45F),
+
+            air_3_0x460=read_s16(dynamic_player_address + 0x460),  # biped_update(), if -1 check for slipping. stays -1 while walking, briefly 0 when landing, 1 if damaged from fall? stays at 0 or 1 until 0x428 reaches 0x429
+
+            # 0x4096 when shields are charging, 0x4112 when overshield charging
+            air_4_0xB6=read_s16(dynamic_player_address + 0xB6),  # biped_flying_through_air() and unit_get_camera_position(), 8 while shields are damaged from falling or nade, 4096 while shields recharging (from any damage)
+
+            biped_flags=read_u32(biped_tag_address + 0x2F4),
+            autoaim_pill_radius=read_float(biped_tag_address + 0x458),  # from biped_get_autoaim_pill()
+        ), model.BipedState)
+
+        model_nodes = get_model_nodes(dynamic_player_address, tick_record_list(('model_nodes', player_index)))
+
+    else:
+
+        if previous_dynamic_player_address:
+            # body of dead player
+            model_nodes = get_model_nodes(previous_dynamic_player_address, tick_record_list(('model_nodes', player_index)))
+        else:
+            model_nodes = []
+
+        player_object_data = None
+        # print('player respawns in {} ticks'.format(read_u32(static_player_address + 0x2C)))
+
+    # print(player_object_data['xaim2'], player_object_data['yaim2'], player_object_data['zaim2'])
+
+    # TODO: game_engine_get_state_message()
+
+    local_player = read_s16(static_player_address + 0x2)
+
+    derived_stats = tick_record(('derived_stats', player_index), dict(
+        # has_camo=player_stats['camo_timer'] > 0,
+        has_camo=player_object_data is not None and player_object_data.camo == 0x51,
+        has_overshield=player_object_data is not None and (player_object_data.shields_status == 0x10 or player_object_data.shields > 1),  # FIXME: replace int conversion
+    ))
+
+    player_stats = dict(
+        player_index=player_index,  # index in the player datum array
+        local_player=local_player,  # 0 to 3 if local (controller port), -1 if not local
+        name=read_bytes(static_player_address + 0x4, 24).decode('utf-16').split('\x00', 1)[0] if use_pymem else b''.join([int.to_bytes(i, signed=True) for i in read_bytes(static_player_address + 0x4, 24)]).decode('utf-16').split('\x00', 1)[0],
+        # is_dead=hex(read_s32(static_player_address + 0xD)),  # from any_player_is_dead() -- value does not change when dead
+        # name=t.read(static_player_address + 0x4, 24).decode('utf-16').split('\x00', 1)[0],
+        team=read_u32(static_player_address + 0x20),  # red=0, blue=1, ffa=0-15
+        action_target=hex(read_u32(static_player_address + 0x24)),  # looks like the object you'll interact with if you press action, set to -1 on spawn
+        action=read_u16(static_player_address + 0x28),  # 6 if standing over weapon (7 if only 1 weapon held), 8 if next to vehicle, 0 otherwise, set to 0 on spawn
+        action_seat=read_u16(static_player_address + 0x2A),
+        respawn_timer=read_u32(static_player_address + 0x2C),
+        respawn_penalty=read_u32(static_player_address + 0x30),
+        object_ref=hex(read_u32(static_player_address + 0x34)),  # -1 when player is dead
+        object_index=read_u16(static_player_address + 0x34),
+        object_id=read_u16(static_player_address + 0x36),
+        previous_object_ref=hex(read_u32(static_player_address + 0x38)),  #  0x34 gets copied here when player dies
+        last_target_object_ref=hex(read_u32(static_player_address + 0x40)),  # set to same as copy above if no target
+        time_of_last_shot=read_u32(static_player_address + 0x44),
+        player_speed=read_float(static_player_address + 0x6C),
+        camo_timer=read_u32(static_player_address + 0x68),
+        time_of_last_death=read_u32(static_player_address + 0x84),  # 0 at start of game
+        target_player_index=read_u32(static_player_address + 0x88),
+        kill_streak=read_u16(static_player_address + 0x92),  # resets to 0 on death
+        multikill=read_u16(static_player_address + 0x94),  # resets to 0 on death
+        time_of_last_kill=read_s16(static_player_address + 0x96),  # in ticks, resets to -1 on death
+        kills=read_s16(static_player_address + 0x98),
+        assists=read_s16(static_player_address + 0xA0),
+        team_kills=read_s16(static_player_address + 0xA8),
+        deaths=read_s16(static_player_address + 0xAA),
+        suicides=read_s16(static_player_address + 0xAC),
+        shots_fired=read_s32(static_player_address + 0xAE),
+        shots_hit=read_s16(static_player_address + 0xB2),
+        score=player_score_by_player_id(player_index, read_u32(game_engine_globals_address + 0x4) if game_engine_globals_address else 0),
+        ctf_score=read_s16(static_player_address + 0xC4),
+        player_quit=read_u8(static_player_address + 0xD1),  # 1 if player quit, not sure what else
+        damage_table=damage_table,
+        observer_camera_info=get_observer_camera_info(context, local_player),
+        input_data=get_input_data(context, local_player, player_index),
+        player_object_debug=tick_record(('player_object_debug', player_index), player_object_debug),
+        player_object_data=player_object_data,
+        model_nodes=model_nodes,  # also includes dead body while respawning
+        derived_stats=derived_stats,
+    )
+
+    # get data that depends on players being local
+    if local_player != -1:
+        # player_stats.update(input_data=get_input_data(local_player))
+        player_stats.update(first_person_weapon=get_first_person_weapon(context, local_player))
+
+    return tick_record(('player', player_index), player_stats, model.Player), damage_taken
+
+
+def get_game_info(context=None):
+    """
+    context is the TickContext main_loop() clears every tick, see tick_context.py. Without one the lookups are only
+    shared within this call.
+    """
 
     # FIXME: also support campaign (e.g. prisoner bots)
     #        currently fails when getting gametype for score
 
+    tick_records.swap()
     player_count = read_u16(player_datum_array + 0x2E)
-    player_stat_array = []
+    player_stat_array = tick_record_list('players')
 
     # dict of dicts of the form {<player index dealing damage>: {<player index taking damage>: <damage amount>}}
     damage_counts = defaultdict(dict)
 
     game_time = read_u32(game_time_globals_address + 12)
+    extraction_scheduler.start_tick(game_time - 1)
     game_time_elapsed = read_u32(game_time_globals_address + 16)
     # print(game_time, game_time_elapsed)
 
@@ -1453,423 +2520,20 @@ def get_game_info():
 
     object_header_datum_array = read_u32(0x2FC6AC)
     object_header_datum_array_max_elements = read_u16(object_header_datum_array + 0x20)
-    object_header_datum_array_element_size = read_u16(object_header_datum_array + 0x22)
     object_header_datum_array_allocated_object_count = read_u16(object_header_datum_array + 0x2E)
     object_header_datum_array_element_count = read_u16(object_header_datum_array + 0x30)
-    object_header_datum_array_first_element_address = read_u32(object_header_datum_array + 0x34)
+    if context is None:
+        context = new_tick_context()
+    context.bind(object_header_datum_array, global_tag_instances_address)
 
     # TODO: also check if this is a multiplayer game or campaign
     if game_time_initialized and game_time_active and not main_menu_is_active:
 
-        for player_index in range(player_count):
-
-            # looks like this in IDA: *(_DWORD *)(player_data + 52) + 212 * a1;
-            static_player_address = player_datum_array_first_element_address + player_index * player_datum_array_element_size
-
-            player_object_handle = read_s32(static_player_address + 0x34)
-            previous_player_object_handle = read_s32(static_player_address + 0x38)
-            player_object_id = player_object_handle & 0xFFFF
-
-            # *(_DWORD *)(*(_DWORD *)(object_header_data + 52) + 12 * (unsigned __int16)v3 + 8);
-            dynamic_player_address = read_u32(object_header_datum_array_first_element_address + (
-                        player_object_handle & 0xFFFF) * object_header_datum_array_element_size + 8)
-
-            previous_dynamic_player_address = read_u32(object_header_datum_array_first_element_address + (
-                        previous_player_object_handle & 0xFFFF) * object_header_datum_array_element_size + 8)
-
-            # print('dynamic player address: {} | {}'.format(hex(dynamic_player_address), dynamic_player_address))
-            # print('player_object_handle: {} | {}'.format(hex(player_object_handle), player_object_handle))
-
-            player_object_debug = dict(
-                player_object_handle=hex(player_object_handle),
-                # player_object_handle_u32=hex(read_u32(static_player_address + 0x34)),
-                object_header_datum_array=f'{hex(read_u32(object_header_datum_array))} @ {hex(object_header_datum_array)} -> {hex(known_addresses[object_header_datum_array]["host_address"])}',
-                object_header_datum_array_first_element_address=hex(object_header_datum_array_first_element_address),
-                dynamic_player_address=f'{hex(dynamic_player_address)} -> {hex(get_host_address(dynamic_player_address))}' if player_object_handle != -1 else "",
-                player_object_id=player_object_id,
-                static_player_address=f'{hex(static_player_address)} -> {hex(get_host_address(static_player_address))}',
-                # object_header_datum_array_max_elements=object_header_datum_array_max_elements,
-                # object_header_datum_array_element_size=object_header_datum_array_element_size,
-                # object_header_datum_array_allocated_object_count=object_header_datum_array_allocated_object_count,
-                # object_header_datum_array_element_count=object_header_datum_array_element_count,
-            )
-
-            # see game_statistics_record_kill() for assist logic
-            #   track the last 4 damagers
-            #   on death, find the max total damage for the damagers who damaged in the past 6 seconds
-            #   the assist damage threshold is 40% of that max damage amount
-            #
-            # NOTE: dynamic player object is unassigned on the same tick as death, so we need to look at the old object
-            #       to see the final damage that killed them.
-            # FIXME: if saving full game replay takes too long, this will return 0x0 + 0x3E0
-            if player_object_handle == -1:
-                damage_table_address = read_u32(object_header_datum_array_first_element_address + (
-                        previous_player_object_handle & 0xFFFF) * object_header_datum_array_element_size + 8) + 0x3E0
-            else:
-                damage_table_address = dynamic_player_address + 0x3E0
-            player_object_debug['damage_table_address'] = f'{hex(damage_table_address)} -> {hex(get_host_address(damage_table_address))}'
-            damage_table = []
-            for i in range(4):
-                damage_time = read_u32(damage_table_address + 16 * i)
-                if damage_time != 0xFFFFFFFF:
-                    damage_amount = read_float(damage_table_address + 16 * i + 4)
-                    static_player = read_u32(damage_table_address + 16 * i + 12)
-                    damage_table.append(dict(
-                        damage_time=damage_time,
-                        damage_amount=damage_amount,
-
-                        # note: dynamic object id doesn't change if the player dies and re-damages with a new object id
-                        dynamic_player=read_u32(damage_table_address + 16 * i + 8),
-                        static_player=static_player,
-                    ))
-                    # FIXME: temporary for debug purposes, remove
-                    damage_table[-1].update(dict(
-                        dynamic_player_hex=hex(damage_table[-1]['dynamic_player']),
-                        static_player_hex=hex(damage_table[-1]['static_player']),
-                    ))
-                    # FIXME: should we exclude overkill damage? (e.g. shooting a rocket at someone with 5 health)
-                    last_death = read_u32(static_player_address + 0x84)
-                    if player_object_handle != -1 or last_death == game_time - 1:
-                        damage_counts[static_player & 0xFFFF][player_index] = damage_amount
-
-            if player_object_handle != -1:
-
-                # FIXME: avoid the forced qmp lookup in get_host_address
-                # player_object_debug.update(dynamic_player_address_hex=f'{hex(dynamic_player_address)} -> {hex(get_host_address(dynamic_player_address))}')
-
-                # selected_weapon_handle = read_u32(dynamic_player_address + 4 * read_u16(dynamic_player_address + 0x2A2) + 0x2A8)
-                # selected_weapon_address = read_u32(read_u32(object_header_datum_array + 52) + 12 * (selected_weapon_handle & 0xFFFF) + 8)
-
-                r'''
-                v6 = *(_DWORD *)(32
-                     * (**(_DWORD **)(*(_DWORD *)(object_header_data + 52) + 12 * (unsigned __int16)v5 + 8) & 0xFFFF)
-                     + global_tag_instances
-                     + 20);
-                     
-                    70 61 65 77 6D 65 74 69 65 6A 62 6F 6B 01 DF E2 B4 71 3B 80 B4 7B 81 80 00 00 00 00 00 00 00 00
-                    \___________________,________________/          |           |
-                                  paewmetiejbo                     +16         +20
-                 '''
-                # selected_weapon_tag_address = 32 * read_s16(selected_weapon_address) + global_tag_instances_address# + 20
-                # tag_plus_16 = read_u32(selected_weapon_tag_address + 16)
-                # tag_plus_20 = read_u32(selected_weapon_tag_address + 20)
-
-                # selected_weapon_tag_address = read_u32(32 * read_s16(selected_weapon_address) + global_tag_instances_address + 20)
-
-                def get_weapon(weapon_object_handle):
-                    """
-                    starting weapons owned by players appear to have object ids adjacent to their owners
-                        if player is id 28, his weapons are 29 and 30
-                        player object ids appear to go 28, 31, 34, ... not sure if this is a strict rule
-                        (probably just because they get allocated right after their player is allocated.)
-                    :param weapon_object_handle:
-                    :return:
-                    """
-
-                    # TODO: don't even call get_weapon if we have a 0xFFFFFFFF handle
-                    if weapon_object_handle == 0xFFFFFFFF:
-                        return {}
-
-                    weapon_object_address = read_u32(read_u32(object_header_datum_array + 52) + 12 * (weapon_object_handle & 0xFFFF) + 8)
-                    # TODO: better early exit logic
-                    if weapon_object_address == 0x0:
-                        return {}
-                    tag_address = 32 * read_s16(weapon_object_address) + global_tag_instances_address
-                    weapon_type = read_u8(read_u32(tag_address + 20) + 0x309)
-                    is_energy_weapon = bool(weapon_type & 8)
-
-                    return dict(
-                        # tag_object_id=read_s16(weapon_object_address),
-                        # x=read_float(weapon_object_address + 0x50),
-                        # y=read_float(weapon_object_address + 0x54),
-                        # z=read_float(weapon_object_address + 0x58),
-                        heat_meter=read_float(weapon_object_address + 0xD4),  # FIXME: seems to also be used for human weapons, need to figure out what
-                        used_energy=read_float(weapon_object_address + 0xE0),  # only if energy weapon
-                        charge_amount=read_float(weapon_object_address + 0xF0),  # remaining energy for PR, current overcharge for PP
-                        reloading=read_u8(weapon_object_address + 0x258),  # 1 while reloading until reload_time hits 2
-                        can_fire=read_u8(weapon_object_address + 0x259),
-                        reload_time=read_s16(weapon_object_address + 0x25A),
-                        backpack_ammo_count=read_s16(weapon_object_address + 0x25E),
-                        magazine_ammo_count=read_s16(weapon_object_address + 0x260),
-                        weapon_tag_address=f'{read_u32(tag_address)} @ {hex(tag_address)} -> {hex(known_addresses[tag_address]["host_address"])}',
-                        # owner=read_u32(weapon_object_address + 0x1E0),  # TODO: this isn't really owner, seems to correlate to current action
-                        # owner_hex=hex(read_u32(weapon_object_address + 0x1E0)),
-                        energy_used=read_float(weapon_object_address + 0x1F0),  # used for whether to delete dropped energy weapon (if == 1.0)
-                        weapon_type=weapon_type,  # from weapon_trigger_fire()
-                        is_energy_weapon=is_energy_weapon,
-                        zoom_levels=read_s16(read_u32(tag_address + 20) + 986),
-                        zoom_min=read_float(read_u32(tag_address + 20) + 988),
-                        zoom_max=read_float(read_u32(tag_address + 20) + 992),
-                        autoaim_angle=read_float(read_u32(tag_address + 20) + 996),  # radians, from unit_get_aim_assist_parameters()
-                        autoaim_range=read_float(read_u32(tag_address + 20) + 1000),
-                        magnetism_angle=read_float(read_u32(tag_address + 20) + 1004),
-                        magnetism_range=read_float(read_u32(tag_address + 20) + 1008),
-                        deviation_angle=read_float(read_u32(tag_address + 20) + 1012),
-                        # tag_plus_16=f'{read_u32(tag_plus_16)} :: {hex(tag_plus_16)} -> {hex(known_addresses[tag_plus_16]["host_address"])}',
-                        # tag_plus_20=f'{read_u32(tag_plus_20)} :: {hex(tag_plus_20)} -> {hex(known_addresses[tag_plus_20]["host_address"])}',
-                        tag_name=read_string(read_u32(tag_address + 0x10)),
-                        object_id=weapon_object_handle & 0xFFFF,
-                    )
-
-                # TODO: move this out of get_game_info
-                def get_weapons(first_weapon_address):
-                    weapons = []
-                    for weapon_index in range(4):
-                        weapon = get_weapon(read_u32(first_weapon_address + 4 * weapon_index))
-                        if weapon:
-                            weapons.append(weapon)
-                    return weapons
-
-                biped_tag_address = read_u32(
-                    32 * (read_u32(dynamic_player_address) & 0xFFFF) + global_tag_instances_address + 0x14)
-                biped_camera_height_standing = read_float(biped_tag_address + 0x400)
-                biped_camera_height_crouching = read_float(biped_tag_address + 0x404)
-                crouchscale = read_float(dynamic_player_address + 0x464)
-
-                player_object_debug['biped_tag_address'] = f'{hex(biped_tag_address)} -> {hex(get_host_address(biped_tag_address))}'
-
-                # TODO: change to dataclasses instead of dicts?
-                player_object_data = dict(
-                    flags=read_u32(dynamic_player_address + 0x4),  # & 0x10000 is garbage_bit, & 8 is connected_to_map_bit, & 1 is 1 for vehicle weapons (checked in find_aim_assist_targets_recursive())
-                    x=read_float(dynamic_player_address + 0xC),
-                    y=read_float(dynamic_player_address + 0x10),
-                    z=read_float(dynamic_player_address + 0x14),
-                    x_vel=read_float(dynamic_player_address + 0x18),  # object.translational_velocity
-                    y_vel=read_float(dynamic_player_address + 0x1C),
-                    z_vel=read_float(dynamic_player_address + 0x20),
-                    legs_pitch=read_float(dynamic_player_address + 0x24),  # legs? TODO: see end of sub_152E40() in 2276betaP, looks like object.forward and object.up for next 6 floats
-                    legs_yaw=read_float(dynamic_player_address + 0x28),  # legs?
-                    legs_roll=read_float(dynamic_player_address + 0x2C),  # legs?
-                    pitch1=read_float(dynamic_player_address + 0x30),  # these get set in biped_snap_facing(), not sure what it is. (0, 0, 1) in most cases
-                    yaw1=read_float(dynamic_player_address + 0x34),
-                    roll1=read_float(dynamic_player_address + 0x38),
-                    ang_vel_x=read_float(dynamic_player_address + 0x3C),
-                    ang_vel_y=read_float(dynamic_player_address + 0x40),
-                    ang_vel_z=read_float(dynamic_player_address + 0x44),
-                    aim_assist_sphere_x=read_float(dynamic_player_address + 0x50),  # center point? used in find_aim_assist_targets_recursive()
-                    aim_assist_sphere_y=read_float(dynamic_player_address + 0x54),
-                    aim_assist_sphere_z=read_float(dynamic_player_address + 0x58),
-                    aim_assist_sphere_radius=read_float(dynamic_player_address + 0x5C),  # sphere radius? find_aim_assist_targets_recursive()
-                    scale=read_float(dynamic_player_address + 0x60),  # object.scale (items only?)
-                    type=read_u16(dynamic_player_address + 0x64),
-                    render_flags=read_u16(dynamic_player_address + 0x66),
-                    weapon_owner_team=read_s16(dynamic_player_address + 0x68),  # weapon.owner_team_index (e.g. ctf) -- also used in find_aim_assist_targets_recursive() for team check
-                    powerup_unk2=read_s16(dynamic_player_address + 0x6A),
-                    idle_ticks=read_s16(dynamic_player_address + 0x6C),
-                    # animation_unk_1=hex(read_u32(dynamic_player_address + 0x7C)),
-                    # animation_unk_2=hex(read_s16(dynamic_player_address + 0x80)),
-                    # animation_unk_3=hex(read_s16(dynamic_player_address + 0x82)),
-                    max_health=read_float(dynamic_player_address + 0x88),
-                    max_shields=read_float(dynamic_player_address + 0x8C),
-                    health=read_float(dynamic_player_address + 0x90),
-                    shields=read_float(dynamic_player_address + 0x94),
-                    unk_dmg_countdown_0x98=read_float(dynamic_player_address + 0x98),  # starts counting down immediately
-                    unk_dmg_countdown_0x9C=read_float(dynamic_player_address + 0x9C),
-                    unk_dmg_countdown_0xA4=read_float(dynamic_player_address + 0xA4),  # starts counting down after 2 second delay (after 0xAC counts up to 60), initial value is higher for higher damage amount?
-                    unk_dmg_countdown_0xA8=read_float(dynamic_player_address + 0xA8),
-                    unk3=read_s32(dynamic_player_address + 0xAC),  # from object_damage_update(), tied to countdowns 0x98 and 0xA4, -1 normally, counts up to ~75 when damaged
-                    unk4=read_s32(dynamic_player_address + 0xB0),  # from object_damage_update(), tied to countdowns 0x9C and 0xA8, -1 normally
-                    # shields_status_2=hex(read_u16(dynamic_player_address + 0xB2)),
-                    shields_charge_delay=read_u16(dynamic_player_address + 0xB4),  # from object_damage_update()
-
-                    # 0x4096 when shields are charging, 0x4112 when overshield charging
-                    shields_status=read_u16(dynamic_player_address + 0xB6),  # 0x0 normally, 0x10 while overshield charging, 0x1000 while shields charging, 0x8 while shields are fully depleted
-                    shields_status_hex=hex(read_u16(dynamic_player_address + 0xB6)),
-
-                    next_object=read_s32(dynamic_player_address + 0xC4),
-                    next_object_2=hex(read_u32(dynamic_player_address + 0xC8)),  # used in find_aim_assist_targets_recursive(), seems to be object handle for next object in object table
-                    # seems like normal path for players goes to biped_get_sight_position()
-                    parent_object=hex(read_s32(dynamic_player_address + 0xCC)),  # e.g. vehicle
-                    # unk_camera_0xB6=read_u8(dynamic_player_address + 0xB6),  # both of these are 0 for players, from unit_get_camera_position()
-                    # unk_camera_0x64=read_s16(dynamic_player_address + 0x64),
-
-                    camo=read_u8(dynamic_player_address + 0x1B4),  # 65=nocamo (01000001), 81=camo (01010001)
-                    flashlight=read_u8(dynamic_player_address + 0x1B6),
-                    current_action=read_u32(dynamic_player_address + 0x1B8),    # multi bitfield: some functions only check second byte
-                                                                                # 0x0000=no_action
-                                                                                # 0x0001=crouch
-                                                                                # 0x0002=jump
-                                                                                # 0x0008=fire
-                                                                                # 0x0010=flashlight    immediately goes back to 0x0 even if held
-                                                                                # 0x0440=press_action    cycles back to 0x0 before going to 0x4000
-                                                                                # 0x0800=shooting
-                                                                                # 0x2fc4=grenade
-                                                                                # 0x4000=hold_action
-                    # stunned=read_s32(dynamic_player_address + 0x1CB),  # from biped_jump -- this isn't actually stunned
-                    stunned=read_float(dynamic_player_address + 0x3D4),  # from biped_jump -- this isn't actually stunned
-                    # maybe_desired_facing_vector_x=read_float(dynamic_player_address + 0x1C8),
-                    # maybe_desired_facing_vector_y=read_float(dynamic_player_address + 0x1CC),  # FIXME: y is null
-                    # maybe_desired_facing_vector_z=read_float(dynamic_player_address + 0x1D0),
-                    xunk0=read_float(dynamic_player_address + 0x1D4),  # unknown, from biped_update_turning(), gets multiplied by leg rotation 24, 28, 2c.
-                    yunk0=read_float(dynamic_player_address + 0x1D8),
-                    zunk0=read_float(dynamic_player_address + 0x1DC),  # z seems to stay at 0.0, but periodically will briefly flip to same z as others
-                    xaima=read_float(dynamic_player_address + 0x1E0),  # unit vectors, -1 to 1 on x y z axes.
-                    yaima=read_float(dynamic_player_address + 0x1E4),
-                    zaima=read_float(dynamic_player_address + 0x1E8),
-                    aiming_vector_x=read_float(dynamic_player_address + 0x1EC),  # used in first_person_camera_deterministic(), which gets used in player_aim_projectile()
-                    aiming_vector_y=read_float(dynamic_player_address + 0x1F0),
-                    aiming_vector_z=read_float(dynamic_player_address + 0x1F4),
-                    xaim0=read_float(dynamic_player_address + 0x1F8),  # these seem to be used for projectiles -- see projectile_update()
-                    yaim0=read_float(dynamic_player_address + 0x1FC),
-                    zaim0=read_float(dynamic_player_address + 0x200),
-                    xaim1=read_float(dynamic_player_address + 0x204),  # look in players_update_before_game() and unit_control()
-                    yaim1=read_float(dynamic_player_address + 0x208),
-                    zaim1=read_float(dynamic_player_address + 0x20C),
-                    looking_vector_x=read_float(dynamic_player_address + 0x210),
-                    looking_vector_y=read_float(dynamic_player_address + 0x214),
-                    looking_vector_z=read_float(dynamic_player_address + 0x218),
-                    move_forward=read_float(dynamic_player_address + 0x228),  # throttle?
-                    move_left=read_float(dynamic_player_address + 0x22C),
-                    move_up=read_float(dynamic_player_address + 0x230),  # not sure if this is used anywhere? banshee controls? observer?
-
-                    # note: check out search for header->event_type in 2276betaP, animation types? (not sure if these are the same animations, but noting here anyway for later)
-                    #       & 0xFC == 8     _playback_animation_state_set
-                    #       & 0xFC == 12    _playback_aiming_speed_set
-                    #       & 0xFC == 16    _playback_control_flags_set
-                    #       & 0xFC == 20    _playback_weapon_index_set
-                    #       & 0xFC == 24    _playback_throttle_set
-                    melee_damage_type=read_u8(dynamic_player_address + 0x239),  # see unit_cause_continuous_melee_damage(), if =4 then continuous melee damage, if =3 then impact melee damage, players are =0
-                    animation_1=read_u8(dynamic_player_address + 0x253),  # see unit_update_animation() and unit_get_custom_animation_time(), 0x253 and 0x254 both seem related to animations (movement, grenade throwing, melee, etc)
-                    animation_2=read_u8(dynamic_player_address + 0x254),
-                    animation_debug=get_animation_debug_info(read_u32(dynamic_player_address + 0x7C), read_s16(dynamic_player_address + 0x80), read_s16(dynamic_player_address + 0x82)),
-                    selected_weapon_index=read_s16(dynamic_player_address + 0x2A2),  # 0 or 1 for primary/secondary, -1 for none, see first_person_weapon_index_from_weapon_index()
-                    # selected_weapon_index_2=read_s16(dynamic_player_address + 0x2A4),  # seems to only matter if you fully drop a weapon without picking up a replacement
-                    # primary_weapon_object=read_u32(dynamic_player_address + 0x2A8),
-                    # secondary_weapon_object=read_u32(dynamic_player_address + 0x2AC),
-                    # selected_weapon_object=read_u32(dynamic_player_address + 4 * read_u16(dynamic_player_address + 0x2A2) + 0x2A8),
-                    # selected_weapon_object_hex=f'{hex(selected_weapon_handle)} -> {hex(selected_weapon_handle & 0xFFFF)=}',
-                    # selected_weapon_address=selected_weapon_address,
-                    # selected_weapon_address_hex=f'{read_u32(selected_weapon_address)} @ {hex(selected_weapon_address)} -> {hex(known_addresses[selected_weapon_address]["host_address"])}',
-                    # weapons=[get_weapon(read_u32(dynamic_player_address + 0x2A8 + 4 * weapon_index)) for weapon_index in range(4)],
-                    weapons=get_weapons(dynamic_player_address + 0x2A8),
-                    # weapon_0=get_weapon(read_u32(dynamic_player_address + 0x2A8)),
-                    # weapon_1=get_weapon(read_u32(dynamic_player_address + 0x2AC)),
-                    # weapon_2=get_weapon(read_u32(dynamic_player_address + 0x2B0)),
-                    # weapon_3=get_weapon(read_u32(dynamic_player_address + 0x2B4)),
-                    # selected_weapon=get_weapon(read_u32(dynamic_player_address + 4 * read_u16(dynamic_player_address + 0x2A2) + 0x2A8)),
-                    current_equipment=hex(read_u32(dynamic_player_address + 0x2C8)),
-                    primary_nades=read_u8(dynamic_player_address + 0x2CE),
-                    secondary_nades=read_u8(dynamic_player_address + 0x2CF),
-                    zoom_level=read_s8(dynamic_player_address + 0x2D0),
-
-                    camo_amount=read_float(dynamic_player_address + 0x32C),  # 0=nocamo, 1=fullcamo, from game_engine_player_depower_active_camo(), also see unit_update()
-                    # camo_thing2=read_float(dynamic_player_address + 0x330),  # from first_person_weapon_draw() and unit_update()
-
-                    # 0 normally, 1 when player has camo and is revealed by shooting (but not being shot at)
-                    camo_self_revealed=read_u16(dynamic_player_address + 0x3D2),  # from player_powerup_on(), not sure when this actually gets set
-
-                    # see game_statistics_record_kill() and unit_record_damage()
-                    damagers_list_address=hex(get_host_address(dynamic_player_address + 0x3E0)),
-                    crouchscale=crouchscale,
-
-                    # seems like if x or y is greater than z, you start sliding or falling? you can watch it change when slowly walking off a ledge
-                    facing1=read_float(dynamic_player_address + 0x46C),  # used in biped_snap_facing, not sure purpose (usually 0,0,1 on flat ground)
-                    facing2=read_float(dynamic_player_address + 0x470),  # except when on small ledges? e.g. on flat part of zyos ledge x increases as you get farther from wall
-                    facing3=read_float(dynamic_player_address + 0x474),  # on zyos ledge diagonal part the z value starts decreasing from 1. also changes on small depressions in priz floor and ramps
-
-                    # from biped_get_sight_position()
-                    camera_x=read_float(dynamic_player_address + 0xC),
-                    camera_y=read_float(dynamic_player_address + 0x10),
-                    camera_z=(1 - crouchscale) * biped_camera_height_standing + crouchscale * biped_camera_height_crouching + read_float(dynamic_player_address + 0x14),
-
-                    air_1_0x64=read_s16(dynamic_player_address + 0x64),  # any_player_is_in_the_air() and unit_get_camera_position()
-                    airborne=read_u8(dynamic_player_address + 0x424),  # &1 = airborne, &2 = slipping, 0 = standing, from biped_update()
-                    landing_stun_current_duration=read_u8(dynamic_player_address + 0x428),  # any_player_is_in_the_air(), when you land from a jump, seems to be impact intensity (1 or 2 being flat ground jump, 30 for jumping off top priz fall damage). slowly ramps up to value of 0x429
-                    landing_stun_target_duration=read_u8(dynamic_player_address + 0x429),  # biped_start_landing(), looks like the target for 0x428, max of 30?
-                    airborne_ticks=read_u8(dynamic_player_address + 0x459),  # biped_flying_through_air(), seems to be number of ticks since leaving ground
-
-                    # TODO: need to verify padding on these. crouchscale doesn't line up with the end of `short landing`
-                    slipping_ticks=read_u8(dynamic_player_address + 0x45A),
-                    stop_ticks=read_u8(dynamic_player_address + 0x45B),
-                    jump_recovery_timer=read_u8(dynamic_player_address + 0x45C),
-                    melee_animation_remaining=read_u8(dynamic_player_address + 0x45D),
-                    melee_animation_damage_tick=read_u8(dynamic_player_address + 0x45E),  # from biped_update() and unit_cause_player_melee_damage()
-                    melee_impact_this_tick=read_u8(dynamic_player_address + 0x45D) == read_u8(dynamic_player_address + 0x45E),  # TODO: move to computed?
-                    landing=read_u16(dynamic_player_address + 0x45F),
-
-                    air_3_0x460=read_s16(dynamic_player_address + 0x460),  # biped_update(), if -1 check for slipping. stays -1 while walking, briefly 0 when landing, 1 if damaged from fall? stays at 0 or 1 until 0x428 reaches 0x429
-
-                    # 0x4096 when shields are charging, 0x4112 when overshield charging
-                    air_4_0xB6=read_s16(dynamic_player_address + 0xB6),  # biped_flying_through_air() and unit_get_camera_position(), 8 while shields are damaged from falling or nade, 4096 while shields recharging (from any damage)
-
-                    biped_flags=read_u32(biped_tag_address + 0x2F4),
-                    autoaim_pill_radius=read_float(biped_tag_address + 0x458),  # from biped_get_autoaim_pill()
-                )
-
-                model_nodes = get_model_nodes(dynamic_player_address)
-
-            else:
-
-                if previous_player_object_handle != -1:
-                    # body of dead player
-                    model_nodes = get_model_nodes(previous_dynamic_player_address)
-                else:
-                    model_nodes = []
-
-                player_object_data = {}
-                # print('player respawns in {} ticks'.format(read_u32(static_player_address + 0x2C)))
-
-            # print(player_object_data['xaim2'], player_object_data['yaim2'], player_object_data['zaim2'])
-
-            # TODO: game_engine_get_state_message()
-
-            local_player = read_s16(static_player_address + 0x2)
-
-            player_stats = dict(
-                player_index=player_index,  # index in the player datum array
-                local_player=local_player,  # 0 to 3 if local (controller port), -1 if not local
-                name=read_bytes(static_player_address + 0x4, 24).decode('utf-16').split('\x00', 1)[0] if use_pymem else b''.join([int.to_bytes(i, signed=True) for i in read_bytes(static_player_address + 0x4, 24)]).decode('utf-16').split('\x00', 1)[0],
-                # is_dead=hex(read_s32(static_player_address + 0xD)),  # from any_player_is_dead() -- value does not change when dead
-                # name=t.read(static_player_address + 0x4, 24).decode('utf-16').split('\x00', 1)[0],
-                team=read_u32(static_player_address + 0x20),  # red=0, blue=1, ffa=0-15
-                action_target=hex(read_u32(static_player_address + 0x24)),  # looks like the object you'll interact with if you press action, set to -1 on spawn
-                action=read_u16(static_player_address + 0x28),  # 6 if standing over weapon (7 if only 1 weapon held), 8 if next to vehicle, 0 otherwise, set to 0 on spawn
-                action_seat=read_u16(static_player_address + 0x2A),
-                respawn_timer=read_u32(static_player_address + 0x2C),
-                respawn_penalty=read_u32(static_player_address + 0x30),
-                object_ref=hex(read_u32(static_player_address + 0x34)),  # -1 when player is dead
-                object_index=read_u16(static_player_address + 0x34),
-                object_id=read_u16(static_player_address + 0x36),
-                previous_object_ref=hex(read_u32(static_player_address + 0x38)),  #  0x34 gets copied here when player dies
-                last_target_object_ref=hex(read_u32(static_player_address + 0x40)),  # set to same as copy above if no target
-                time_of_last_shot=read_u32(static_player_address + 0x44),
-                player_speed=read_float(static_player_address + 0x6C),
-                camo_timer=read_u32(static_player_address + 0x68),
-                time_of_last_death=read_u32(static_player_address + 0x84),  # 0 at start of game
-                target_player_index=read_u32(static_player_address + 0x88),
-                kill_streak=read_u16(static_player_address + 0x92),  # resets to 0 on death
-                multikill=read_u16(static_player_address + 0x94),  # resets to 0 on death
-                time_of_last_kill=read_s16(static_player_address + 0x96),  # in ticks, resets to -1 on death
-                kills=read_s16(static_player_address + 0x98),
-                assists=read_s16(static_player_address + 0xA0),
-                team_kills=read_s16(static_player_address + 0xA8),
-                deaths=read_s16(static_player_address + 0xAA),
-                suicides=read_s16(static_player_address + 0xAC),
-                shots_fired=read_s32(static_player_address + 0xAE),
-                shots_hit=read_s16(static_player_address + 0xB2),
-                score=player_score_by_player_id(player_index, read_u32(game_engine_globals_address + 0x4) if game_engine_globals_address else 0),
-                ctf_score=read_s16(static_player_address + 0xC4),
-                player_quit=read_u8(static_player_address + 0xD1),  # 1 if player quit, not sure what else
-                damage_table=damage_table,
-                observer_camera_info=get_observer_camera_info(local_player),  # TODO: duplicate lookup
-                input_data=get_input_data(local_player, player_index),
-                player_object_debug=player_object_debug,
-                player_object_data=player_object_data,
-                model_nodes=model_nodes,  # also includes dead body while respawning
-            )
-
-            derived_stats = dict(
-                # has_camo=player_stats['camo_timer'] > 0,
-                has_camo=bool(player_object_data) and player_object_data['camo'] == 0x51,
-                has_overshield=bool(player_object_data) and (player_object_data['shields_status'] == 0x10 or player_object_data['shields'] > 1),  # FIXME: replace int conversion
-            )
-            player_stats.update(derived_stats=derived_stats)
-
-            # get data that depends on players being local
-            if local_player != -1:
-                # player_stats.update(input_data=get_input_data(local_player))
-                player_stats.update(first_person_weapon=get_first_person_weapon(local_player))
-
+        player_args = [(context, player_index, game_time, game_engine_globals_address, object_header_datum_array)
+                       for player_index in range(player_count)]
+        for player_index, (player_stats, damage_taken) in enumerate(map_extraction(get_player_stats, player_args)):
+            for damage_player_index, damage_amount in damage_taken.items():
+                damage_counts[damage_player_index][player_index] = damage_amount
             player_stat_array.append(player_stats)
 
     game_info = dict(
@@ -1890,6 +2554,7 @@ def get_game_info():
         variant=read_u8(0x2F90F4),
         global_stage=read_string(0x2FAC20, length=63),  # only populated for hostbox
         multiplayer_map_name=read_string(0x2E37CD),  # populated for host and join boxes
+        map_hash=current_map_hash,  # set by warm_up_map()
         # network_game_server=f'{hex(read_u32(read_u32(0x2E3628)))}: {hex(read_u32(read_u32(0x2E3628)))} -> {hex(get_host_address(read_u32(read_u32(0x2E3628))))}',
         # network_game_server_state=read_s16(read_u32(0x2E3628) + 0x4),  # 1 = ingame
                                                                        # 2 = postgame
@@ -1905,13 +2570,10 @@ def get_game_info():
         flag_data=get_flag_data(),
         local_player_count=read_u16(players_globals_address + 0x24),
         key_data=get_key_data(),
-        # flag_base_locations=f'{read_float(0x2762A4)} {hex(known_addresses[0x2762A4]["host_address"])}',
+        # flag_base_locations=f'{read_float(0x2762A4)} {hex(get_host_address(0x2762A4))}',
         game_time_info=get_game_time_info(),
         # game_variant=get_game_variant_global(),
-        network_game_server=get_network_game_server(),
-        network_game_client=get_network_game_client(),
         # game_update_data=dump_game_update_contents(),
-        # fog_data=get_fog(),
         observer_cameras_address=f'{get_host_address(0x271550):#x}',
         game_globals_address=f'{hex(game_globals_address)} -> {hex(get_host_address(game_globals_address))}',
         game_globals_map_loaded=game_globals_map_loaded,
@@ -1934,7 +2596,6 @@ def get_game_info():
         main_menu_is_active=main_menu_is_active,
         last_game_in_progress=last_game_in_progress,
         last_game_connection=last_game_connection,
-        memory_info=get_memory_info(),
         events=[],
         damage_counts=damage_counts,
         players=player_stat_array,
@@ -1943,9 +2604,7 @@ def get_game_info():
         #       (note: tried asyncio.run/await/async and it ran half as fast)
         # TODO: see https://github.com/StarrFox/wizwalker for possible implementation
         #       make the individual pymem calls async?
-        objects=get_objects(),
-        items=get_items(),
-        spawns=get_spawns(),
+        objects=get_objects(context),
         game_ended_this_tick=False,  # this gets set in extract_events()
         current_time=datetime.datetime.now(),
     )
@@ -1968,14 +2627,26 @@ def get_game_info():
         game_id = ''
     game_info['game_id'] = game_id
 
+    # lower priority data goes last, so it's what gets deferred when a tick runs long
+    game_info.update(
+        network_game_server=extraction_scheduler.get('network_game_server'),
+        network_game_client=extraction_scheduler.get('network_game_client'),
+        memory_info=extraction_scheduler.get('memory_info'),
+        items=extraction_scheduler.get('items'),
+        spawns=extraction_scheduler.get('spawns'),
+        # fog_data=extraction_scheduler.get('fog'),  # on demand, see ExtractionScheduler.request()
+    )
+    game_info['scheduler'] = extraction_scheduler.report()
+
     return game_info
 
 
 def analyze_offset_map():
     """
     Compare guest and host memory offsets to check for contiguous regions
+    Addresses listed here were translated through QMP because they weren't inside any of the probed host_regions,
+    see get_probe_ranges(). Needs track_translation_provenance enabled.
 
-    TODO: make sure guest addresses above 0x80000000 are always contiguous in host memory
     :return:
     """
 
@@ -1985,12 +2656,15 @@ def analyze_offset_map():
     last_guest = 0
     last_host = 0
 
-    for guest, value in sorted(known_addresses.items()):
-        if 'qmp' in value:
+    if not track_translation_provenance:
+        print('analyze_offset_map() needs track_translation_provenance = True')
+
+    for guest, value in sorted(translation_provenance.items()):
+        if value['source'] == 'qmp':
             host = value['host_address']
-            memory_map.append([hex(guest), hex(host), guest - last_guest, host - last_host, value['qmp_traceback']])
+            memory_map.append([hex(guest), hex(host), guest - last_guest, host - last_host, value['line']])
             if guest - last_guest != host - last_host:
-                mismatches.append([hex(guest), hex(host), guest - last_guest, host - last_host, value['qmp_traceback']])
+                mismatches.append([hex(guest), hex(host), guest - last_guest, host - last_host, value['line']])
             last_guest = guest
             last_host = host
 
@@ -2017,8 +2691,8 @@ def send_to_file(data, outfile, compression=''):
     # Create directories if they don't exist
     os.makedirs(os.path.dirname(outfile), exist_ok=True)
 
-    # Serialize data to bytes
-    data_bytes = json.dumps(data, default=str).encode()
+    # Serialize data to bytes (model records come out as the dicts they were made from)
+    data_bytes = json.dumps(data, default=model.to_builtin).encode()
 
     # Handle compression if specified
     if compression:
@@ -2037,7 +2711,7 @@ def send_to_file(data, outfile, compression=''):
     else:
         # No compression; write as plain JSON
         with open(outfile, 'a') as f:
-            json.dump(data, f, default=str)
+            json.dump(data, f, default=model.to_builtin)
             f.write('\n')
 
 
@@ -2057,9 +2731,23 @@ def send_to_database(game_info, db):
         db.insert_player_data(data)
 
 
-game_info_queue = queue.Queue()
-game_info_queue_for_ui = queue.Queue()
-write_queue_from_ui = queue.Queue()
+# recorder needs every tick, the UI and websocket overlays only ever need the latest one
+# see channels.py, these are bounded so a slow consumer can't grow memory forever. main_loop() never blocks on the
+# recorder, a full queue drops the tick (counted in its stats, and in the game summary's ticks_dropped)
+game_info_queue = channels.BoundedQueue('recorder', maxsize=300)
+game_info_queue_for_ui = channels.LatestValue('ui')
+game_info_queue_for_websocket = channels.LatestValue('websocket')
+write_queue_from_ui = channels.BoundedQueue('ui_writes', maxsize=64)
+
+
+def save_game(game_id, game, filename):
+    """Writes a finished game, on its own thread so the recorder keeps taking ticks in the meantime"""
+
+    send_to_file(game, filename, compression='gz')
+    if static_map_store:
+        summary = game['summary']
+        static_map_store.record_replay(game_id, summary.get('map_hash'), summary.get('match_hash'), filename)
+    gc.collect()
 
 
 def handle_game_info_loop():
@@ -2099,6 +2787,8 @@ def handle_game_info_loop():
 
                 game_summary = {
                     'game_id': game_id,
+                    'map_hash': game_info.get('map_hash'),
+                    'match_hash': meta.get('match_hash') if meta else None,
                     'is_full_game': start_game_time == 0,
                     'recording_started': start_time,
                     'recording_ended': end_time,
@@ -2123,24 +2813,17 @@ def handle_game_info_loop():
             if game_info.get('game_ended_this_tick'):
                 pprint(game_summary)
 
-                # Save the game data to a file (using gzip compression)
+                # Save the game data to a file (using gzip compression), a long game takes a while
                 filename = f'E:\\h1_demo_creation\\replays\\{game_id}_final.json.gz'
-                send_to_file(game, filename, compression='gz')
-
-                # Clear the stored ticks and run garbage collection
-                game_ticks.clear()
-                gc.collect()
+                threading.Thread(target=save_game, args=(game_id, game, filename), name=f'save_game_{game_id}').start()
 
-
-database_worker_thread = threading.Thread(target=handle_game_info_loop, daemon=True, name='database_thread')
-database_worker_thread.start()
+                # the save thread has the stored ticks now
+                game_ticks = []
 
 
 default_framerate_address = 0xBB648
 refresh_rate_address = 0x1F8C98
 
-game_time_address = game_time_globals_address + 12
-
 def matches_gametype(current_gametype: int, gametype_list: list[int]) -> bool:
     """
     Returns True if current_gametype matches any gametypes in gametype_list
@@ -2167,6 +2850,9 @@ def matches_gametype(current_gametype: int, gametype_list: list[int]) -> bool:
             return True
 
 
+spawn_prediction = spawn_predictor.SpawnPredictor(matches_gametype)
+
+
 def distance(p1: tuple[int, int, int], p2: tuple[int, int, int]) -> float:
     x1, y1, z1 = p1
     x2, y2, z2 = p2
@@ -2175,24 +2861,41 @@ def distance(p1: tuple[int, int, int], p2: tuple[int, int, int]) -> float:
 
 # TODO: need to list out some use cases here -- where would intentional collisions be useful, if we can just
 #       search by parameters individually. My first thought was map variants (dammy vs. dammy pe)
+def format_hash(*parts):
+    """
+    Hash of the parts, prefixed with the hash scheme version ($1$ for this one) so the scheme can change later
+    without old and new hashes ever comparing equal.
+    """
+
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b'\0')
+    return f'$1${digest.hexdigest()[:16]}'
+
+
 def calculate_map_hash():
     """
-    spawn locations and rotations
-    item locations and rotations
-    equipment locations and rotations
-    portal locations and rotations
-    map name
-    map description
-    some chosen tag data (e.g. spread values and other things that may have been changed in different versions)
+    Fingerprint of a map version, versioned with format_hash(). Hashes the map name, the raw scenario spawn and item
+    placement blocks (locations, rotations, team/gametype flags and item tag ids), and the names of the tags those
+    items place along with how many there are, so a version that swaps out a tag changes the hash even when its tag
+    index stays the same. The names go through get_tag_name(), which warm_up_map() needs for the items anyway.
     TODO: could also include a separate hash based only on locations as a way to suggest alternate map versions
             (also look at locality-sensitive hashing for this)
-    TODO: define some kind of hash versioning (like borrowing the $1$deadbeef, $2$cafebabe format from pw hashes?)
     """
 
-    pass
+    global_scenario_address = read_u32(0x39BE5C)
+    spawn_count = max(read_s32(global_scenario_address + 852), 0)
+    item_count = max(read_s32(global_scenario_address + 900), 0)
+    spawn_bytes = read_bytes(read_u32(global_scenario_address + 856), 52 * spawn_count) if spawn_count else b''
+    item_bytes = read_bytes(read_u32(global_scenario_address + 904), 144 * item_count) if item_count else b''
+    item_tags = {struct.unpack_from('<i', item_bytes, 144 * item_index + 0x5C)[0] for item_index in range(item_count)}
+    item_tag_names = sorted(get_tag_name(tag_id) for tag_id in item_tags if tag_id != -1)
+    return format_hash(read_string(0x2E37CD), spawn_count, spawn_bytes, item_count, item_bytes,
+                       len(item_tag_names), *item_tag_names)
 
 
-def calculate_match_hash():
+def calculate_match_hash(tick):
     """
     map hash
     player hash
@@ -2204,21 +2907,34 @@ def calculate_match_hash():
             The one without start time will be the same on each xbox, but will also be the same on map reruns
             The one with start time will be different on each xbox and different across map reruns
             Is there some additional match start time data that comes along with one of the map start packets from host?
+            (for now: the one without start time)
     """
 
-    pass
+    player_hashes = [calculate_player_hash(player) for player in tick.players]
+    return format_hash(tick.map_hash, calculate_game_hash(), tick.stored_global_random, *player_hashes)
+
+
+# xbe fingerprint, see calculate_game_hash()
+game_hash = None
 
 
 def calculate_game_hash():
     """
     game version strings
     overall xbe hash (or hash of some chosen regions of the xbe -- like map list?)
+
+    Hashes the xbe headers mapped at 0x10000. They include the certificate (title id, version) and a sha1 digest of
+    every section, so they identify the whole xbe. Only read once per process.
     """
 
-    pass
+    global game_hash
+    if game_hash is None:
+        header_size = min(read_u32(0x10000 + 0x108), 0x10000)
+        game_hash = format_hash(read_bytes(0x10000, header_size))
+    return game_hash
 
 
-def calculate_player_hash():
+def calculate_player_hash(player):
     """
     player names
     player sensitivities
@@ -2226,9 +2942,12 @@ def calculate_player_hash():
     player order (nonlocal ids)  <-- this should be excluded from individual hashes, and introduced in combined via the order of the individual hashes
     TODO: should this be individual player hashes or combined?
             probably individual hashes that get combined for the match hash
+            (individual, combined in calculate_match_hash())
     """
 
-    pass
+    ui_globals = get_player_ui_globals(player.local_player)
+    return format_hash(player.name, *(ui_globals.get(setting) for setting in
+                                         ('sensitivity', 'button_config', 'joystick_config', 'joystick_inverted')))
 
 
 def get_empty_player_meta():
@@ -2251,84 +2970,92 @@ def get_empty_player_meta():
             camo_count=0,
             overshield_by_tick=defaultdict(int),
             overshield_count=0,
-            active_projectiles=[]
+            active_projectiles=[],
+            accuracy_by_weapon={},
+            grenades={}
         )
 
 
-def initialize_meta_players(game_info):
+def initialize_meta_players(tick):
 
     # TODO: time spent blocking ports, movement traveled, times ported
 
     # TODO: separate counters (value at current tick) and timelines (all historical values by tick)
 
+    if 'players' in game_meta:
+        # e.g. a new game started without the last one's game over
+        projectiles.settle_all(game_meta['players'])
     game_meta['players'] = {}
+    projectiles.clear()
 
-    for player in game_info['players']:
-        game_meta['players'][player['player_index']] = get_empty_player_meta()
+    for player in tick.players:
+        game_meta['players'][player.player_index] = get_empty_player_meta()
+
+def extract_events(old_tick: model.Tick, new_tick: model.Tick) -> list:
+    """Events between two consecutive ticks, see model.Tick.from_game_info(). Also updates game_meta and spatial"""
 
-def extract_events(old_game_info: dict, new_game_info: dict) -> list:
     events = []
-    game_time = new_game_info['game_time_info']['game_time']
+    game_time = new_tick.game_time_info['game_time']
+    spatial.update(new_tick)
 
     if 'players' not in game_meta:
-        initialize_meta_players(new_game_info)
+        initialize_meta_players(new_tick)
 
     # Handle new game initialization
-    if not old_game_info['game_engine_running'] and new_game_info['game_engine_running']:
-        events.append(f'{game_time}: New game started on {new_game_info["multiplayer_map_name"]}')
-        game_meta['start_time'] = new_game_info['current_time']
-        initialize_meta_players(new_game_info)
-        clear_caches()
+    if not old_tick.game_engine_running and new_tick.game_engine_running:
+        events.append(f'{game_time}: New game started on {new_tick.multiplayer_map_name}')
+        game_meta['start_time'] = new_tick.current_time
+        game_meta['match_hash'] = calculate_match_hash(new_tick)
+        initialize_meta_players(new_tick)
+        # no need to start cold if warm_up_map() already ran for this map
+        if warmed_map_key != get_map_key():
+            clear_caches()
 
     # Projectiles
-    if new_game_info['game_engine_can_score'] and 'objects' in new_game_info:
-        new_projectiles = set(new_game_info['objects_meta']['object_ids_by_type']['projectile'])
-        old_projectiles = set(old_game_info['objects_meta']['object_ids_by_type']['projectile'])
-        new_projectile_ids_by_player = new_projectiles - old_projectiles
-        deleted_projectile_ids_by_player = old_projectiles - new_projectiles
-        # Further processing can be added here if needed
+    if new_tick.game_engine_can_score and new_tick.objects is not None:
+        projectiles.update(new_tick, game_meta['players'])
 
     # Shots fired, melees, and grenades
-    if new_game_info['game_engine_can_score'] and len(old_game_info['players']) == len(new_game_info['players']):
-        for old_player, new_player in zip(old_game_info['players'], new_game_info['players']):
-            old_data = old_player['player_object_data']
-            new_data = new_player['player_object_data']
+    if new_tick.game_engine_can_score and len(old_tick.players) == len(new_tick.players):
+        for old_player, new_player in zip(old_tick.players, new_tick.players):
+            old_data = old_player.player_object_data
+            new_data = new_player.player_object_data
 
             if old_data and new_data:
                 # Weapons usage
-                for old_weapon, new_weapon in zip(old_data['weapons'], new_data['weapons']):
-                    if old_weapon['object_id'] == new_weapon['object_id']:
-                        old_ammo = old_weapon['charge_amount'] if new_weapon['is_energy_weapon'] else old_weapon['magazine_ammo_count']
-                        new_ammo = new_weapon['charge_amount'] if new_weapon['is_energy_weapon'] else new_weapon['magazine_ammo_count']
+                for old_weapon, new_weapon in zip(old_data.weapons, new_data.weapons):
+                    if old_weapon.object_id == new_weapon.object_id:
+                        old_ammo = old_weapon.charge_amount if new_weapon.is_energy_weapon else old_weapon.magazine_ammo_count
+                        new_ammo = new_weapon.charge_amount if new_weapon.is_energy_weapon else new_weapon.magazine_ammo_count
                         if old_ammo > new_ammo:
-                            game_meta['players'][new_player['player_index']]['shots_by_weapon'][new_weapon["tag_name"]] += (
-                                1 if new_weapon['is_energy_weapon'] else old_ammo - new_ammo
+                            game_meta['players'][new_player.player_index]['shots_by_weapon'][new_weapon.tag_name] += (
+                                1 if new_weapon.is_energy_weapon else old_ammo - new_ammo
                             )
-                            game_meta['players'][new_player['player_index']]['shots_by_tick'][game_time] += (
-                                1 if new_weapon['is_energy_weapon'] else old_ammo - new_ammo
+                            game_meta['players'][new_player.player_index]['shots_by_tick'][game_time] += (
+                                1 if new_weapon.is_energy_weapon else old_ammo - new_ammo
                             )
 
                 # Grenade throws
-                if old_data['primary_nades'] > new_data['primary_nades']:
-                    events.append(f'{game_time}: {new_player["name"]} threw frag grenade ({old_data["primary_nades"]} -> {new_data["primary_nades"]})')
-                if old_data['secondary_nades'] > new_data['secondary_nades']:
-                    events.append(f'{game_time}: {new_player["name"]} threw plasma grenade ({old_data["secondary_nades"]} -> {new_data["secondary_nades"]})')
+                if old_data.primary_nades > new_data.primary_nades:
+                    events.append(f'{game_time}: {new_player.name} threw frag grenade ({old_data.primary_nades} -> {new_data.primary_nades})')
+                if old_data.secondary_nades > new_data.secondary_nades:
+                    events.append(f'{game_time}: {new_player.name} threw plasma grenade ({old_data.secondary_nades} -> {new_data.secondary_nades})')
 
                 # Melees
-                if not old_data['melee_impact_this_tick'] and new_data['melee_impact_this_tick']:
+                if not old_data.melee_impact_this_tick and new_data.melee_impact_this_tick:
                     # Melee event can be logged here
                     pass
 
     # New damage
-    if new_game_info['game_engine_can_score']:
-        for damage_dealer, damage_receivers in new_game_info['damage_counts'].items():
-            damage_dealer_name = new_game_info['players'][damage_dealer]['name']
-            old_damage_receivers = old_game_info['damage_counts'].get(damage_dealer, {})
+    if new_tick.game_engine_can_score:
+        for damage_dealer, damage_receivers in new_tick.damage_counts.items():
+            damage_dealer_name = new_tick.players[damage_dealer].name
+            old_damage_receivers = old_tick.damage_counts.get(damage_dealer, {})
 
             for damage_receiver, new_amount in damage_receivers.items():
                 old_amount = old_damage_receivers.get(damage_receiver, 0)
                 if new_amount > old_amount:
-                    damage_receiver_name = new_game_info['players'][damage_receiver]['name']
+                    damage_receiver_name = new_tick.players[damage_receiver].name
                     damage_diff = new_amount - old_amount
                     events.append(f'{game_time}: {damage_dealer_name} damaged {damage_receiver_name} for {damage_diff}')
                     game_meta['players'][damage_dealer]['damage_dealt_by_tick'][game_time] += damage_diff
@@ -2337,80 +3064,102 @@ def extract_events(old_game_info: dict, new_game_info: dict) -> list:
                     game_meta['players'][damage_receiver]['damage_from_player'][damage_dealer] += damage_diff
                     game_meta['players'][damage_dealer]['damage_dealt'] += damage_diff
                     game_meta['players'][damage_receiver]['damage_received'] += damage_diff
+                    credit_damage_to_shot(old_tick, new_tick, damage_dealer, damage_receiver, damage_diff)
 
     # Kills, deaths, assists, powerups
-    if old_game_info['game_engine_running'] and new_game_info['game_engine_running'] and len(old_game_info['players']) == len(new_game_info['players']):
-        for old_player, new_player in zip(old_game_info['players'], new_game_info['players']):
-            player_index = new_player['player_index']
+    if old_tick.game_engine_running and new_tick.game_engine_running and len(old_tick.players) == len(new_tick.players):
+        for old_player, new_player in zip(old_tick.players, new_tick.players):
+            player_index = new_player.player_index
 
             # Kills
-            if (kills := new_player['kills']) > old_player['kills']:
-                events.append(f'{game_time}: {new_player["name"]} got a kill ({kills})')
-                game_meta['players'][player_index]['kills_by_tick'][game_time] += kills - old_player['kills']
+            if (kills := new_player.kills) > old_player.kills:
+                events.append(f'{game_time}: {new_player.name} got a kill ({kills})')
+                game_meta['players'][player_index]['kills_by_tick'][game_time] += kills - old_player.kills
 
             # Deaths
-            if (deaths := new_player['deaths']) > old_player['deaths']:
-                events.append(f'{game_time}: {new_player["name"]} died ({deaths})')
-                game_meta['players'][player_index]['deaths_by_tick'][game_time] += deaths - old_player['deaths']
+            if (deaths := new_player.deaths) > old_player.deaths:
+                events.append(f'{game_time}: {new_player.name} died ({deaths})')
+                game_meta['players'][player_index]['deaths_by_tick'][game_time] += deaths - old_player.deaths
 
             # Assists
-            if (assists := new_player['assists']) > old_player['assists']:
-                events.append(f'{game_time}: {new_player["name"]} got an assist ({assists})')
-                game_meta['players'][player_index]['assists_by_tick'][game_time] += assists - old_player['assists']
+            if (assists := new_player.assists) > old_player.assists:
+                events.append(f'{game_time}: {new_player.name} got an assist ({assists})')
+                game_meta['players'][player_index]['assists_by_tick'][game_time] += assists - old_player.assists
 
             # Camo and Overshield
             handle_powerup_events(events, game_time, old_player, new_player, player_index)
 
     # Spawns
-    if new_game_info['players'] and new_game_info['game_engine_can_score'] and 'spawns' in new_game_info and new_game_info['spawns']:
-        handle_player_spawns(events, game_time, old_game_info, new_game_info)
+    if new_tick.players and new_tick.game_engine_can_score and new_tick.spawns:
+        handle_player_spawns(events, game_time, old_tick, new_tick)
 
     # Game Over
-    if old_game_info['game_engine_can_score'] and not new_game_info['game_engine_can_score']:
-        events.append(f'{game_time}: Game ended on {new_game_info["multiplayer_map_name"]}')
+    if old_tick.game_engine_can_score and not new_tick.game_engine_can_score:
+        events.append(f'{game_time}: Game ended on {new_tick.multiplayer_map_name}')
         game_meta['start_time'] = None
-        new_game_info['game_ended_this_tick'] = True
-        new_game_info['game_id'] = old_game_info['game_id']
+        # no more damage to credit, the grenades still pending get their outcome in this tick's game_meta
+        projectiles.settle_all(game_meta['players'])
+        new_tick.game_ended_this_tick = True
+        new_tick.game_id = old_tick.game_id
 
-    new_game_info['game_meta'] = game_meta
+    # where the dead players will probably spawn, for the overlays
+    if predict_spawns and new_tick.game_engine_can_score:
+        new_tick.spawn_predictions = spawn_prediction.predict(new_tick, spatial)
+
+    new_tick.game_meta = game_meta
     return events
 
+def credit_damage_to_shot(old_tick, new_tick, damage_dealer, damage_receiver, damage_diff):
+    """Hands a damage table delta to the projectile tracker, with where the receiver was and whether it killed them"""
+
+    receiver = new_tick.players[damage_receiver]
+    old_receiver = old_tick.players[damage_receiver] if damage_receiver < len(old_tick.players) else None
+    biped = receiver.player_object_data or (old_receiver and old_receiver.player_object_data)
+    position = (biped.x, biped.y, biped.z) if biped else None
+    killed = old_receiver is not None and receiver.deaths > old_receiver.deaths
+    projectiles.record_damage(damage_dealer, damage_receiver, damage_diff, position, killed, game_meta['players'])
+
+
 def handle_powerup_events(events, game_time, old_player, new_player, player_index):
     """Handles camo and overshield events."""
-    if new_player['derived_stats']['has_camo'] and not old_player['derived_stats']['has_camo']:
-        events.append(f'{game_time}: {new_player["name"]} picked up camo')
+    if new_player.derived_stats['has_camo'] and not old_player.derived_stats['has_camo']:
+        events.append(f'{game_time}: {new_player.name} picked up camo')
         game_meta['players'][player_index]['camo_by_tick'][game_time] += 1
         game_meta['players'][player_index]['camo_count'] += 1
-    if not new_player['derived_stats']['has_camo'] and old_player['derived_stats']['has_camo']:
-        events.append(f'{game_time}: {new_player["name"]} lost camo')
+    if not new_player.derived_stats['has_camo'] and old_player.derived_stats['has_camo']:
+        events.append(f'{game_time}: {new_player.name} lost camo')
 
-    if new_player['derived_stats']['has_overshield'] and not old_player['derived_stats']['has_overshield']:
-        events.append(f'{game_time}: {new_player["name"]} picked up overshield')
+    if new_player.derived_stats['has_overshield'] and not old_player.derived_stats['has_overshield']:
+        events.append(f'{game_time}: {new_player.name} picked up overshield')
         game_meta['players'][player_index]['overshield_by_tick'][game_time] += 1
         game_meta['players'][player_index]['overshield_count'] += 1
-    if not new_player['derived_stats']['has_overshield'] and old_player['derived_stats']['has_overshield']:
-        events.append(f'{game_time}: {new_player["name"]} lost overshield')
+    if not new_player.derived_stats['has_overshield'] and old_player.derived_stats['has_overshield']:
+        events.append(f'{game_time}: {new_player.name} lost overshield')
 
-def handle_player_spawns(events, game_time, old_game_info, new_game_info):
+def handle_player_spawns(events, game_time, old_tick, new_tick):
     """Handles player spawns events."""
-    for old_player, new_player in zip(
-            old_game_info['players'] if old_game_info['players'] else [None] * len(new_game_info['players']),
-            new_game_info['players']):
-        if not old_player or (not old_player['player_object_data'] and new_player['player_object_data']):
-            player_x, player_y, player_z = (
-                new_player['player_object_data']['x'],
-                new_player['player_object_data']['y'],
-                new_player['player_object_data']['z']
-            )
-            spawn_found = False
-            for spawn in new_game_info['spawns']:
-                d = distance((player_x, player_y, player_z), (spawn['x'], spawn['y'], spawn['z']))
-                if matches_gametype(new_game_info['game_type'], spawn['gametypes']) and d <= 0.2:
-                    events.append(f'{game_time}: {new_player["name"]} spawned at spawn id {spawn["spawn_id"]}')
-                    spawn_found = True
-                    break
-            if not spawn_found:
-                events.append(f'{game_time}: {new_player["name"]} spawned at an unknown spawn id ({player_x}, {player_y}, {player_z})')
+    spawned_players = [
+        new_player for old_player, new_player in zip(
+            old_tick.players if old_tick.players else [None] * len(new_tick.players),
+            new_tick.players)
+        if new_player.player_object_data and (not old_player or not old_player.player_object_data)
+    ]
+    if not spawned_players:
+        return
+
+    # every spawn within 0.2 of any spawned player in one go, in spawn order for each player
+    positions = [(player.player_object_data.x, player.player_object_data.y, player.player_object_data.z)
+                 for player in spawned_players]
+    player_rows, spawn_rows, _ = spatial.spawns.within(positions, 0.2)
+    for row, new_player in enumerate(spawned_players):
+        for spawn_row in spawn_rows[player_rows == row]:
+            spawn = new_tick.spawns[spawn_row]
+            if matches_gametype(new_tick.game_type, spawn['gametypes']):
+                events.append(f'{game_time}: {new_player.name} spawned at spawn id {spawn["spawn_id"]}')
+                break
+        else:
+            player_x, player_y, player_z = positions[row]
+            events.append(f'{game_time}: {new_player.name} spawned at an unknown spawn id ({player_x}, {player_y}, {player_z})')
 
 
 
@@ -2462,88 +3211,191 @@ def process_write_queue():
         write_bytes(address, value, length)
         print('after: ', get_formatted_bytes(0x9c514, 2))
 
+def start_reader_process():
+    return tick_ring.ReaderProcess(pid, get_read_plan())
+
+
 def main_loop():
     """
     Basic flow:
     - Read game_time as quickly as possible, looking for a change.
+      (with use_reader_process, wait for the reader process to put the next tick in the tick ring instead)
     - If game_time changes:
         - Read game info from memory.
         - Offload game info to background handler threads (websockets, database, local file, etc).
     """
+    reader = start_reader_process() if use_reader_process else None
+    capture = None
+    if use_raw_capture:
+        os.makedirs(raw_capture_directory, exist_ok=True)
+        capture_path = os.path.join(raw_capture_directory, f'{datetime.datetime.now():%Y-%m-%d_%H-%M-%S}.hcraw')
+        capture = raw_capture.RawCaptureWriter(capture_path, metadata=dict(xemu_pid=pid, started=datetime.datetime.now()))
+        print(f'Raw capture to {capture_path}')
+    last_seq = 0
     counter = 0
     global pymem_counter
     last_game_time = 0
-    last_real_time = datetime.datetime.now()
+    last_tick_start_ns = time.perf_counter_ns()
     last_post_steps = 0
+    last_metrics_write = 0
+    slow_tick_recorder = flight_recorder.FlightRecorder(
+        flight_recorder_directory, sample_ms=flight_recorder_sample_ms) if use_flight_recorder else None
     benchmark_tick_count = 0
     benchmark_loop_count = 0
-    last_game_info = {}
+    last_tick = None
     events = []
     duration_total = 0
+    context = new_tick_context()
 
     while True:
         try:
-            game_time = read_u32(game_time_address) - 1  # game_time is incremented after the tick, so we want time-1
+            if reader:
+                snapshot = reader.read_next(last_seq)
+                last_seq = snapshot.seq
+                game_time = snapshot.tick  # already adjusted by the reader process
+            else:
+                game_time = read_u32(game_time_address) - 1  # game_time is incremented after the tick, so we want time-1
             benchmark_loop_count += 1
             counter += 1
 
             if game_time != last_game_time:
                 benchmark_tick_count += 1
-                real_time = datetime.datetime.now()
+                tick_start_ns = time.perf_counter_ns()
                 counter = 0
                 pymem_counter = 0
+                context.clear()
+
+                if capture:
+                    # leave decoding for later, see decode_capture.py
+                    capture_raw_tick(capture, game_time)
+                    last_game_time = game_time
+                    continue
 
                 # Handle memory and processing
-                populate_memory_cache()
+                snapshot_info = None
+                if reader:
+                    if snapshot.torn:
+                        print(f"  WARNING: game time kept changing while the reader process copied tick {game_time}, "
+                              f"snapshot is torn ({reader.ring.torn} so far)")
+                        if skip_torn_ticks:
+                            last_game_time = game_time
+                            continue
+                        snapshot_info = dict(consistent=False, game_time=game_time, torn_ticks=reader.ring.torn)
+                    load_snapshot_into_cache(snapshot)
+                elif use_consistent_snapshots:
+                    snapshot_info = take_tick_snapshot()
+                    if not snapshot_info['consistent']:
+                        print(f"  WARNING: game time kept changing while copying tick {game_time}, snapshot may be torn")
+                    # the tick may have advanced since we saw it change, decode the one we actually copied
+                    game_time = snapshot_info['game_time']
+                else:
+                    populate_memory_cache()
                 process_write_queue()
-                game_info = get_game_info()
+                game_info = get_game_info(context)
+                if snapshot_info:
+                    game_info['snapshot'] = snapshot_info
                 invalidate_memory_cache()
+                if reader:
+                    reader.update_plan(get_read_plan())
 
                 # Ensure game time consistency
                 if game_info['game_time_info']['game_time'] != game_time:
                     print(f"  WARNING: mismatched game time (expected {game_time}, got {game_info['game_time_info']['game_time']})")
 
                 # Performance warning for slow updates
-                current = datetime.datetime.now()
-                duration = (current - real_time).microseconds
-                if duration > 33000:
-                    print(f'  WARNING: this update took longer than one tick: {duration / 1000:.2f}ms')
+                read_ns = time.perf_counter_ns() - tick_start_ns
+                if latency_probe:
+                    latency_probe.mark(game_time, 'tick_seen', tick_start_ns)
+                    latency_probe.mark(game_time, 'read', tick_start_ns + read_ns)
+                instrumentation.record_stage('read', read_ns)
+                if read_ns > 33_000_000:
+                    print(f'  WARNING: this update took longer than one tick: {read_ns / 1e6:.2f}ms')
 
                 # Missed ticks warning
+                missed_ticks = game_time - last_game_time - 1 if last_game_time else 0
                 if game_time > last_game_time + 1:
                     print(f'  WARNING: missed {game_time - last_game_time - 1} ticks between {last_game_time} and {game_time}')
 
                 # Extract events if the game is ongoing
-                if last_game_info:
-                    if last_game_info['game_engine_running'] and not game_info['game_engine_running']:
-                        events = []
-                    else:
-                        events += extract_events(last_game_info, game_info)
-                game_info['events'] = events
-                last_game_info = game_info
+                with instrumentation.stage('extract_events'):
+                    # the records in it get refilled next tick but one, anything that keeps the tick gets to_dict()
+                    tick = model.Tick.from_game_info(game_info)
+                    if last_tick:
+                        if last_tick.game_engine_running and not tick.game_engine_running:
+                            events = []
+                        else:
+                            events += extract_events(last_tick, tick)
+                    tick.events = list(events)
+                if latency_probe:
+                    latency_probe.mark(game_time, 'extract_events')
+
+                # warm up while a new map loads or sits in the pregame lobby, so tick 0 runs at the usual cost
+                loading_finished = last_tick and last_tick.game_loading_in_progress and not tick.game_loading_in_progress
+                if tick.game_loading_in_progress or not tick.game_engine_running or loading_finished:
+                    if loading_finished or get_map_key() != warmed_map_key:
+                        try:
+                            warm_up_map()
+                        except (ValueError, MemoryReadError) as e:
+                            # tags can still be half loaded, try again next tick
+                            print(f'  WARNING: map warmup failed: {e}')
+                last_tick = tick
 
                 # Collect performance metrics
-                game_info['performance'] = {
-                    'game_info_time': duration / 1000,
-                    'loop_time': (real_time - last_real_time).microseconds / 1000,
+                tick.performance = {
+                    'game_info_time': read_ns / 1e6,
+                    'loop_time': (tick_start_ns - last_tick_start_ns) / 1e6,
                     'post_steps_ms': last_post_steps,
                     'memory_mbytes': psutil.Process(os.getpid()).memory_info().vms / 1024 ** 2,
+                    'channels': channels.get_stats(),
+                    'translations': translations.stats(),
+                    'instrumentation': instrumentation.last_tick,  # the tick before this one
                 }
 
-                last_real_time = real_time
-                post_steps_start = datetime.datetime.now()
-
-                # Use deep copy to avoid modifying game_info in other threads
-                game_info_queue.put(copy.deepcopy(game_info))
-                game_info_queue_for_ui.put(game_info)
-
-                # Send data to clients
-                if clients:
-                    data = json.dumps(game_info, default=str)
-                    for client in clients:
+                last_tick_start_ns = tick_start_ns
+                post_steps_start = time.perf_counter_ns()
+
+                with instrumentation.stage('serialize'):
+                    # one copy for every background thread, game_meta included since it keeps changing
+                    game_info_copy = tick.to_dict()
+                    if latency_probe:
+                        latency_probe.mark(game_time, 'deepcopy')
+                    data = json.dumps(game_info_copy, default=str) if clients else None
+                    # binary position frames for the minimap clients
+                    frame = minimap_stream.pack(game_info_copy) if minimap_clients else None
+                    if latency_probe:
+                        latency_probe.mark(game_time, 'serialize')
+
+                with instrumentation.stage('send'):
+                    game_info_queue_for_ui.put(game_info_copy)
+                    game_info_queue_for_websocket.put(game_info_copy)
+                    # the recorder pops keys off its tick, the others share the rest of it
+                    try:
+                        game_info_queue.put_nowait(dict(game_info_copy))
+                    except queue.Full:
+                        pass
+
+                    # Send data to clients (any that connected since serializing get the next tick)
+                    if data is not None:
+                        for client in clients:
+                            client.sendMessage(data)
+                    if frame is not None:
+                        for client in minimap_clients:
+                            client.sendMessage(frame)
+                    if latency_probe:
+                        latency_probe.mark(game_time, 'send')
+
+                last_post_steps = (time.perf_counter_ns() - post_steps_start) / 1e6
+
+                tick_metrics = instrumentation.end_tick(game_time)
+                if slow_tick_recorder:
+                    slow_tick_recorder.end_tick(tick_metrics, tick_start_ns, time.perf_counter_ns(), missed_ticks, game_info_copy)
+                if metrics_clients:
+                    data = json.dumps(tick_metrics)
+                    for client in metrics_clients:
                         client.sendMessage(data)
-
-                last_post_steps = (datetime.datetime.now() - post_steps_start).microseconds / 1000
+                if metrics_path and time.perf_counter_ns() - last_metrics_write > 1_000_000_000:
+                    instrumentation.write_prometheus(metrics_path)
+                    last_metrics_write = time.perf_counter_ns()
 
             last_game_time = game_time
 
@@ -2551,11 +3403,25 @@ def main_loop():
             # Handle memory reading errors and reset the state
             pprint(e)
             clear_caches()
-            wait_for_xemu()
+            reattach()
+            if reader:
+                reader.stop()
+                reader, last_seq = start_reader_process(), 0
+            # the failed tick already swapped tick_records, the next one refills last_tick's records
+            last_tick = None
 
         except KeyError as e:
             # Handle key errors explicitly
             pprint(e)
+            if capture:
+                capture.close()
+            raise
+
+        except KeyboardInterrupt:
+            if capture:
+                # records are flushed as they're written, this closes the file for decode_capture.py
+                capture.close()
+                print(f'Raw capture closed, {capture.bytes_written} bytes written to {capture.path}')
             raise
 
         except socket.timeout as e:
@@ -2563,25 +3429,47 @@ def main_loop():
             print('DROPPED FRAME DUE TO SOCKET TIMEOUT')
             t._qmp.close()
             t.connect()
+            last_tick = None
         
         except Exception as e:
             # Catch-all for any unexpected exceptions to prevent crashing
             pprint(e)
             clear_caches()
-            wait_for_xemu()
+            reattach()
+            if reader:
+                reader.stop()
+                reader, last_seq = start_reader_process(), 0
+            last_tick = None
 
 
 
 
 if __name__ == '__main__':
-    gc.disable()
+    if collect_garbage:
+        # modules, tag and map caches live for the whole session
+        gc.freeze()
+    else:
+        gc.disable()
+
+    attach()
+    start_websocket_servers()
+
+    database_worker_thread = threading.Thread(target=handle_game_info_loop, daemon=True, name='database_thread')
+    database_worker_thread.start()
 
     # Start the WebSocket server in a separate thread
-    websocket_thread = threading.Thread(target=ui.start_websocket_server, args=(game_info_queue,))
+    websocket_thread = threading.Thread(target=ui.start_websocket_server, args=(game_info_queue_for_websocket,))
     websocket_thread.daemon = True
     websocket_thread.start()
 
-    ui_thread = threading.Thread(target=ui.start_ui, args=(game_info_queue_for_ui,write_queue_from_ui,), daemon=True, name='ui_thread')
-    ui_thread.start()
+    if use_reader_process:
+        # the ui gets its own process too, so rendering can't hold the GIL while we decode
+        game_info_queue_for_ui = channels.ProcessLatestValue('ui')
+        write_queue_from_ui = multiprocessing.Queue(maxsize=64)
+        ui_process = multiprocessing.Process(target=ui.start_ui, args=(game_info_queue_for_ui, write_queue_from_ui,), daemon=True, name='ui_process')
+        ui_process.start()
+    else:
+        ui_thread = threading.Thread(target=ui.start_ui, args=(game_info_queue_for_ui,write_queue_from_ui,), daemon=True, name='ui_thread')
+        ui_thread.start()
 
     main_loop()
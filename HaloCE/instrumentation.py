@@ -0,0 +1,192 @@
+"""
+Per-tick instrumentation of the capture loop, cheap enough to leave on.
+
+Every guest memory read gets counted against the extractor that issued it (players, weapons, objects, input,
+network, anything untagged is 'other'), along with the bytes it covered, whether it was served from the per-tick
+memory_cache (hit) or went to xemu's memory (miss), and how many QMP commands it took. Extractors are tagged with
+@tagged(name). The tag is per thread, so reads on the extraction_workers threads still count against the right one.
+Each thread also counts into its own ExtractorStats, so no += is shared between threads (they'd lose counts without
+the GIL), and end_tick() and prometheus_text() sum them. Extractor times include any tagged extractor they call
+(players includes weapons) and add up across threads.
+
+Stages of a tick (read, extract_events, serialize, send) are timed with stage(name) or record_stage(), all on
+perf_counter_ns.
+
+end_tick() turns the counters into a dict for the tick just finished (the metrics websocket topic), while
+prometheus_text() renders the running totals in the Prometheus text format, see write_prometheus().
+"""
+
+import functools
+import os
+import threading
+import time
+
+EXTRACTORS = ('players', 'weapons', 'objects', 'input', 'network', 'other')
+STAGES = ('read', 'extract_events', 'serialize', 'send')
+
+
+class ExtractorStats:
+
+    __slots__ = ('reads', 'bytes', 'cache_hits', 'cache_misses', 'qmp_calls', 'ns')
+
+    def __init__(self):
+        self.reads = 0
+        self.bytes = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.qmp_calls = 0
+        self.ns = 0
+
+    def values(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+
+# every thread's {extractor: ExtractorStats}, running totals since startup once summed, see totals()
+thread_stats = []
+thread_stats_lock = threading.Lock()
+stage_ns = dict.fromkeys(STAGES, 0)
+ticks = 0
+
+# what end_tick() reports the next tick against
+previous_totals = {name: ExtractorStats().values() for name in EXTRACTORS}
+tick_stage_ns = dict.fromkeys(STAGES, 0)
+last_tick = {}
+
+
+class CurrentExtractor(threading.local):
+
+    def __init__(self):
+        # runs once in every thread that uses it, which then starts out counting against 'other'
+        self.by_name = {name: ExtractorStats() for name in EXTRACTORS}
+        self.stats = self.by_name['other']
+        with thread_stats_lock:
+            thread_stats.append(self.by_name)
+
+
+current = CurrentExtractor()
+
+
+def totals():
+    """{extractor: {field: running total}}, summed across threads"""
+
+    with thread_stats_lock:
+        by_thread = list(thread_stats)
+    summed = {}
+    for name in EXTRACTORS:
+        values = [sum(column) for column in zip(*(stats[name].values() for stats in by_thread))]
+        summed[name] = dict(zip(ExtractorStats.__slots__, values))
+    return summed
+
+
+def tagged(name):
+    """Decorator, counts every read the function makes (and the time it takes) against extractor name"""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            local = current
+            previous = local.stats
+            stats = local.stats = local.by_name[name]
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                stats.ns += time.perf_counter_ns() - start
+                local.stats = previous
+        return wrapper
+    return decorator
+
+
+def record_read(size, cache_hit):
+    stats = current.stats
+    stats.reads += 1
+    stats.bytes += size
+    if cache_hit:
+        stats.cache_hits += 1
+    else:
+        stats.cache_misses += 1
+
+
+def record_qmp():
+    current.stats.qmp_calls += 1
+
+
+def record_stage(name, ns):
+    stage_ns[name] += ns
+    tick_stage_ns[name] += ns
+
+
+class stage:
+    """with stage('send'): ... adds the time spent in the block to that stage"""
+
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        record_stage(self.name, time.perf_counter_ns() - self.start)
+
+
+def end_tick(tick):
+    """Counters and stage times since the last end_tick(), times in milliseconds"""
+
+    global ticks, last_tick
+    ticks += 1
+    extractors = {}
+    for name, stats in totals().items():
+        now = tuple(stats.values())
+        delta = dict(zip(ExtractorStats.__slots__, (a - b for a, b in zip(now, previous_totals[name]))))
+        delta['ms'] = delta.pop('ns') / 1e6
+        extractors[name] = delta
+        previous_totals[name] = now
+    last_tick = {
+        'tick': tick,
+        'stages_ms': {name: ns / 1e6 for name, ns in tick_stage_ns.items()},
+        'extractors': extractors,
+    }
+    for name in tick_stage_ns:
+        tick_stage_ns[name] = 0
+    return last_tick
+
+
+def prometheus_text(prefix='halocaster'):
+    lines = []
+    summed = totals()
+
+    def metric(name, metric_type, description, samples):
+        lines.append(f'# HELP {prefix}_{name} {description}')
+        lines.append(f'# TYPE {prefix}_{name} {metric_type}')
+        lines.extend(f'{prefix}_{name}{{{label}}} {value}' for label, value in samples)
+
+    for field, description in (('reads', 'Guest memory reads'),
+                               ('bytes', 'Bytes read from guest memory'),
+                               ('cache_hits', 'Reads served from the per-tick memory cache'),
+                               ('cache_misses', "Reads that went to xemu's memory"),
+                               ('qmp_calls', 'QMP commands sent')):
+        metric(f'{field}_total', 'counter', f'{description}, by extractor',
+               [(f'extractor="{name}"', stats[field]) for name, stats in summed.items()])
+    metric('extractor_seconds_total', 'counter', 'Time spent in each extractor, summed across threads',
+           [(f'extractor="{name}"', stats['ns'] / 1e9) for name, stats in summed.items()])
+    metric('stage_seconds_total', 'counter', 'Time spent in each stage of a tick',
+           [(f'stage="{name}"', ns / 1e9) for name, ns in stage_ns.items()])
+    if last_tick:
+        metric('last_tick_stage_seconds', 'gauge', 'Time spent in each stage of the last tick',
+               [(f'stage="{name}"', ms / 1e3) for name, ms in last_tick['stages_ms'].items()])
+    lines.append(f'# HELP {prefix}_ticks_total Ticks read')
+    lines.append(f'# TYPE {prefix}_ticks_total counter')
+    lines.append(f'{prefix}_ticks_total {ticks}')
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(path):
+    """Replaces path in one go, so e.g. node_exporter's textfile collector never sees half a file"""
+
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w') as f:
+        f.write(prometheus_text())
+    os.replace(temp_path, path)
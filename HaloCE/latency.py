@@ -0,0 +1,321 @@
+"""
+End to end latency, from a kill landing in guest memory to an overlay's websocket receiving it.
+
+Runs the real capture path in this process: main_loop() attached to a synthetic game (see synthetic.py) that a fake
+backend thread steps at 30 ticks a second, the game info websocket (port 9000) and the ui's websocket (ui.py), with
+count headless clients connected to each. Every kill_interval ticks the backend kills a player, noting the
+perf_counter_ns() of the write, and the clients note when the first message carrying that death's event arrives.
+main_loop() marks each of its stages through halocaster.latency_probe, so every kill breaks down into:
+
+    wait_for_tick       the write until main_loop() notices game_time change (the rest of the tick, then polling)
+    read                get_game_info()
+    extract_events      extract_events()
+    deepcopy            the copy handed to the background threads
+    serialize           json and minimap frames
+    send                queueing the copy, the message to every client on 9000, the ui's latest value
+    websocket_9000      send until a client on 9000 has the whole message
+    websocket_ui        send until a client of ui.py's server has it
+    end_to_end_*        the write until a client has it, what the audience feels
+
+with p50 and p99 over every kill (and every client, for the websocket stages) for each client count. Kills a client
+never received are counted as lost (ui.py's connections all take from one LatestValue, so with more than one client
+each message only reaches one of them). The websocket_ui stages are skipped if ui.py's server doesn't come up.
+Everything runs in one process on one clock; the browser itself isn't included.
+
+usage: python latency.py [--clients 1 10 50] [--players 8] [--kills 30] [--kill-interval 15]
+"""
+
+import argparse
+import base64
+import os
+import selectors
+import socket
+import struct
+import threading
+import time
+
+STAGES = ('wait_for_tick', 'read', 'extract_events', 'deepcopy', 'serialize', 'send', 'websocket_9000',
+          'websocket_ui', 'end_to_end_9000', 'end_to_end_ui')
+
+
+class LatencyProbe:
+    """Where main_loop() marks its stages, {game_time: {stage: perf_counter_ns}}"""
+
+    def __init__(self):
+        self.marks = {}
+
+    def mark(self, game_time, stage, ns=None):
+        self.marks.setdefault(game_time, {})[stage] = time.perf_counter_ns() if ns is None else ns
+
+
+class HeadlessClients:
+    """
+    count websocket clients, read on one selector thread. Each message is timestamped when the read completing it
+    returns, then checked for the markers being watched; only the first message with a marker counts.
+    """
+
+    def __init__(self, port, count, host='localhost'):
+        self.selector = selectors.DefaultSelector()
+        self.sockets = []
+        self.buffers = {}
+        # marker -> {client index: perf_counter_ns}
+        self.received = {}
+        self.messages = 0
+        self.stopped = threading.Event()
+        for index in range(count):
+            connection, leftover = self.connect(host, port)
+            self.sockets.append(connection)
+            self.buffers[connection] = [index, bytearray(), []]
+            self.selector.register(connection, selectors.EVENT_READ)
+            # the server's first frames can come in with the handshake's response
+            if leftover:
+                self.read_frames(connection, leftover, time.perf_counter_ns())
+        self.thread = threading.Thread(target=self.run, daemon=True, name=f'headless_clients_{port}')
+        self.thread.start()
+
+    @staticmethod
+    def connect(host, port):
+        connection = socket.create_connection((host, port))
+        key = base64.b64encode(os.urandom(16)).decode()
+        connection.sendall((f'GET / HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                            f'Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n').encode())
+        response = b''
+        while b'\r\n\r\n' not in response:
+            chunk = connection.recv(4096)
+            if not chunk:
+                raise ConnectionError(f'websocket on port {port} closed during the handshake')
+            response += chunk
+        headers, leftover = response.split(b'\r\n\r\n', 1)
+        if not headers.startswith(b'HTTP/1.1 101'):
+            raise ConnectionError(f'websocket on port {port} refused the upgrade: {headers.splitlines()[0]}')
+        connection.setblocking(False)
+        return connection, leftover
+
+    def watch(self, marker):
+        """Starts looking for marker (a str) in every message, call it before the event can happen"""
+        self.received[marker.encode()] = {}
+
+    def run(self):
+        while not self.stopped.is_set():
+            for key, _ in self.selector.select(0.1):
+                connection = key.fileobj
+                try:
+                    chunk = connection.recv(1 << 20)
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    chunk = b''
+                received_ns = time.perf_counter_ns()
+                if not chunk:
+                    self.selector.unregister(connection)
+                    continue
+                self.read_frames(connection, chunk, received_ns)
+
+    def read_frames(self, connection, chunk, received_ns):
+        index, buffer, fragments = self.buffers[connection]
+        buffer += chunk
+        while len(buffer) >= 2:
+            opcode = buffer[0] & 0x0F
+            final = buffer[0] & 0x80
+            length = buffer[1] & 0x7F
+            offset = 2
+            if length == 126:
+                if len(buffer) < 4:
+                    return
+                length, = struct.unpack_from('!H', buffer, 2)
+                offset = 4
+            elif length == 127:
+                if len(buffer) < 10:
+                    return
+                length, = struct.unpack_from('!Q', buffer, 2)
+                offset = 10
+            if len(buffer) < offset + length:
+                return
+            payload = bytes(buffer[offset:offset + length])
+            del buffer[:offset + length]
+
+            if opcode == 0x9:
+                # ping, clients mask what they send
+                mask = os.urandom(4)
+                connection.sendall(struct.pack('!BB', 0x8A, 0x80 | length) + mask +
+                                   bytes(b ^ mask[i % 4] for i, b in enumerate(payload)))
+            elif opcode == 0x8:
+                self.selector.unregister(connection)
+                return
+            elif opcode in (0x0, 0x1, 0x2):
+                fragments.append(payload)
+                if final:
+                    message = b''.join(fragments)
+                    fragments.clear()
+                    self.messages += 1
+                    for marker, received in list(self.received.items()):
+                        if index not in received and marker in message:
+                            received[index] = received_ns
+
+    def close(self):
+        self.stopped.set()
+        self.thread.join()
+        for connection in self.sockets:
+            connection.close()
+        self.selector.close()
+
+
+class FakeBackend:
+    """Steps a synthetic game on its own thread at tick_rate, killing players when asked to"""
+
+    def __init__(self, game, tick_rate=30):
+        self.game = game
+        self.tick_interval = 1 / tick_rate
+        self.kill_interval = None
+        self.kills_left = 0
+        self.watchers = []
+        # (tick main_loop() sees the kill on, perf_counter_ns of the write, marker)
+        self.kills = []
+        self.done = threading.Event()
+        threading.Thread(target=self.run, daemon=True, name='fake_backend').start()
+
+    def start_kills(self, count, kill_interval, watchers):
+        self.kills = []
+        self.watchers = watchers
+        self.kill_interval = kill_interval
+        self.done.clear()
+        self.kills_left = count
+
+    def run(self):
+        game = self.game
+        next_tick = time.perf_counter()
+        while True:
+            kill = None
+            if self.kills_left and game.tick % self.kill_interval == 0:
+                kill = self.kill()
+            game.simulate_tick(fire_chance=0.1, kill_chance=0)
+            if kill:
+                self.kills.append((game.tick, *kill))
+                self.kills_left -= 1
+                if not self.kills_left:
+                    self.done.set()
+
+            next_tick += self.tick_interval
+            time.sleep(max(next_tick - time.perf_counter(), 0))
+
+    def kill(self):
+        game = self.game
+        alive = [player_index for player_index in game.players if game.alive(player_index)]
+        if len(alive) < 2:
+            return None
+        victim, killer = game.random.sample(alive, 2)
+        deaths, = game.memory_read('<h', game.player_address(victim) + 0xAA)
+        # the event extract_events() makes of it, see get_player_events()
+        marker = f': Player {victim + 1} died ({deaths + 1})'
+        for watcher in self.watchers:
+            watcher.watch(marker)
+        written_ns = time.perf_counter_ns()
+        game.kill(victim, killer)
+        return written_ns, marker.encode()
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+
+def breakdown(kills, probe, game_clients, ui_clients):
+    """Latencies in ms per stage, over every kill main_loop() got to. ui_clients is None when ui.py's server isn't up"""
+
+    stages = {stage: [] for stage in STAGES}
+    lost = {'websocket_9000': 0}
+    if ui_clients is not None:
+        lost['websocket_ui'] = 0
+    processed = sorted(tick for tick, marks in probe.marks.items() if 'send' in marks)
+    for tick, written_ns, marker in kills:
+        # main_loop() can skip ticks, the kill shows up on the first one it reads from then on
+        seen = next((t for t in processed if t >= tick), None)
+        if seen is None:
+            continue
+        marks = probe.marks[seen]
+        previous = written_ns
+        for stage, name in (('wait_for_tick', 'tick_seen'), ('read', 'read'), ('extract_events', 'extract_events'),
+                            ('deepcopy', 'deepcopy'), ('serialize', 'serialize'), ('send', 'send')):
+            stages[stage].append((marks[name] - previous) / 1e6)
+            previous = marks[name]
+        for suffix, clients in (('9000', game_clients), ('ui', ui_clients)):
+            if clients is None:
+                continue
+            received = clients.received.get(marker, {})
+            lost[f'websocket_{suffix}'] += len(clients.sockets) - len(received)
+            for received_ns in received.values():
+                stages[f'websocket_{suffix}'].append((received_ns - marks['send']) / 1e6)
+                stages[f'end_to_end_{suffix}'].append((received_ns - written_ns) / 1e6)
+    return stages, lost
+
+
+def drain(channel):
+    while True:
+        channel.get()
+
+
+def run(client_counts=(1, 10, 50), player_count=8, kills=30, kill_interval=15):
+    import halocaster
+    import snapshot
+    import synthetic
+    import ui
+
+    game = synthetic.SyntheticGame(player_count)
+    halocaster.attach(game.process, snapshot.IdentityTranslator())
+    halocaster.metrics_path = None
+    halocaster.use_flight_recorder = False
+    probe = halocaster.latency_probe = LatencyProbe()
+
+    halocaster.start_websocket_servers()
+    threading.Thread(target=ui.start_websocket_server, args=(halocaster.game_info_queue_for_websocket,),
+                     daemon=True, name='ui_websocket_thread').start()
+    # stands in for handle_game_info_loop(), recording isn't on the way to the overlay but a full queue drops ticks
+    threading.Thread(target=drain, args=(halocaster.game_info_queue,), daemon=True, name='recorder_drain').start()
+    backend = FakeBackend(game)
+    threading.Thread(target=halocaster.main_loop, daemon=True, name='main_loop').start()
+    time.sleep(1)
+
+    results = {}
+    for count in client_counts:
+        print(f'Measuring {kills} kills with {count} clients on each websocket')
+        game_clients = HeadlessClients(9000, count)
+        try:
+            ui_clients = HeadlessClients(ui.WEBSOCKET_PORT, count)
+        except OSError as e:
+            # e.g. a websockets version ui.start_websocket_server() can't run on, the rest is still worth measuring
+            print(f"   ui.py's websocket isn't up ({e!r}), skipping the websocket_ui stages")
+            ui_clients = None
+        while len(halocaster.clients) < count:
+            time.sleep(0.01)
+
+        backend.start_kills(kills, kill_interval, [clients for clients in (game_clients, ui_clients) if clients])
+        backend.done.wait()
+        # let the last kill make it through
+        time.sleep(1)
+        stages, lost = breakdown(backend.kills, probe, game_clients, ui_clients)
+        game_clients.close()
+        if ui_clients:
+            ui_clients.close()
+        while len(halocaster.clients) > 0:
+            time.sleep(0.01)
+
+        results[count] = {stage: {'p50': percentile(times, 50), 'p99': percentile(times, 99), 'samples': len(times)}
+                          for stage, times in stages.items() if times}
+        print(f"   {'stage':<18}{'p50 ms':>10}{'p99 ms':>10}{'samples':>9}")
+        for stage, result in results[count].items():
+            print(f"   {stage:<18}{result['p50']:>10.2f}{result['p99']:>10.2f}{result['samples']:>9}")
+        for stage, count_lost in lost.items():
+            if count_lost:
+                print(f'   {stage}: {count_lost} kills never received')
+        results[count]['lost'] = lost
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='End to end latency from a memory write to websocket clients')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--players', type=int, default=8)
+    parser.add_argument('--kills', type=int, default=30, help='kills measured per client count')
+    parser.add_argument('--kill-interval', type=int, default=15, help='ticks between kills')
+    args = parser.parse_args()
+    run(args.clients, args.players, args.kills, args.kill_interval)
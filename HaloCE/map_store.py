@@ -0,0 +1,86 @@
+"""
+On-disk store of per-map static data, keyed by map fingerprint (calculate_map_hash() in halocaster.py).
+
+Spawns, items (with their respawn intervals) and tag names never change for a given version of a map, so they only
+have to be read out of guest memory the first time that version is seen. Replays get indexed by the same
+fingerprint, so every recording of one map version can be found without opening any of them.
+
+SQLite, since it's in the standard library and safe to share between the main loop and the recorder thread.
+"""
+
+import datetime
+import json
+import sqlite3
+import threading
+
+schema = """
+CREATE TABLE IF NOT EXISTS maps (
+    map_hash TEXT PRIMARY KEY,
+    map_name TEXT,
+    first_seen TEXT,
+    last_seen TEXT,
+    data TEXT
+);
+CREATE TABLE IF NOT EXISTS replays (
+    game_id TEXT,
+    map_hash TEXT,
+    match_hash TEXT,
+    path TEXT,
+    recorded TEXT,
+    PRIMARY KEY (game_id, path)
+);
+CREATE INDEX IF NOT EXISTS replays_by_map ON replays (map_hash);
+"""
+
+
+class MapStore:
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(schema)
+
+    def get(self, map_hash):
+        """Returns the data stored for map_hash (spawns, items, tag_names), or None if this map version is new"""
+
+        with self.lock, self.connection:
+            row = self.connection.execute('SELECT data FROM maps WHERE map_hash = ?', (map_hash,)).fetchone()
+            if row is None:
+                return None
+            self.connection.execute('UPDATE maps SET last_seen = ? WHERE map_hash = ?',
+                                    (datetime.datetime.now().isoformat(), map_hash))
+        data = json.loads(row[0])
+        # json object keys are always strings
+        data['tag_names'] = {int(tag_index): tag_name for tag_index, tag_name in data.get('tag_names', {}).items()}
+        return data
+
+    def put(self, map_hash, map_name, data):
+        now = datetime.datetime.now().isoformat()
+        with self.lock, self.connection:
+            self.connection.execute(
+                'INSERT INTO maps (map_hash, map_name, first_seen, last_seen, data) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (map_hash) DO UPDATE SET last_seen = excluded.last_seen, data = excluded.data',
+                (map_hash, map_name, now, now, json.dumps(data, default=str)))
+
+    def record_replay(self, game_id, map_hash, match_hash, path):
+        with self.lock, self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO replays VALUES (?, ?, ?, ?, ?)',
+                                    (game_id, map_hash, match_hash, path, datetime.datetime.now().isoformat()))
+
+    def replays_for_map(self, map_hash):
+        """(game_id, path) of every replay recorded on this map version, oldest first"""
+
+        with self.lock:
+            return self.connection.execute('SELECT game_id, path FROM replays WHERE map_hash = ? ORDER BY recorded',
+                                           (map_hash,)).fetchall()
+
+    def maps(self):
+        """(map_hash, map_name, first_seen, last_seen) of every map version seen so far"""
+
+        with self.lock:
+            return self.connection.execute('SELECT map_hash, map_name, first_seen, last_seen FROM maps '
+                                           'ORDER BY map_name, first_seen').fetchall()
+
+    def close(self):
+        self.connection.close()
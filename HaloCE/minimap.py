@@ -0,0 +1,157 @@
+"""
+Compact binary player position frames for the live minimap overlay.
+
+The full game_info dict is hundreds of kilobytes of JSON per tick, which is far too much for an overlay that only
+needs to draw a dot per player. This packs the few fields the minimap needs into a little-endian frame that is a few
+hundred bytes for a 16 player lobby, so browser overlays can keep up with every tick.
+
+Frame layout (all little-endian):
+
+    header      <BIBB    version, tick, player count, trail length
+    per player  <BBffffBh    player index, team, x, y, z, yaw (radians), alive, held weapon tag id (-1 for none)
+                <ff * trail length    recent x, y positions for that player, oldest first (only if trail length > 0)
+"""
+
+import math
+import struct
+
+import numpy as np
+
+FRAME_VERSION = 1
+
+frame_header = struct.Struct('<BIBB')
+player_record = struct.Struct('<BBffffBh')
+
+
+def held_weapon_tag_id(player_object_data):
+    """Returns the tag id of the weapon the player is holding, or -1 if they aren't holding anything"""
+
+    weapons = player_object_data.get('weapons', [])
+    selected_weapon_index = player_object_data.get('selected_weapon_index', -1)
+    if 0 <= selected_weapon_index < len(weapons):
+        return weapons[selected_weapon_index].get('tag_id', -1)
+    return -1
+
+
+class PositionTrail:
+    """
+    Ring buffer of the last `length` x, y positions of each player.
+
+    Every player shares the same write head so the whole trail can be reordered oldest-first with one numpy call.
+    A player who (re)spawns gets their whole trail filled with their spawn position, otherwise the overlay would draw a
+    line from where they died to where they spawned.
+    """
+
+    def __init__(self, length=8, max_players=16):
+        self.length = length
+        self.positions = np.zeros((max_players, length, 2), dtype='<f4')
+        self.alive = np.zeros(max_players, dtype=bool)
+        self.head = 0
+
+    def clear(self):
+        self.positions.fill(0)
+        self.alive.fill(False)
+        self.head = 0
+
+    def push(self, player_index, x, y):
+        if not self.alive[player_index]:
+            self.positions[player_index, :] = (x, y)
+            self.alive[player_index] = True
+        else:
+            self.positions[player_index, self.head] = (x, y)
+
+    def kill(self, player_index):
+        self.alive[player_index] = False
+
+    def advance(self):
+        self.head = (self.head + 1) % self.length
+
+    def ordered(self):
+        """
+        Returns a (max_players, length, 2) copy with each player's trail ordered oldest to newest.
+        Call this after pushing the current tick and before advance(), so the newest position is the one at the head.
+        """
+        return np.roll(self.positions, -(self.head + 1), axis=1)
+
+
+class MinimapStream:
+    """
+    Builds one binary minimap frame per tick from game_info.
+
+    Keep one instance for the lifetime of the websocket channel since it owns the trail history.
+    """
+
+    def __init__(self, trail_length=0, max_players=16):
+        self.trail_length = trail_length
+        self.max_players = max_players
+        self.trail = PositionTrail(trail_length, max_players) if trail_length else None
+        self.last_tick = None
+
+    def pack(self, game_info):
+        tick = game_info['game_time_info']['game_time']
+        players = game_info['players'][:self.max_players]
+
+        # game restarted or we skipped backwards, old trails are meaningless now
+        if self.trail is not None and self.last_tick is not None and tick < self.last_tick:
+            self.trail.clear()
+        self.last_tick = tick
+
+        frame = bytearray(frame_header.size + len(players) * (player_record.size + 8 * self.trail_length))
+        frame_header.pack_into(frame, 0, FRAME_VERSION, tick & 0xFFFFFFFF, len(players), self.trail_length)
+        offset = frame_header.size
+
+        records = []
+        for player in players:
+            player_index = player['player_index']
+            dynamic = player['player_object_data']
+            if dynamic:
+                x, y, z = dynamic['x'], dynamic['y'], dynamic['z']
+                yaw = math.atan2(dynamic['looking_vector_y'], dynamic['looking_vector_x'])
+                weapon_tag_id = held_weapon_tag_id(dynamic)
+                if self.trail is not None:
+                    self.trail.push(player_index, x, y)
+            else:
+                x = y = z = yaw = 0.0
+                weapon_tag_id = -1
+                if self.trail is not None:
+                    self.trail.kill(player_index)
+            records.append((player_index, player['team'] & 0xFF, x, y, z, yaw, bool(dynamic), weapon_tag_id))
+
+        if self.trail is not None:
+            trails = self.trail.ordered()
+            self.trail.advance()
+
+        for record in records:
+            player_record.pack_into(frame, offset, *record)
+            offset += player_record.size
+            if self.trail is not None:
+                trail_bytes = trails[record[0]].tobytes()
+                frame[offset:offset + len(trail_bytes)] = trail_bytes
+                offset += len(trail_bytes)
+
+        return bytes(frame)
+
+
+def unpack(frame):
+    """Decodes a frame back into a dict, mostly useful for debugging and for checking what overlays will receive"""
+
+    version, tick, player_count, trail_length = frame_header.unpack_from(frame, 0)
+    offset = frame_header.size
+    players = []
+    for _ in range(player_count):
+        player_index, team, x, y, z, yaw, alive, weapon_tag_id = player_record.unpack_from(frame, offset)
+        offset += player_record.size
+        trail = np.frombuffer(frame, dtype='<f4', count=2 * trail_length, offset=offset).reshape(trail_length, 2)
+        offset += 8 * trail_length
+        players.append(dict(
+            player_index=player_index,
+            team=team,
+            x=x,
+            y=y,
+            z=z,
+            yaw=yaw,
+            alive=bool(alive),
+            weapon_tag_id=weapon_tag_id,
+            trail=trail.tolist(),
+        ))
+    return dict(version=version, tick=tick, players=players)
@@ -0,0 +1,401 @@
+"""
+Typed records for one tick, what get_game_info() returns its players and objects as.
+
+get_game_info() fills these directly for players, bipeds, weapons, damage table rows and objects, reusing last tick
+but one's records like it reuses its dicts (see records.py): a player's biped state as a 103 key dict was around 5KB,
+a BipedState is under 1KB, attribute access skips hashing the key, and a key the model doesn't know (e.g. one renamed
+in get_player_stats()) raises a TypeError on the first tick instead of leaving a consumer reading a stale key.
+
+main_loop() wraps each get_game_info() in a Tick with Tick.from_game_info(), which copies nothing, so a Tick is only
+good until its records get refilled two ticks later. extract_events() works on the last two. Anything that keeps a tick
+(the recorder, the ui, websockets, json files) gets to_dict(), plain dicts and lists all the way down, key for key what
+get_game_info() used to build, or to_orjson(). from_dict() goes the other way, new records from plain dicts (e.g. a
+to_dict() copy or a recorded game). to_builtin() is the default= for json.dumps() of anything holding records.
+"""
+
+import datetime
+from dataclasses import dataclass
+
+import orjson
+
+
+class Record:
+    """Base of the records below, to_dict() and fields() go by __slots__, which are the fields in order"""
+
+    __slots__ = ()
+    # fields get_game_info() only sometimes sets (or the recorder pops), left out of fields() while None
+    optional = ()
+
+    def fields(self):
+        """The fields as a dict, records inside left as they are"""
+
+        fields = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if value is not None or name not in self.optional:
+                fields[name] = value
+        return fields
+
+    def to_dict(self):
+        """A copy that shares nothing with the (pooled) record, see plain()"""
+        return {name: plain(value) for name, value in self.fields().items()}
+
+    def to_orjson(self, option=0):
+        # datetimes go through to_builtin() too, so they come out like json.dumps(default=str) has them
+        return orjson.dumps(self, default=to_builtin, option=orjson.OPT_PASSTHROUGH_DATACLASS |
+                            orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | option)
+
+
+def plain(value):
+    """Records as dicts, and dicts and lists copied, since most of them get refilled next tick but one"""
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [plain(item) for item in value]
+    if isinstance(value, dict):
+        return {key: plain(item) for key, item in value.items()}
+    return value
+
+
+def to_builtin(value):
+    """default= for json.dumps() and orjson.dumps(), records as dicts (one level at a time), anything else as str"""
+    if isinstance(value, Record):
+        return value.fields()
+    return str(value)
+
+
+@dataclass(slots=True)
+class DamageEntry(Record):
+    """A row of a player's damage table, see get_player_stats()"""
+
+    damage_time: int
+    damage_amount: float
+    dynamic_player: int
+    static_player: int
+    dynamic_player_hex: str
+    static_player_hex: str
+
+
+@dataclass(slots=True)
+class Weapon(Record):
+    """A weapon a biped holds, see get_weapon() in get_player_stats() for what the fields are"""
+
+    tag_id: int
+    heat_meter: float
+    used_energy: float
+    charge_amount: float
+    reloading: int
+    can_fire: int
+    reload_time: int
+    backpack_ammo_count: int
+    magazine_ammo_count: int
+    weapon_tag_address: str
+    energy_used: float
+    weapon_type: int
+    is_energy_weapon: bool
+    zoom_levels: int
+    zoom_min: float
+    zoom_max: float
+    autoaim_angle: float
+    autoaim_range: float
+    magnetism_angle: float
+    magnetism_range: float
+    deviation_angle: float
+    tag_name: str
+    object_id: int
+
+
+@dataclass(slots=True)
+class BipedState(Record):
+    """A living player's biped object, player_object_data in get_player_stats()"""
+
+    flags: int
+    x: float
+    y: float
+    z: float
+    x_vel: float
+    y_vel: float
+    z_vel: float
+    legs_pitch: float
+    legs_yaw: float
+    legs_roll: float
+    pitch1: float
+    yaw1: float
+    roll1: float
+    ang_vel_x: float
+    ang_vel_y: float
+    ang_vel_z: float
+    aim_assist_sphere_x: float
+    aim_assist_sphere_y: float
+    aim_assist_sphere_z: float
+    aim_assist_sphere_radius: float
+    scale: float
+    type: int
+    render_flags: int
+    weapon_owner_team: int
+    powerup_unk2: int
+    idle_ticks: int
+    max_health: float
+    max_shields: float
+    health: float
+    shields: float
+    unk_dmg_countdown_0x98: float
+    unk_dmg_countdown_0x9C: float
+    unk_dmg_countdown_0xA4: float
+    unk_dmg_countdown_0xA8: float
+    unk3: int
+    unk4: int
+    shields_charge_delay: int
+    shields_status: int
+    shields_status_hex: str
+    next_object: int
+    next_object_2: str
+    parent_object: str
+    camo: int
+    flashlight: int
+    current_action: int
+    stunned: float
+    xunk0: float
+    yunk0: float
+    zunk0: float
+    xaima: float
+    yaima: float
+    zaima: float
+    aiming_vector_x: float
+    aiming_vector_y: float
+    aiming_vector_z: float
+    xaim0: float
+    yaim0: float
+    zaim0: float
+    xaim1: float
+    yaim1: float
+    zaim1: float
+    looking_vector_x: float
+    looking_vector_y: float
+    looking_vector_z: float
+    move_forward: float
+    move_left: float
+    move_up: float
+    melee_damage_type: int
+    animation_1: int
+    animation_2: int
+    animation_debug: dict
+    selected_weapon_index: int
+    weapons: list[Weapon]
+    current_equipment: str
+    primary_nades: int
+    secondary_nades: int
+    zoom_level: int
+    camo_amount: float
+    camo_self_revealed: int
+    damagers_list_address: str
+    crouchscale: float
+    facing1: float
+    facing2: float
+    facing3: float
+    camera_x: float
+    camera_y: float
+    camera_z: float
+    air_1_0x64: int
+    airborne: int
+    landing_stun_current_duration: int
+    landing_stun_target_duration: int
+    airborne_ticks: int
+    slipping_ticks: int
+    stop_ticks: int
+    jump_recovery_timer: int
+    melee_animation_remaining: int
+    melee_animation_damage_tick: int
+    melee_impact_this_tick: bool
+    landing: int
+    air_3_0x460: int
+    air_4_0xB6: int
+    biped_flags: int
+    autoaim_pill_radius: float
+
+    @classmethod
+    def from_dict(cls, biped):
+        return cls(**dict(biped, weapons=[Weapon(**weapon) for weapon in biped['weapons']]))
+
+
+@dataclass(slots=True)
+class InputState(Record):
+    """A player's controls, see get_input_data()"""
+
+    local_player_index: int
+    look_yaw_rate: float
+    look_pitch_rate: float
+    input_abstraction_globals: str
+    player_control_pointer: str
+    player_control: str
+    player_control_state: dict
+    input_abstraction_input_state: dict
+    input_gamepad_state: dict
+    update_queue_values: dict
+    player_ui_globals: dict | None
+
+
+@dataclass(slots=True)
+class Player(Record):
+    """One player, see get_player_stats(). player_object_data is None while dead ({} in the dict)"""
+
+    player_index: int
+    local_player: int
+    name: str
+    team: int
+    action_target: str
+    action: int
+    action_seat: int
+    respawn_timer: int
+    respawn_penalty: int
+    object_ref: str
+    object_index: int
+    object_id: int
+    previous_object_ref: str
+    last_target_object_ref: str
+    time_of_last_shot: int
+    player_speed: float
+    camo_timer: int
+    time_of_last_death: int
+    target_player_index: int
+    kill_streak: int
+    multikill: int
+    time_of_last_kill: int
+    kills: int
+    assists: int
+    team_kills: int
+    deaths: int
+    suicides: int
+    shots_fired: int
+    shots_hit: int
+    score: int
+    ctf_score: int
+    player_quit: int
+    damage_table: list[DamageEntry]
+    observer_camera_info: dict
+    input_data: InputState
+    player_object_debug: dict
+    player_object_data: BipedState | None
+    model_nodes: list[tuple[float, float, float]]
+    derived_stats: dict
+    first_person_weapon: dict | None = None
+
+    optional = ('first_person_weapon',)
+
+    @classmethod
+    def from_dict(cls, player):
+        return cls(**dict(
+            player,
+            damage_table=[DamageEntry(**entry) for entry in player['damage_table']],
+            input_data=InputState(**player['input_data']),
+            player_object_data=BipedState.from_dict(player['player_object_data']) if player['player_object_data'] else None,
+        ))
+
+    def fields(self):
+        fields = Record.fields(self)
+        if self.player_object_data is None:
+            fields['player_object_data'] = {}
+        return fields
+
+
+@dataclass(slots=True)
+class GameObject(Record):
+    """An entry of the object table, see get_object_slice(). type_specific_data is only there for projectiles"""
+
+    object_id: int
+    address: str
+    header_data: list[str]
+    flags: str
+    x: float
+    y: float
+    z: float
+    vel_x: float
+    vel_y: float
+    vel_z: float
+    ang_vel_x: float
+    ang_vel_y: float
+    ang_vel_z: float
+    time_existing: int
+    unk_damage_1: int
+    owner_unit_ref: str
+    owner_object_ref: str
+    parent_ref: str
+    ultimate_parent: str
+    state_flags: int
+    drop_time: int
+    object_type: int
+    object_type_string: str
+    tag_name: str
+    type_specific_data: dict | None = None
+
+    optional = ('type_specific_data',)
+
+
+@dataclass(slots=True)
+class Tick(Record):
+    """
+    Everything get_game_info() read on one tick, plus what main_loop() and extract_events() add to it.
+    Fields that aren't records yet (game_time_info, items, spawns, ...) are the dicts get_game_info() built.
+    """
+
+    process_id: str
+    game_type: int | str
+    variant: int
+    global_stage: str
+    multiplayer_map_name: str
+    map_hash: str | None
+    game_connection: int
+    game_engine_has_teams: int
+    game_engine_running: bool
+    game_engine_can_score: bool
+    flag_data: dict
+    local_player_count: int
+    key_data: dict
+    game_time_info: dict
+    observer_cameras_address: str
+    game_globals_address: str
+    game_globals_map_loaded: int
+    players_are_double_speed: int
+    game_loading_in_progress: int
+    precache_map_status: float
+    game_difficulty_level: int
+    game_globals_active: int
+    global_random_seed: str
+    stored_global_random: str
+    main_menu_is_active: int
+    last_game_in_progress: tuple[int, int, int]
+    last_game_connection: int
+    events: list[str] | None
+    damage_counts: dict[int, dict[int, float]]
+    players: list[Player]
+    objects: list[GameObject]
+    game_ended_this_tick: bool
+    current_time: datetime.datetime
+    start_time: datetime.datetime
+    objects_meta: dict
+    game_id: str
+    network_game_server: dict | None
+    network_game_client: dict | None
+    memory_info: dict | None
+    items: list[dict] | None
+    spawns: list[dict] | None
+    scheduler: dict
+    game_meta: dict | None = None
+    snapshot: dict | None = None
+    performance: dict | None = None
+    spawn_predictions: dict | None = None
+
+    optional = ('events', 'items', 'spawns', 'game_meta', 'snapshot', 'performance', 'spawn_predictions')
+
+    @classmethod
+    def from_game_info(cls, game_info):
+        """The Tick around what get_game_info() returned, sharing its records, see the module docstring"""
+        return cls(**game_info)
+
+    @classmethod
+    def from_dict(cls, game_info):
+        return cls(**dict(
+            game_info,
+            players=[Player.from_dict(player) for player in game_info['players']],
+            objects=[GameObject(**obj) for obj in game_info['objects']],
+        ))
@@ -0,0 +1,119 @@
+"""
+The object header table as a NumPy array, read once per tick.
+
+Every object handle used to be resolved with its own read_u32(first_element + 12 * (handle & 0xFFFF) + 8), once for
+each player's biped, again for their previous biped and their damage table, once per weapon and once per slot in
+get_objects(). ObjectTable.refresh() copies the used part of the table in one read instead, after which resolving
+a handle, checking whether it's still alive or listing the objects an owner holds is indexing into that copy.
+
+A header is 12 bytes:
+
+    +0  salt            the high 16 bits of a handle to this slot, 0 while the slot is free
+    +2  flags
+    +3  object_type
+    +4  cluster_index
+    +6  data_size
+    +8  address         of the object datum, 0 while the slot is free
+
+A handle only resolves if its index is in the table, its salt matches the slot's and the slot has an address, so a
+handle to an object that got deleted (and maybe replaced by another one in the same slot) resolves to 0 instead of
+to whatever lives there now.
+
+The object table doesn't record owners, those are in each object datum (+0x70). get_object_slice() reads them
+anyway and stores them with set_owner(), so owned_by() answers for this tick once the objects have been read.
+"""
+
+import numpy as np
+
+NONE = 0xFFFFFFFF
+
+
+def header_dtype(element_size):
+    return np.dtype({
+        'names': ['salt', 'flags', 'object_type', 'cluster_index', 'data_size', 'address'],
+        'formats': ['<u2', 'u1', 'u1', '<i2', '<i2', '<u4'],
+        'offsets': [0, 2, 3, 4, 6, 8],
+        'itemsize': element_size,
+    })
+
+
+class ObjectTable:
+
+    def __init__(self):
+        self.first_element_address = 0
+        self.element_size = 12
+        self.count = 0
+        # refilled in place every tick, so the arrays below stay valid as long as the table doesn't grow
+        self.buffer = bytearray()
+        self.headers = np.zeros(0, dtype=header_dtype(12))
+        self.salts = self.headers['salt']
+        self.addresses = self.headers['address']
+        self.owners = np.full(0, NONE, dtype='<u4')
+
+    def refresh(self, read_bytes, first_element_address, count, element_size=12):
+        """Copies the first count headers, read_bytes(address, length) being e.g. halocaster.read_bytes"""
+
+        size = count * element_size
+        if size > len(self.buffer) or element_size != self.element_size:
+            # grow to the next 256 slots, the table's high water mark creeps up during a game
+            capacity = -(-max(count, 1) // 256) * 256
+            self.buffer = bytearray(capacity * element_size)
+            self.headers = np.frombuffer(self.buffer, dtype=header_dtype(element_size))
+            self.salts = self.headers['salt']
+            self.addresses = self.headers['address']
+            self.owners = np.full(capacity, NONE, dtype='<u4')
+        self.first_element_address = first_element_address
+        self.element_size = element_size
+        self.count = count
+        if size:
+            self.buffer[:size] = read_bytes(first_element_address, size)
+        self.owners.fill(NONE)
+
+    def header_bytes(self, index):
+        """The raw 12 (element_size) bytes of the header in slot index"""
+        return bytes(self.buffer[index * self.element_size:(index + 1) * self.element_size])
+
+    def address_at(self, index):
+        """Address of the object in slot index whatever its salt, 0 if the slot is free or past the end"""
+        return int(self.addresses[index]) if 0 <= index < self.count else 0
+
+    def address(self, handle):
+        """Address of the object handle refers to, 0 if it's NONE, past the end or the object is gone"""
+
+        handle &= 0xFFFFFFFF  # read_s32() handles come in negative
+        index = handle & 0xFFFF
+        if handle == NONE or index >= self.count or self.salts[index] != handle >> 16:
+            return 0
+        return int(self.addresses[index])
+
+    def resolve(self, handles):
+        """address() for an array of handles at once"""
+
+        handles = np.asarray(handles, dtype=np.int64) & 0xFFFFFFFF
+        indices = handles & 0xFFFF
+        in_table = indices < self.count
+        indices = np.where(in_table, indices, 0)
+        valid = in_table & (handles != NONE) & (self.salts[indices] == handles >> 16)
+        return np.where(valid, self.addresses[indices], 0).astype(np.uint32)
+
+    def is_alive(self, handle):
+        return self.address(handle) != 0
+
+    def alive(self, handles):
+        """is_alive() for an array of handles at once"""
+        return self.resolve(handles) != 0
+
+    def live_indices(self):
+        """Slot of every object in the table"""
+        return np.flatnonzero(self.addresses[:self.count])
+
+    def set_owner(self, index, owner_handle):
+        self.owners[index] = owner_handle & 0xFFFFFFFF
+
+    def owned_by(self, owner_handle):
+        """Slots of the objects owner_handle owns, from the owners set_owner() recorded this tick"""
+
+        owner_handle &= 0xFFFFFFFF
+        if owner_handle == NONE:
+            return np.zeros(0, dtype=np.intp)
+        return np.flatnonzero(self.owners[:self.count] == owner_handle)
@@ -0,0 +1,189 @@
+"""
+Follows every projectile from the tick it shows up in the object table to the tick it's gone, and credits the damage
+that follows to the shot that most likely caused it.
+
+Everything a player fires in Halo CE is a projectile, bullets included, so a shot is one projectile (a shotgun blast
+is several). update() only looks at this tick's projectiles (objects_meta's object_indexes_by_type) and at the shots
+still in flight, never at the whole object table, so the cost follows the number of projectiles rather than the number
+of objects. A slot that gets reused by a new projectile between two ticks shows up as a different tag or a younger
+time_existing, which ends the old shot and starts a new one.
+
+Damage (see the damage_counts deltas in extract_events()) is credited with record_damage() to the dealer's shot that
+ended, or is still flying, closest to the victim, out of the ones that ended in the last ATTRIBUTION_TICKS ticks
+(damage tables can be a tick behind the detonation). A shot is a hit the first time it damages another player.
+
+Per player, in game_meta (see get_empty_player_meta()):
+
+    active_projectiles      object ids of the shots still in flight
+    accuracy_by_weapon      {weapon tag: {'shots', 'hits', 'damage'}}, keyed by the weapon held when firing
+    grenades                {grenade tag: {'thrown', 'hit', 'kill', 'self', 'miss'}}, one outcome per grenade once
+                            it's past the attribution window (or the game ends, see settle_all()): kill beats hit
+                            beats self (only hurt the thrower)
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+
+ATTRIBUTION_TICKS = 2
+
+
+@dataclass(slots=True)
+class Shot:
+    object_id: int
+    tag_name: str
+    weapon: str
+    player_index: int | None
+    fired_at: int
+    x: float
+    y: float
+    z: float
+    time_existing: int
+    distance_traveled: float = 0.0
+    seen_at: int = 0
+    ended_at: int | None = None
+    damage: float = 0.0
+    # player index -> damage, and the ones who died to it
+    victims: dict = field(default_factory=dict)
+    kills: set = field(default_factory=set)
+
+    @property
+    def is_grenade(self):
+        return 'grenade' in self.tag_name
+
+
+def weapon_held(player):
+    """Tag name of the weapon a model.Player is holding, None if they hold nothing (or are dead)"""
+
+    biped = player.player_object_data
+    if biped and 0 <= biped.selected_weapon_index < len(biped.weapons):
+        return biped.weapons[biped.selected_weapon_index].tag_name
+    return None
+
+
+class ProjectileTracker:
+
+    def __init__(self):
+        # object id -> Shot
+        self.in_flight = {}
+        # shots that ended in the last ATTRIBUTION_TICKS ticks, as (tick, [shots]) oldest first
+        self.ended = deque()
+
+    def clear(self):
+        self.in_flight.clear()
+        self.ended.clear()
+
+    def settle_all(self, player_meta):
+        """Ends and settles every shot, for when the game ends with grenades still in flight or in the window"""
+
+        ended_now = []
+        for shot in list(self.in_flight.values()):
+            self.end(shot, shot.seen_at, ended_now, player_meta)
+        for _, shots in self.ended:
+            for shot in shots:
+                self.settle(shot, player_meta)
+        for shot in ended_now:
+            self.settle(shot, player_meta)
+        self.clear()
+
+    def update(self, tick, player_meta):
+        """Starts, moves and ends shots for one model.Tick, player_meta being game_meta['players']"""
+
+        game_time = tick.game_time_info['game_time']
+        ended_now = []
+        self.ended.append((game_time, ended_now))
+        while self.ended and self.ended[0][0] < game_time - ATTRIBUTION_TICKS:
+            for shot in self.ended.popleft()[1]:
+                self.settle(shot, player_meta)
+
+        # owner_unit_ref and object_ref are the same hex() of the biped's handle
+        owners = None
+        for index in tick.objects_meta['object_indexes_by_type'].get('projectile', ()):
+            obj = tick.objects[index]
+            shot = self.in_flight.get(obj.object_id)
+            if shot is not None and (shot.tag_name != obj.tag_name or obj.time_existing < shot.time_existing):
+                self.end(shot, game_time, ended_now, player_meta)
+                shot = None
+            if shot is None:
+                if owners is None:
+                    owners = {player.object_ref: player for player in tick.players if player.player_object_data}
+                shot = self.fire(obj, owners.get(obj.owner_unit_ref), game_time, player_meta)
+            shot.x, shot.y, shot.z = obj.x, obj.y, obj.z
+            shot.time_existing = obj.time_existing
+            if obj.type_specific_data:
+                shot.distance_traveled = obj.type_specific_data['distance_traveled']
+            shot.seen_at = game_time
+
+        # anything not seen this tick detonated or got deleted
+        if len(self.in_flight) > len(tick.objects_meta['object_indexes_by_type'].get('projectile', ())):
+            for shot in [shot for shot in self.in_flight.values() if shot.seen_at != game_time]:
+                self.end(shot, game_time, ended_now, player_meta)
+
+    def fire(self, obj, player, game_time, player_meta):
+        shot = self.in_flight[obj.object_id] = Shot(
+            object_id=obj.object_id, tag_name=obj.tag_name, weapon=obj.tag_name, player_index=None, fired_at=game_time,
+            x=obj.x, y=obj.y, z=obj.z, time_existing=obj.time_existing)
+        if player is None or player.player_index not in player_meta:
+            return shot
+
+        shot.player_index = player.player_index
+        meta = player_meta[player.player_index]
+        meta['active_projectiles'].append(obj.object_id)
+        if shot.is_grenade:
+            meta['grenades'].setdefault(shot.tag_name, dict(thrown=0, hit=0, kill=0, self=0, miss=0))['thrown'] += 1
+        else:
+            shot.weapon = weapon_held(player) or obj.tag_name
+            meta['accuracy_by_weapon'].setdefault(shot.weapon, dict(shots=0, hits=0, damage=0.0))['shots'] += 1
+        return shot
+
+    def end(self, shot, game_time, ended_now, player_meta):
+        del self.in_flight[shot.object_id]
+        shot.ended_at = game_time
+        ended_now.append(shot)
+        if shot.player_index in player_meta:
+            active = player_meta[shot.player_index]['active_projectiles']
+            if shot.object_id in active:
+                active.remove(shot.object_id)
+
+    def settle(self, shot, player_meta):
+        """A grenade's outcome, once no more damage can be credited to it"""
+
+        if not shot.is_grenade or shot.player_index not in player_meta:
+            return
+        grenades = player_meta[shot.player_index]['grenades'][shot.tag_name]
+        if shot.kills - {shot.player_index}:
+            grenades['kill'] += 1
+        elif set(shot.victims) - {shot.player_index}:
+            grenades['hit'] += 1
+        elif shot.victims:
+            grenades['self'] += 1
+        else:
+            grenades['miss'] += 1
+
+    def record_damage(self, dealer, receiver, amount, position, killed, player_meta):
+        """
+        Credits amount of damage dealer did to receiver (player indexes) to a shot, position being where the receiver
+        was. Returns the shot, None if there's no shot to credit (e.g. a melee).
+        """
+
+        candidates = [shot for _, shots in self.ended for shot in shots if shot.player_index == dealer]
+        candidates += [shot for shot in self.in_flight.values() if shot.player_index == dealer]
+        if not candidates:
+            return None
+        if position is None:
+            shot = max(candidates, key=lambda shot: (shot.ended_at is not None, shot.ended_at or 0))
+        else:
+            x, y, z = position
+            shot = min(candidates, key=lambda shot: (shot.x - x) ** 2 + (shot.y - y) ** 2 + (shot.z - z) ** 2)
+
+        first_hit = receiver != dealer and all(victim == dealer for victim in shot.victims)
+        shot.victims[receiver] = shot.victims.get(receiver, 0) + amount
+        shot.damage += amount
+        if killed:
+            shot.kills.add(receiver)
+        if not shot.is_grenade and dealer in player_meta:
+            accuracy = player_meta[dealer]['accuracy_by_weapon'].get(shot.weapon)
+            if accuracy is not None:
+                accuracy['damage'] += amount
+                if first_hit:
+                    accuracy['hits'] += 1
+        return shot
@@ -0,0 +1,168 @@
+"""
+Raw capture files: the raw bytes of the registered memory regions for every tick, decoded later with whatever
+get_game_info() looks like at that point (see decode_capture.py).
+
+Field offsets keep changing as we reverse engineer more, and a recording of decoded ticks is stuck with the decoder of
+the day it was recorded. A raw capture can be re-decoded every time a new field is found, and capturing is just a few
+large reads per tick.
+
+File layout (little-endian):
+
+    file header     <8sHI        magic, format version, metadata length
+                    metadata     utf-8 json
+    records         <I           compressed record length, followed by the zstd compressed record:
+
+    record header   <BIdH        record type, tick, wall clock time (unix seconds), region count
+    region table    <IIB * n     guest address, size, encoding
+    region data     region bytes, back to back in region table order
+
+Tick records hold the per-tick regions, map records hold the regions that only change when a new map loads (tags,
+xbe image). Per-tick regions are XORed against the same region in the previous tick before compressing, since most of
+memory doesn't change from one tick to the next; every keyframe_interval ticks they're stored as-is instead, which
+keeps one bad region from corrupting every tick after it.
+"""
+
+import json
+import struct
+import time
+from collections import namedtuple
+
+import numpy as np
+import zstandard as zstd
+
+MAGIC = b'HCRAWCAP'
+FORMAT_VERSION = 1
+
+RECORD_TICK = 0
+RECORD_MAP = 1
+
+ENCODING_RAW = 0
+ENCODING_XOR_PREVIOUS = 1
+
+file_header = struct.Struct('<8sHI')
+record_length = struct.Struct('<I')
+record_header = struct.Struct('<BIdH')
+region_entry = struct.Struct('<IIB')
+
+# regions are a list of (guest address, bytes) with the map regions included, new_map is True on the first tick of a map
+CapturedTick = namedtuple('CapturedTick', ['tick', 'wall_time', 'regions', 'new_map'])
+
+
+def xor_bytes(a, b):
+    return np.bitwise_xor(np.frombuffer(a, dtype=np.uint8), np.frombuffer(b, dtype=np.uint8)).tobytes()
+
+
+class RawCaptureWriter:
+
+    def __init__(self, path, metadata=None, keyframe_interval=300, level=3):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.compressor = zstd.ZstdCompressor(level=level)
+        self.keyframe_interval = keyframe_interval
+        self.ticks_since_keyframe = keyframe_interval
+        self.previous = {}
+        self.map_key = None
+        self.bytes_written = 0
+
+        metadata_bytes = json.dumps(dict(metadata or {}, format_version=FORMAT_VERSION), default=str).encode()
+        self._write(file_header.pack(MAGIC, FORMAT_VERSION, len(metadata_bytes)) + metadata_bytes)
+
+    def _write(self, data):
+        self.file.write(data)
+        self.bytes_written += len(data)
+
+    def _write_record(self, record_type, tick, regions, encodings):
+        table = b''.join(region_entry.pack(address, len(data), encoding)
+                         for (address, data), encoding in zip(regions, encodings))
+        record = b''.join([record_header.pack(record_type, tick & 0xFFFFFFFF, time.time(), len(regions)), table]
+                          + [data for _, data in regions])
+        compressed = self.compressor.compress(record)
+        self._write(record_length.pack(len(compressed)) + compressed)
+        self.file.flush()
+
+    def write_map(self, map_key, regions):
+        """Stores the regions that stay the same for the whole map, regions is a list of (guest address, bytes)"""
+        self.map_key = map_key
+        self._write_record(RECORD_MAP, 0, regions, [ENCODING_RAW] * len(regions))
+        # start the new map on a keyframe
+        self.ticks_since_keyframe = self.keyframe_interval
+
+    def write_tick(self, tick, regions):
+        """regions is a list of (guest address, bytes) copied this tick"""
+
+        keyframe = self.ticks_since_keyframe >= self.keyframe_interval
+        self.ticks_since_keyframe = 0 if keyframe else self.ticks_since_keyframe + 1
+
+        encoded = []
+        encodings = []
+        for address, data in regions:
+            previous = self.previous.get(address)
+            if not keyframe and previous is not None and len(previous) == len(data):
+                encoded.append((address, xor_bytes(data, previous)))
+                encodings.append(ENCODING_XOR_PREVIOUS)
+            else:
+                encoded.append((address, data))
+                encodings.append(ENCODING_RAW)
+        self.previous = dict(regions)
+        self._write_record(RECORD_TICK, tick, encoded, encodings)
+
+    def close(self):
+        self.file.close()
+
+
+class RawCaptureReader:
+    """Iterates over a raw capture file, yielding a CapturedTick per recorded tick"""
+
+    def __init__(self, path):
+        self.path = path
+        self.decompressor = zstd.ZstdDecompressor()
+        with open(path, 'rb') as f:
+            magic, version, metadata_length = file_header.unpack(f.read(file_header.size))
+            if magic != MAGIC:
+                raise ValueError(f'{path} is not a raw capture file')
+            if version > FORMAT_VERSION:
+                raise ValueError(f'{path} is format version {version}, this reader only knows up to {FORMAT_VERSION}')
+            self.metadata = json.loads(f.read(metadata_length))
+            self.data_offset = f.tell()
+
+    def _records(self, f):
+        while header := f.read(record_length.size):
+            if len(header) < record_length.size:
+                break
+            compressed = f.read(record_length.unpack(header)[0])
+            try:
+                record = self.decompressor.decompress(compressed)
+            except zstd.ZstdError:
+                # truncated last record, e.g. the caster was killed mid-write
+                break
+            record_type, tick, wall_time, region_count = record_header.unpack_from(record, 0)
+            offset = record_header.size
+            entries = [region_entry.unpack_from(record, offset + region_entry.size * i) for i in range(region_count)]
+            offset += region_entry.size * region_count
+            regions = []
+            for address, size, encoding in entries:
+                regions.append((address, encoding, record[offset:offset + size]))
+                offset += size
+            yield record_type, tick, wall_time, regions
+
+    def __iter__(self):
+        map_regions = []
+        previous = {}
+        new_map = False
+        with open(self.path, 'rb') as f:
+            f.seek(self.data_offset)
+            for record_type, tick, wall_time, regions in self._records(f):
+                if record_type == RECORD_MAP:
+                    map_regions = [(address, data) for address, _, data in regions]
+                    new_map = True
+                    continue
+
+                decoded = []
+                for address, encoding, data in regions:
+                    if encoding == ENCODING_XOR_PREVIOUS:
+                        data = xor_bytes(data, previous[address])
+                    decoded.append((address, data))
+                previous = dict(decoded)
+
+                yield CapturedTick(tick, wall_time, map_regions + decoded, new_map)
+                new_map = False
@@ -0,0 +1,70 @@
+"""
+Reusable containers for the tick path.
+
+get_game_info() builds a dict for every player, weapon, damage table row and object (and a few more per player) on
+every tick. Every one of those is a new GC-tracked object, so a tick with 16 players and a few hundred objects runs
+several generation 0 collections and keeps promoting into the older generations, which is why __main__ used to run
+with the GC disabled.
+
+Extractors ask a RecordPool for the container belonging to a key that stays the same from tick to tick
+(('player', 3), ('object', 120), ...) and refill it in place: a dict, a list, or one of the model.py records
+(players, bipeds, weapons, damage table rows, objects), which get their __init__() run again. In steady state a tick
+then creates next to no containers that outlive it, and the GC has next to nothing to do.
+
+It isn't allocation free yet: every record still gets its fields passed in as a new dict, and the hex() and f-string
+fields are new strings every tick. That's around 40-80KB of short lived allocations per tick with 16 players (peak,
+synthetic scenario), none of it GC tracked for long, which is why collect_garbage stays off by default.
+
+Pools are double buffered: swap() at the start of a tick switches to the other set of containers, so the previous
+tick stays intact for extract_events() while the new one gets filled. Anything that holds on to a tick for longer than
+that has to copy it (main_loop() hands the recorder and the ui threads the tick's to_dict()).
+"""
+
+
+class RecordPool:
+
+    def __init__(self):
+        self.buffers = ({}, {})
+        self.current = self.buffers[0]
+
+    def swap(self):
+        """Call once per tick, before filling anything"""
+        self.current = self.buffers[1] if self.current is self.buffers[0] else self.buffers[0]
+
+    def dict(self, key, fields):
+        """The dict for key from two ticks ago (or a new one), holding fields now"""
+
+        record = self.current.get(key)
+        if record is None:
+            record = self.current[key] = {}
+        elif record.keys() != fields.keys():
+            # e.g. a dead player's object data, or a different object type in the same table slot
+            record.clear()
+        record.update(fields)
+        return record
+
+    def record(self, key, cls, fields):
+        """The cls record for key from two ticks ago (or a new one), reinitialized with fields"""
+
+        record = self.current.get(key)
+        if type(record) is not cls:
+            record = self.current[key] = cls(**fields)
+        else:
+            # every field gets assigned, optional ones left out of fields go back to their defaults
+            record.__init__(**fields)
+        return record
+
+    def list(self, key):
+        """The list for key from two ticks ago (or a new one), emptied"""
+
+        records = self.current.get(key)
+        if records is None:
+            records = self.current[key] = []
+        else:
+            records.clear()
+        return records
+
+    def clear(self):
+        """Forgets every container, e.g. when a new map leaves most keys unused"""
+        for buffer in self.buffers:
+            buffer.clear()
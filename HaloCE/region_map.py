@@ -0,0 +1,137 @@
+"""
+Table of guest virtual address ranges that are contiguous in xemu's (host) memory, so translating an address is a
+bisect instead of two QMP round trips.
+
+probe() builds ranges by asking a translate function (QmpProxy.gva2hva) about pages in a guest range, either page by
+page or by galloping: once a page translates, pages 1, 2, 4, 8... further along are checked against the same guest to
+host offset, and the first miss is narrowed down with a binary search. Galloping assumes the pages in between two
+matching probes match too, so a contiguous 64MB range takes a few dozen translations rather than 16384, but it can
+jump over a hole that happens to land back on the same offset. Only gallop over ranges that are known to be laid out
+linearly (like main RAM above 0x80000000).
+
+Tables get saved along with the rest of the resolved addresses, see address_cache.py.
+"""
+
+from bisect import bisect_right, insort
+
+PAGE_SIZE = 0x1000
+
+
+def page_align(address):
+    return address & ~(PAGE_SIZE - 1)
+
+
+class RegionMap:
+    """Sorted, coalesced (guest_start, guest_end, host_base) ranges, guest_end is exclusive"""
+
+    def __init__(self, ranges=()):
+        self.starts = []
+        self.ranges = []
+        for guest_start, guest_end, host_base in ranges:
+            self.add(guest_start, guest_end, host_base)
+
+    def __len__(self):
+        return len(self.ranges)
+
+    def __iter__(self):
+        return iter(self.ranges)
+
+    def lookup(self, address):
+        """Host address for a guest address, or None if it isn't in any known range"""
+
+        i = bisect_right(self.starts, address) - 1
+        if i >= 0:
+            guest_start, guest_end, host_base = self.ranges[i]
+            if address < guest_end:
+                return host_base + (address - guest_start)
+        return None
+
+    def add(self, guest_start, guest_end, host_base):
+        """Adds a range, merging it with neighbours that continue it in host memory too. Overlapped ranges are replaced."""
+
+        self.remove(guest_start, guest_end)
+        insort(self.ranges, (guest_start, guest_end, host_base))
+
+        merged = []
+        for start, end, host in self.ranges:
+            if merged:
+                last_start, last_end, last_host = merged[-1]
+                if last_end == start and last_host + (start - last_start) == host:
+                    merged[-1] = (last_start, end, last_host)
+                    continue
+            merged.append((start, end, host))
+        self.ranges = merged
+        self.starts = [start for start, _, _ in merged]
+
+    def remove(self, guest_start, guest_end):
+        """Forgets everything between guest_start and guest_end, trimming ranges that stick out either side"""
+
+        kept = []
+        for start, end, host in self.ranges:
+            if end <= guest_start or start >= guest_end:
+                kept.append((start, end, host))
+                continue
+            if start < guest_start:
+                kept.append((start, guest_start, host))
+            if end > guest_end:
+                kept.append((guest_end, end, host + (guest_end - start)))
+        self.ranges = kept
+        self.starts = [start for start, _, _ in kept]
+
+    def update(self, other):
+        for guest_start, guest_end, host_base in other:
+            self.add(guest_start, guest_end, host_base)
+
+    def clear(self):
+        self.starts = []
+        self.ranges = []
+
+
+def probe(translate, guest_start, guest_end, gallop=False):
+    """
+    Probes [guest_start, guest_end) one run of contiguous pages at a time and returns a RegionMap of what it found.
+    With gallop=False every page gets translated. Pages that fail to translate (translate raises ValueError, e.g. QMP
+    answering 'Unmapped') are skipped without a word, holes are expected here, so translate shouldn't log them either
+    (see QmpProxy.gva2hva(quiet=True)).
+    """
+
+    def host_page(page):
+        try:
+            return translate(page)
+        except ValueError:
+            return None
+
+    found = RegionMap()
+    last_page = page_align(guest_end - 1)
+    page = page_align(guest_start)
+    while page <= last_page:
+        host = host_page(page)
+        if host is None:
+            page += PAGE_SIZE
+            continue
+
+        def continues_run(candidate):
+            return host_page(candidate) == host + (candidate - page)
+
+        # gallop forward while the offset holds, then binary search between the last hit and the first miss
+        good = page
+        step = PAGE_SIZE
+        while good < last_page:
+            candidate = min(good + step, last_page)
+            if continues_run(candidate):
+                good = candidate
+                if gallop:
+                    step *= 2
+                continue
+            bad = candidate
+            while bad - good > PAGE_SIZE:
+                middle = page_align(good + (bad - good) // 2)
+                if continues_run(middle):
+                    good = middle
+                else:
+                    bad = middle
+            break
+
+        found.add(page, good + PAGE_SIZE, host)
+        page = good + PAGE_SIZE
+    return found
@@ -0,0 +1,153 @@
+"""
+Batched reads of many (host address, size) ranges out of another process, in as few syscalls as possible.
+
+Every pymem read is its own ReadProcessMemory call, so a tick that reads a few hundred fields makes a few hundred
+syscalls. When xemu runs on Linux the whole batch can go out as a single process_vm_readv with one iovec per range
+(IOV_MAX ranges per call). If that isn't allowed (ptrace restrictions), ranges are pread from /proc/<pid>/mem instead,
+and anywhere else ScatterReader falls back to calling the given per-range read function in a loop.
+
+Which of those works is found out with a real 1 byte read of an address that's known to be mapped: the kernel
+accepts an empty process_vm_readv batch before it checks whether we may read the process at all, so only an actual
+read tells EPERM apart from success.
+
+Results always come back as a list of bytes in request order.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import sys
+
+# Linux caps the number of iovecs per call (UIO_MAXIOV)
+IOV_MAX = 1024
+
+
+class iovec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+
+_process_vm_readv = None
+if sys.platform.startswith('linux'):
+    _libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    if hasattr(_libc, 'process_vm_readv'):
+        _process_vm_readv = _libc.process_vm_readv
+        _process_vm_readv.argtypes = [ctypes.c_int, ctypes.POINTER(iovec), ctypes.c_ulong,
+                                      ctypes.POINTER(iovec), ctypes.c_ulong, ctypes.c_ulong]
+        _process_vm_readv.restype = ctypes.c_ssize_t
+
+
+def process_vm_readv(pid, ranges):
+    """
+    Reads every (address, size) range of process pid with one process_vm_readv call per IOV_MAX ranges.
+    Raises OSError if the call fails or comes back short (a range wasn't mapped).
+    """
+
+    results = []
+    for chunk_start in range(0, len(ranges), IOV_MAX):
+        chunk = ranges[chunk_start:chunk_start + IOV_MAX]
+        total = sum(size for _, size in chunk)
+        buffer = ctypes.create_string_buffer(total)
+        buffer_address = ctypes.addressof(buffer)
+
+        local = (iovec * len(chunk))()
+        remote = (iovec * len(chunk))()
+        offset = 0
+        for i, (address, size) in enumerate(chunk):
+            local[i].iov_base = buffer_address + offset
+            local[i].iov_len = size
+            remote[i].iov_base = address
+            remote[i].iov_len = size
+            offset += size
+
+        read = _process_vm_readv(pid, local, len(chunk), remote, len(chunk), 0)
+        if read < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f'process_vm_readv of {len(chunk)} ranges failed: {os.strerror(error)}')
+        if read != total:
+            raise OSError(errno.EFAULT, f'process_vm_readv only read {read} of {total} bytes')
+
+        raw = buffer.raw
+        offset = 0
+        for _, size in chunk:
+            results.append(raw[offset:offset + size])
+            offset += size
+    return results
+
+
+class ScatterReader:
+    """
+    Reads batches of (host address, size) ranges from one process.
+
+    backend is picked once: 'process_vm_readv', then 'proc_mem', then 'fallback' (one fallback_read call per range,
+    e.g. pymem's read_bytes on Windows or snapshot.SnapshotProcess.read_bytes offline). Each is tried with a 1 byte
+    read of probe_address, or of the first range read_many() gets if no probe_address is known yet (backend stays
+    None until then).
+    """
+
+    def __init__(self, pid, fallback_read=None, probe_address=None):
+        self.pid = pid
+        self.fallback_read = fallback_read
+        self.proc_mem = None
+        self.backend = None
+        if probe_address is not None or not pid:
+            self.pick_backend(probe_address)
+
+    def pick_backend(self, probe_address):
+        self.backend = 'fallback'
+        if self.pid and probe_address is not None and _process_vm_readv is not None:
+            if self.can_read(lambda: process_vm_readv(self.pid, [(probe_address, 1)])):
+                self.backend = 'process_vm_readv'
+        if self.backend == 'fallback' and self.pid and probe_address is not None and os.path.exists(f'/proc/{self.pid}/mem'):
+            try:
+                self.proc_mem = os.open(f'/proc/{self.pid}/mem', os.O_RDONLY)
+            except OSError:
+                pass
+            else:
+                if self.can_read(lambda: os.pread(self.proc_mem, 1, probe_address)):
+                    self.backend = 'proc_mem'
+                else:
+                    os.close(self.proc_mem)
+                    self.proc_mem = None
+        if self.backend == 'fallback' and self.fallback_read is None:
+            raise ValueError(f'no way to read process {self.pid}, pass a fallback_read function')
+
+    @staticmethod
+    def can_read(probe):
+        """False if probe() is refused for lack of permission, an unmapped probe address doesn't count against it"""
+
+        try:
+            probe()
+        except OSError as e:
+            return e.errno not in (errno.EPERM, errno.EACCES, errno.ESRCH)
+        return True
+
+    def read_many(self, ranges):
+        """Returns the bytes of every (host address, size) range, in request order"""
+
+        if not ranges:
+            return []
+        if self.backend is None:
+            self.pick_backend(ranges[0][0])
+        if self.backend == 'process_vm_readv':
+            try:
+                return process_vm_readv(self.pid, ranges)
+            except OSError as e:
+                if e.errno != errno.EPERM or self.fallback_read is None:
+                    raise
+                # e.g. yama ptrace_scope was raised while we were running
+                self.backend = 'fallback'
+        if self.backend == 'proc_mem':
+            results = []
+            for address, size in ranges:
+                data = os.pread(self.proc_mem, size, address)
+                if len(data) != size:
+                    raise OSError(errno.EFAULT, f'/proc/{self.pid}/mem only read {len(data)} of {size} bytes at {address:#x}')
+                results.append(data)
+            return results
+        return [self.fallback_read(address, size) for address, size in ranges]
+
+    def close(self):
+        if self.proc_mem is not None:
+            os.close(self.proc_mem)
+            self.proc_mem = None
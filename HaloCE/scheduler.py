@@ -0,0 +1,139 @@
+"""
+Tiered scheduling for the parts of get_game_info() that don't need to be read every tick.
+
+Kills, positions and health have to be fresh every tick, but network game state, memory info, scenario items and
+player UI settings barely change. Extractors are registered with a tier:
+
+    EVERY_TICK  runs every time it's asked for (registered only so its cost gets measured)
+    EVERY_N     runs once every interval ticks, the last value is reused in between
+    ON_CHANGE   runs when change_key() returns something new (change_key has to be cheap)
+    ON_DEMAND   only runs after request(name), otherwise the last value (or None) is reused
+
+Call sites ask for values lazily with get(name, *args) (args make separate entries, e.g. one per local player).
+When a due extractor's estimated cost doesn't fit in what's left of the per-tick budget it gets deferred, and the
+last value is reused until a tick with room to spare, or until it's max_age ticks old and runs regardless.
+Costs start at the registered estimate and follow the measured run times from then on.
+
+get() takes a lock, since players can be read on several threads (extraction_workers in halocaster.py).
+"""
+
+import threading
+import time
+
+EVERY_TICK = 'every_tick'
+EVERY_N = 'every_n'
+ON_CHANGE = 'on_change'
+ON_DEMAND = 'on_demand'
+
+
+class Extractor:
+
+    __slots__ = ('name', 'fn', 'tier', 'interval', 'cost_ms', 'change_key', 'max_age', 'runs', 'deferrals')
+
+    def __init__(self, name, fn, tier, interval, cost_ms, change_key, max_age):
+        self.name = name
+        self.fn = fn
+        self.tier = tier
+        self.interval = interval
+        self.cost_ms = cost_ms
+        self.change_key = change_key
+        self.max_age = max_age
+        self.runs = 0
+        self.deferrals = 0
+
+
+class ExtractionScheduler:
+
+    def __init__(self, budget_ms=20.0):
+        # None disables deferring, e.g. when decoding a capture offline
+        self.budget_ms = budget_ms
+        self.extractors = {}
+        self.lock = threading.RLock()
+        # (name, args) -> [value, tick it was read on, change key it was read with]
+        self.values = {}
+        self.requested = set()
+        self.tick = 0
+        self.tick_start = time.perf_counter()
+        self.ran = []
+        self.deferred = []
+
+    def register(self, name, fn, tier=EVERY_TICK, interval=1, cost_ms=1.0, change_key=None, max_age=None):
+        if tier == ON_CHANGE and change_key is None:
+            raise ValueError(f'{name}: on change extractors need a change_key')
+        if max_age is None:
+            max_age = interval * 4 if tier == EVERY_N else 150
+        self.extractors[name] = Extractor(name, fn, tier, interval, cost_ms, change_key, max_age)
+
+    def request(self, name):
+        """Makes an on demand (or any other) extractor run the next time it's asked for"""
+        self.requested.add(name)
+
+    def start_tick(self, tick, tick_start=None):
+        """tick_start is the perf_counter() time the budget counts from, defaults to now"""
+
+        self.tick = tick
+        self.tick_start = time.perf_counter() if tick_start is None else tick_start
+        self.ran = []
+        self.deferred = []
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.tick_start) * 1000
+
+    def get(self, name, *args):
+        with self.lock:
+            return self._get(name, args)
+
+    def _get(self, name, args):
+        extractor = self.extractors[name]
+        key = (name, args)
+        cached = self.values.get(key)
+        change_key = extractor.change_key() if extractor.tier == ON_CHANGE else None
+
+        if cached is not None and name not in self.requested:
+            value, last_tick, last_change_key = cached
+            age = self.tick - last_tick
+            if extractor.tier == EVERY_N:
+                due = age >= extractor.interval or age < 0  # negative after a new game resets game_time
+            elif extractor.tier == ON_CHANGE:
+                due = change_key != last_change_key
+            elif extractor.tier == ON_DEMAND:
+                due = False
+            else:
+                due = True
+            if not due:
+                return value
+
+            fits = self.budget_ms is None or self.elapsed_ms() + extractor.cost_ms <= self.budget_ms
+            if extractor.tier != EVERY_TICK and not fits and 0 <= age < extractor.max_age:
+                extractor.deferrals += 1
+                self.deferred.append(name)
+                return value
+        elif cached is None and extractor.tier == ON_DEMAND and name not in self.requested:
+            return None
+
+        start = time.perf_counter()
+        value = extractor.fn(*args)
+        cost_ms = (time.perf_counter() - start) * 1000
+        extractor.cost_ms = 0.8 * extractor.cost_ms + 0.2 * cost_ms
+        extractor.runs += 1
+        self.values[key] = [value, self.tick, change_key]
+        self.requested.discard(name)
+        self.ran.append(name)
+        return value
+
+    def clear(self):
+        """Forgets every value, e.g. when a new map makes them meaningless"""
+        self.values.clear()
+
+    def report(self):
+        """What ran and what got deferred this tick, plus the running cost estimates"""
+
+        return {
+            'budget_ms': self.budget_ms,
+            'elapsed_ms': self.elapsed_ms(),
+            'ran': list(self.ran),
+            'deferred': list(self.deferred),
+            'extractors': {name: {'tier': extractor.tier, 'cost_ms': extractor.cost_ms, 'runs': extractor.runs,
+                                  'deferrals': extractor.deferrals}
+                           for name, extractor in self.extractors.items()},
+        }
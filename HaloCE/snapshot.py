@@ -0,0 +1,98 @@
+"""
+Stand-ins for the pymem process and QmpProxy that serve reads out of captured memory regions instead of a live xemu.
+
+Attaching halocaster to these (halocaster.attach(SnapshotProcess(regions), IdentityTranslator())) runs the normal
+extraction code (get_game_info() and friends) against a frozen copy of guest memory, e.g. a raw capture being decoded
+offline. Captured regions are keyed by guest address and the translator maps every guest address to itself, so
+"host" addresses are guest addresses here.
+"""
+
+import struct
+from bisect import bisect_right
+from collections import Counter
+
+
+class IdentityTranslator:
+    """Replaces QmpProxy when reading from a snapshot, every address already is a snapshot address"""
+
+    def gva2gpa(self, addr, quiet=False):
+        return addr
+
+    def gpa2hva(self, addr):
+        return addr
+
+    def gva2hva(self, addr, quiet=False):
+        return addr
+
+    def translate(self, addr):
+        return addr
+
+
+class SnapshotProcess:
+    """
+    Implements the subset of the Pymem interface halocaster reads through, backed by (guest address, bytes) regions.
+
+    Reads that aren't covered by any region return zeros and get counted in missing_reads, so one uncaptured field
+    doesn't stop a whole recording from decoding. Check missing_reads to find regions that should be captured.
+    """
+
+    process_id = 0
+
+    def __init__(self, regions=()):
+        self.starts = []
+        self.regions = []
+        self.missing_reads = Counter()
+        self.load(regions)
+
+    def load(self, regions):
+        """Replaces the current regions, regions is an iterable of (guest address, bytes)"""
+        self.regions = sorted((address, address + len(data), data) for address, data in regions)
+        self.starts = [start for start, _, _ in self.regions]
+
+    def read_bytes(self, address, length):
+        # regions can overlap (e.g. the observer cameras are inside the globals), so walk back past smaller regions
+        i = bisect_right(self.starts, address) - 1
+        while i >= 0:
+            start, end, data = self.regions[i]
+            if address + length <= end:
+                return data[address - start:address - start + length]
+            i -= 1
+        self.missing_reads[address] += 1
+        return bytes(length)
+
+    def _unpack(self, fmt, address):
+        return struct.unpack(fmt, self.read_bytes(address, struct.calcsize(fmt)))[0]
+
+    def read_uchar(self, address):
+        return self._unpack('<B', address)
+
+    def read_ushort(self, address):
+        return self._unpack('<H', address)
+
+    def read_uint(self, address):
+        return self._unpack('<I', address)
+
+    def read_ulonglong(self, address):
+        return self._unpack('<Q', address)
+
+    def read_char(self, address):
+        return self._unpack('<b', address)
+
+    def read_short(self, address):
+        return self._unpack('<h', address)
+
+    def read_int(self, address):
+        return self._unpack('<i', address)
+
+    def read_float(self, address):
+        return self._unpack('<f', address)
+
+    def read_string(self, address, byte=50):
+        buff = self.read_bytes(address, byte)
+        null_terminator_index = buff.find(b'\x00')
+        if null_terminator_index != -1:
+            buff = buff[:null_terminator_index]
+        return buff.decode(errors='replace')
+
+    def write_bytes(self, address, value, length):
+        raise PermissionError(f'snapshots are read only, cannot write {length} bytes at {address:#x}')
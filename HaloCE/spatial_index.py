@@ -0,0 +1,144 @@
+"""
+Proximity queries over one tick: players, objects, scenario items and spawns.
+
+Each category is a PointIndex, a uniform grid over the x, y plane (Halo maps are far wider than they are tall, so
+z is left out of the cells but not out of the distances). Points are sorted by cell once per build, and a radius
+query for any number of positions at once looks up the cells around every position with one searchsorted() and
+checks the candidates in one vectorized distance computation. nearest() and distances() work on the full distance
+matrix instead, with at most 16 players asking about a couple of thousand points that's cheaper than walking rings
+of cells.
+
+SpatialIndex.update(tick) rebuilds players and objects every tick, items and spawns only when the map (or what
+get_items() and get_spawns() returned) changes. Queries return row indices into the category, in the order the
+points were given (spawn order for spawns), alongside an ids array (player_index, object_id, spawn_id, item index).
+"""
+
+import numpy as np
+
+# cell coordinates are shifted into the positive range and packed into one int64 key, high 32 bits x, low 32 bits y
+CELL_OFFSET = 1 << 31
+
+
+class PointIndex:
+
+    def __init__(self, cell_size=4.0):
+        self.cell_size = cell_size
+        self.positions = np.zeros((0, 3))
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.order = np.zeros(0, dtype=np.intp)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def cell_keys(self, cells):
+        return ((cells[..., 0] + CELL_OFFSET) << 32) | (cells[..., 1] + CELL_OFFSET)
+
+    def build(self, positions, ids=None):
+        """positions is an (n, 3) array (or list of x, y, z), ids defaults to 0 to n - 1"""
+
+        self.positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        self.ids = np.arange(len(self.positions)) if ids is None else np.asarray(ids, dtype=np.int64)
+        keys = self.cell_keys(np.floor(self.positions[:, :2] / self.cell_size).astype(np.int64))
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order]
+
+    def distances(self, queries):
+        """(m, n) matrix of the distance from each of the m query positions to every point"""
+
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, 3)
+        return np.sqrt(((queries[:, None, :] - self.positions[None, :, :]) ** 2).sum(axis=2))
+
+    def within(self, queries, radius):
+        """
+        Every (query, point) pair no more than radius apart, as three arrays: query row, point row and distance,
+        ordered by query and then by point row.
+        """
+
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, 3)
+        query_count = len(queries)
+        if not query_count or not len(self.positions):
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), np.zeros(0)
+
+        reach = int(np.ceil(radius / self.cell_size))
+        span = 2 * reach + 1
+        if span * span >= len(self.positions):
+            # more cells to look in than points to check, e.g. a big radius
+            query_rows, rows = np.nonzero(self.distances(queries) <= radius)
+            return query_rows, rows, np.linalg.norm(self.positions[rows] - queries[query_rows], axis=1)
+
+        # the span x span cells around each query, keys as (queries, cells)
+        offsets = np.arange(-reach, reach + 1)
+        cells = np.floor(queries[:, :2] / self.cell_size).astype(np.int64)
+        cell_x = np.repeat(cells[:, 0:1] + offsets, span, axis=1)
+        cell_y = np.tile(cells[:, 1:2] + offsets, (1, span))
+        keys = self.cell_keys(np.stack((cell_x, cell_y), axis=2)).ravel()
+
+        # the sorted points in each cell are keys[start:end], flattened into one candidate list
+        starts = np.searchsorted(self.keys, keys, side='left')
+        counts = np.searchsorted(self.keys, keys, side='right') - starts
+        total = int(counts.sum())
+        query_rows = np.repeat(np.arange(query_count).repeat(span * span), counts)
+        sorted_rows = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(total)
+        rows = self.order[sorted_rows]
+
+        distances = np.linalg.norm(self.positions[rows] - queries[query_rows], axis=1)
+        keep = distances <= radius
+        query_rows, rows, distances = query_rows[keep], rows[keep], distances[keep]
+        by_query = np.lexsort((rows, query_rows))
+        return query_rows[by_query], rows[by_query], distances[by_query]
+
+    def nearest(self, queries, k=1):
+        """
+        The k nearest points to each query, as two (m, k) arrays: point rows (-1 past the last point) and distances
+        (inf past the last point), nearest first.
+        """
+
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, 3)
+        rows = np.full((len(queries), k), -1, dtype=np.intp)
+        distances = np.full((len(queries), k), np.inf)
+        found = min(k, len(self.positions))
+        if not found or not len(queries):
+            return rows, distances
+
+        matrix = self.distances(queries)
+        nearest = np.argpartition(matrix, found - 1, axis=1)[:, :found] if found < len(self.positions) else \
+            np.broadcast_to(np.arange(found), (len(queries), found))
+        nearest_distances = np.take_along_axis(matrix, nearest, axis=1)
+        by_distance = np.argsort(nearest_distances, axis=1, kind='stable')
+        rows[:, :found] = np.take_along_axis(nearest, by_distance, axis=1)
+        distances[:, :found] = np.take_along_axis(nearest_distances, by_distance, axis=1)
+        return rows, distances
+
+
+class SpatialIndex:
+    """One PointIndex per category, see the module docstring"""
+
+    CATEGORIES = ('players', 'objects', 'items', 'spawns')
+
+    def __init__(self, cell_size=4.0):
+        self.players = PointIndex(cell_size)
+        self.objects = PointIndex(cell_size)
+        self.items = PointIndex(cell_size)
+        self.spawns = PointIndex(cell_size)
+        self.static_key = None
+
+    def __getitem__(self, category):
+        return getattr(self, category)
+
+    def update(self, tick):
+        """Rebuilds the index from a model.Tick, living players only"""
+
+        players = [player for player in tick.players if player.player_object_data]
+        self.players.build([(player.player_object_data.x, player.player_object_data.y, player.player_object_data.z)
+                            for player in players], [player.player_index for player in players])
+        self.objects.build([(obj.x, obj.y, obj.z) for obj in tick.objects], [obj.object_id for obj in tick.objects])
+
+        items = tick.items or []
+        spawns = tick.spawns or []
+        static_key = (tick.map_hash, len(items), len(spawns))
+        if static_key != self.static_key:
+            self.items.build([(item['item_x'], item['item_y'], item['item_z']) for item in items])
+            self.spawns.build([(spawn['x'], spawn['y'], spawn['z']) for spawn in spawns],
+                              [spawn['spawn_id'] for spawn in spawns])
+            self.static_key = static_key
@@ -0,0 +1,102 @@
+"""
+Ranks the spawns each dead player is likely to come back at, for the overlay.
+
+The scoring follows how Halo CE picks a spawn as far as it's understood, with the radii below as the knobs:
+
+    - a spawn has to be enabled for the gametype (see matches_gametype() in halocaster.py) and, in team games, belong
+      to the player's team (or no team)
+    - a spawn with any living player within BLOCKED_RADIUS is blocked
+    - every living enemy within ENEMY_RADIUS takes ENEMY_WEIGHT off, scaled by how close they are
+    - every living teammate within TEAMMATE_RADIUS adds TEAMMATE_WEIGHT, scaled the same way
+
+Scores for all dead players are one matrix product per tick: the (living players x spawns) distance matrix from the
+spatial index is turned into an enemy and a teammate influence matrix, and each dead player's row of the (dead x
+living) relation matrix picks out which one applies. The per spawn eligibility only changes with the map and the
+gametype, so it's cached on those.
+
+predict() returns {player_index: {'respawn_in': ticks, 'candidates': [spawn, ...]}} for every player with a respawn
+timer running, best spawn first, which extract_events() puts on the tick as spawn_predictions so the overlays have it
+before the player spawns.
+"""
+
+import numpy as np
+
+BLOCKED_RADIUS = 1.0
+ENEMY_RADIUS = 6.0
+ENEMY_WEIGHT = 1.0
+TEAMMATE_RADIUS = 6.0
+TEAMMATE_WEIGHT = 0.5
+CANDIDATES = 3
+
+
+class SpawnPredictor:
+
+    def __init__(self, matches_gametype, candidates=CANDIDATES):
+        self.matches_gametype = matches_gametype
+        self.candidates = candidates
+        self.gametype_key = None
+        self.gametype_mask = np.zeros(0, dtype=bool)
+        self.spawn_teams = np.zeros(0, dtype=np.int64)
+
+    def eligible_for_gametype(self, spawns, game_type, static_key):
+        """Spawns enabled for game_type, recomputed only when the map's spawns or the gametype change"""
+
+        key = (static_key, game_type)
+        if key != self.gametype_key:
+            self.gametype_mask = np.array([bool(self.matches_gametype(game_type, spawn['gametypes'])) for spawn in spawns],
+                                          dtype=bool).reshape(-1)
+            self.spawn_teams = np.array([spawn['team_index'] for spawn in spawns], dtype=np.int64).reshape(-1)
+            self.gametype_key = key
+        return self.gametype_mask
+
+    def predict(self, tick, spatial):
+        """Top candidates for every dead player of a model.Tick, spatial being an up to date spatial_index.SpatialIndex"""
+
+        spawns = tick.spawns
+        dead = [player for player in tick.players if not player.player_object_data and player.respawn_timer > 0]
+        if not spawns or not dead or len(spatial.spawns) != len(spawns):
+            return {}
+
+        eligible = self.eligible_for_gametype(spawns, tick.game_type, spatial.static_key)
+        dead_teams = np.array([player.team for player in dead], dtype=np.int64)
+        if tick.game_engine_has_teams:
+            # team_index 255 (or anything past the teams in play) is a spawn for anybody, as far as we can tell
+            spawn_teams = self.spawn_teams[None, :]
+            eligible = eligible & ((spawn_teams == dead_teams[:, None]) | (spawn_teams > 15))
+        else:
+            eligible = np.broadcast_to(eligible, (len(dead), len(spawns)))
+
+        living = spatial.players
+        if len(living):
+            living_teams = np.array([tick.players[player_index].team for player_index in living.ids], dtype=np.int64)
+            # (living, spawns)
+            distances = spatial.spawns.distances(living.positions)
+            blocked = (distances <= BLOCKED_RADIUS).any(axis=0)
+            enemy_influence = np.clip(1 - distances / ENEMY_RADIUS, 0, None) * ENEMY_WEIGHT
+            teammate_influence = np.clip(1 - distances / TEAMMATE_RADIUS, 0, None) * TEAMMATE_WEIGHT
+            # (dead, living), in free for all everybody else is an enemy
+            if tick.game_engine_has_teams:
+                teammates = dead_teams[:, None] == living_teams[None, :]
+            else:
+                teammates = np.zeros((len(dead), len(living)), dtype=bool)
+            scores = teammates @ teammate_influence - ~teammates @ enemy_influence
+            eligible = eligible & ~blocked
+        else:
+            scores = np.zeros((len(dead), len(spawns)))
+
+        scores = np.where(eligible, scores, -np.inf)
+        count = min(self.candidates, len(spawns))
+        ranked = np.argsort(-scores, axis=1, kind='stable')[:, :count]
+
+        predictions = {}
+        for row, player in enumerate(dead):
+            candidates = []
+            for spawn_row in ranked[row]:
+                score = scores[row, spawn_row]
+                if score == -np.inf:
+                    break
+                spawn = spawns[spawn_row]
+                candidates.append(dict(spawn_id=spawn['spawn_id'], score=float(score), x=spawn['x'], y=spawn['y'],
+                                       z=spawn['z'], facing=spawn['facing']))
+            predictions[player.player_index] = dict(respawn_in=player.respawn_timer, candidates=candidates)
+        return predictions
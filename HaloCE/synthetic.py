@@ -0,0 +1,518 @@
+"""
+Synthetic guest memory for stress testing, no xemu or recording needed.
+
+SyntheticGame lays out the structures get_game_info() reads at the addresses it reads them from: the globals it
+resolves in resolve_globals(), the player datum array, the object header table with bipeds, weapons and projectiles,
+damage tables, game time and game engine globals, tag instances with names, and the scenario's spawns and items.
+Anything else reads as zeros (see SnapshotProcess.missing_reads). The match is scripted:
+
+    game = SyntheticGame(player_count=16)
+    halocaster.attach(game.process, snapshot.IdentityTranslator())
+    game.move_player(0, 10.0, 5.0, 0.5)
+    game.fire(0)
+    game.kill(victim=3, killer=0)
+    game.step()                 # advances game_time, moves projectiles, respawns the dead
+    game.simulate_tick()        # or let random play do all of the above
+
+game.process is the in-process fake backend, a SnapshotProcess over the same bytearrays the game writes to, so every
+change shows up in the very next read. Sizes aren't limited by what a real match does, e.g. 16 players with a few
+hundred projectiles in flight.
+"""
+
+import math
+import random
+import struct
+
+from snapshot import SnapshotProcess
+
+# blocks of guest memory, (address, size)
+IMAGE = (0x10000, 0x30000)  # xbe headers and the game state size immediate at 0x32E4A
+GLOBALS = (0x1F8000, 0x2FD000 - 0x1F8000)
+TAG_GLOBALS = (0x39B000, 0x2000)
+GAME_STATE = (0x40000000, 0x290000)
+TAGS = (0x41000000, 0x40000)
+MISC = (0x42000000, 0x10000)
+KERNEL = (0x80010000, 0x100)
+
+PLAYER_ARRAY = GAME_STATE[0]
+PLAYER_SIZE = 0xD4
+MAX_PLAYERS = 16
+OBJECT_TABLE = GAME_STATE[0] + 0x1000
+MAX_OBJECTS = 1024
+GAME_TIME_GLOBALS = GAME_STATE[0] + 0x5000
+GAME_ENGINE_GLOBALS = GAME_STATE[0] + 0x5100
+GAME_GLOBALS = GAME_STATE[0] + 0x5200
+PLAYERS_GLOBALS = GAME_STATE[0] + 0x5300
+OBJECT_POOL = GAME_STATE[0] + 0x10000
+OBJECT_STRIDE = 0xA00
+
+TAG_INSTANCES = TAGS[0]
+TAG_NAMES = TAGS[0] + 0x1000
+TAG_DATA = TAGS[0] + 0x4000
+TAG_DATA_SIZE = 0x1000
+SCENARIO = TAGS[0] + 0x30000
+SPAWNS = TAGS[0] + 0x31000
+ITEMS = TAGS[0] + 0x32000
+
+PLAYER_CONTROL = MISC[0]
+UPDATE_CLIENT = MISC[0] + 0x1000
+UPDATE_CLIENT_PLAYERS = MISC[0] + 0x2000
+FIRST_PERSON_WEAPONS = MISC[0] + 0x4000
+HUD_MESSAGES = MISC[0] + 0xC000
+
+OBJECT_TYPE_DEFINITIONS = 0x1FCB78
+OBJECT_TYPE_STRUCTS = 0x2FCC00
+OBJECT_TYPE_NAMES = 0x2FCD00
+OBJECT_TYPES = ('biped', 'vehicle', 'weapon', 'equipment', 'garbage', 'projectile', 'scenery', 'machine', 'control',
+                'light_fixture', 'placeholder', 'sound_scenery')
+BIPED, WEAPON, PROJECTILE = 0, 2, 5
+ITEM_DATUM_SIZE = 0x22C
+
+SLAYER = 2
+SLAYER_SCORES = 0x276710
+
+# (tag name, object type, magazine size or None for energy weapons, projectile tag index, projectile speed per tick)
+TAG_LIST = [
+    ('characters\\cyborg_mp\\cyborg_mp', BIPED, None, None, None),
+    ('weapons\\assault rifle\\assault rifle', WEAPON, 60, 5, 12.0),
+    ('weapons\\pistol\\pistol', WEAPON, 12, 6, 16.0),
+    ('weapons\\rocket launcher\\rocket launcher', WEAPON, 2, 7, 1.5),
+    ('weapons\\plasma rifle\\plasma rifle', WEAPON, None, 8, 4.0),
+    ('weapons\\assault rifle\\bullet', PROJECTILE, None, None, None),
+    ('weapons\\pistol\\bullet', PROJECTILE, None, None, None),
+    ('weapons\\rocket launcher\\rocket', PROJECTILE, None, None, None),
+    ('weapons\\plasma rifle\\bolt', PROJECTILE, None, None, None),
+]
+BIPED_TAG = 0
+WEAPON_TAGS = [index for index, (_, object_type, *_) in enumerate(TAG_LIST) if object_type == WEAPON]
+
+SPAWN_POINTS = [(math.cos(i * math.pi / 8) * 40, math.sin(i * math.pi / 8) * 40, 0.5) for i in range(16)]
+PROJECTILE_LIFETIME = 60
+NONE = 0xFFFFFFFF
+RESPAWN_TICKS = 150
+
+
+def handle(index):
+    """Datum handle, the salt in the high 16 bits just has to be something other than 0xFFFF"""
+    return ((0xE000 + index) << 16) | index
+
+
+class GuestMemory:
+    """Fixed blocks of writable guest memory, handed to a SnapshotProcess as its regions"""
+
+    def __init__(self, blocks):
+        self.blocks = sorted((address, bytearray(size)) for address, size in blocks)
+
+    def locate(self, address, length):
+        for start, data in self.blocks:
+            if start <= address and address + length <= start + len(data):
+                return data, address - start
+        raise ValueError(f'{address:#x} is outside every synthetic block')
+
+    def pack(self, fmt, address, *values):
+        data, offset = self.locate(address, struct.calcsize(fmt))
+        struct.pack_into(fmt, data, offset, *values)
+
+    def write(self, address, value):
+        data, offset = self.locate(address, len(value))
+        data[offset:offset + len(value)] = value
+
+    def string(self, address, value, length=64):
+        self.write(address, value.encode()[:length - 1].ljust(length, b'\x00'))
+
+
+class SyntheticGame:
+
+    def __init__(self, player_count=16, local_players=1, teams=True, map_name='bloodgulch', seed=0,
+                 projectile_lifetime=PROJECTILE_LIFETIME, process=None):
+        """process is a SnapshotProcess to load the game's memory into, instead of a new one"""
+
+        if not 0 < player_count <= MAX_PLAYERS:
+            raise ValueError(f'player_count has to be between 1 and {MAX_PLAYERS}')
+
+        self.memory = GuestMemory([IMAGE, GLOBALS, TAG_GLOBALS, GAME_STATE, TAGS, MISC, KERNEL])
+        if process is None:
+            process = SnapshotProcess()
+        process.load(self.memory.blocks)
+        self.process = process
+        self.random = random.Random(seed)
+        self.player_count = player_count
+        self.teams = teams
+        self.projectile_lifetime = projectile_lifetime
+        # game_time as stored, the tick get_game_info() reports is one less
+        self.game_time = 1
+        self.free_objects = list(range(MAX_OBJECTS - 1, -1, -1))
+        self.object_count = 0
+        # player index -> {'biped', 'weapons', 'velocity', 'respawn_at', 'damage'}
+        self.players = {}
+        # object index -> (expires at game_time, velocity)
+        self.projectiles = {}
+
+        self.write_globals(map_name)
+        self.write_tags()
+        self.write_scenario()
+        for player_index in range(player_count):
+            self.add_player(player_index, local_player=player_index if player_index < local_players else -1)
+
+    @property
+    def tick(self):
+        return self.game_time - 1
+
+    # layout
+
+    def write_globals(self, map_name):
+        m = self.memory
+        m.pack('<I', 0x10000 + 0x108, 0x200)  # xbe header size
+        m.write(0x10000, b'XBEH')
+        m.pack('<I', 0x2E2D14, GAME_STATE[0])
+        m.pack('<I', 0x32E4A, GAME_STATE[1])
+
+        m.pack('<I', 0x2FAD28, PLAYER_ARRAY)
+        m.pack('<I', 0x2FAD20, PLAYERS_GLOBALS)
+        m.pack('<I', 0x27629C, GAME_GLOBALS)
+        m.pack('<I', 0x2F8CA0, GAME_TIME_GLOBALS)
+        m.pack('<I', 0x2F9110, GAME_ENGINE_GLOBALS)
+        m.pack('<I', 0x2FC6AC, OBJECT_TABLE)
+        m.pack('<I', 0x276B40, HUD_MESSAGES)
+        m.pack('<I', 0x276794, PLAYER_CONTROL)
+        m.pack('<I', 0x2E8870, UPDATE_CLIENT)
+        m.pack('<I', UPDATE_CLIENT + 0x34, UPDATE_CLIENT_PLAYERS)
+        m.pack('<I', 0x276B48, FIRST_PERSON_WEAPONS)
+        m.pack('<I', 0x39BE5C, SCENARIO)
+        m.pack('<I', 0x39CE24, TAG_INSTANCES)
+        m.pack('<B', 0x2F90C4, int(self.teams))
+        m.pack('<I', 0x2E3648, self.random.getrandbits(32))
+        m.string(0x2E37CD, map_name, 32)
+        m.string(0x2FAC20, f'levels\\test\\{map_name}\\{map_name}', 63)
+        m.write(0x80010000, bytes(range(200)))
+
+        # object type definitions: pointer array -> definition -> name pointer, datum sizes
+        m.pack('<H', 0x1FC0E0, 0x1F4)
+        m.pack('<H', 0x1FC188, 0x4CC)
+        m.pack('<H', 0x1FC380, ITEM_DATUM_SIZE)
+        for object_type, name in enumerate(OBJECT_TYPES):
+            definition = OBJECT_TYPE_STRUCTS + 16 * object_type
+            m.pack('<I', OBJECT_TYPE_DEFINITIONS + 4 * object_type, definition)
+            m.pack('<I', definition, OBJECT_TYPE_NAMES + 16 * object_type)
+            m.string(OBJECT_TYPE_NAMES + 16 * object_type, name, 16)
+
+        # datum array headers: max count, element size, count, next index, first element
+        m.pack('<HH', PLAYER_ARRAY + 0x20, MAX_PLAYERS, PLAYER_SIZE)
+        m.pack('<HH', PLAYER_ARRAY + 0x2E, self.player_count, self.player_count)
+        m.pack('<I', PLAYER_ARRAY + 0x34, PLAYER_ARRAY + 0x40)
+        m.pack('<HH', OBJECT_TABLE + 0x20, MAX_OBJECTS, 12)
+        m.pack('<I', OBJECT_TABLE + 0x34, OBJECT_TABLE + 0x40)
+
+        # game time: initialized, active, not paused, normal speed
+        m.pack('<BBB', GAME_TIME_GLOBALS, 1, 1, 0)
+        m.pack('<I', GAME_TIME_GLOBALS + 12, self.game_time)
+        m.pack('<f', GAME_TIME_GLOBALS + 24, 1.0)
+        m.pack('<I', GAME_ENGINE_GLOBALS + 4, SLAYER)
+        # map loaded, active, not loading
+        m.pack('<BBBB', GAME_GLOBALS, 1, 1, 0, 0)
+        m.pack('<f', GAME_GLOBALS + 4, 1.0)
+        m.pack('<I', GAME_GLOBALS + 16, self.random.getrandbits(32))
+
+    def write_tags(self):
+        m = self.memory
+        for tag_index, (name, object_type, magazine, _, _) in enumerate(TAG_LIST):
+            entry = TAG_INSTANCES + 32 * tag_index
+            data = TAG_DATA + TAG_DATA_SIZE * tag_index
+            m.write(entry, {BIPED: b'dpib', WEAPON: b'paew', PROJECTILE: b'jorp'}[object_type])
+            m.pack('<I', entry + 0x10, TAG_NAMES + 64 * tag_index)
+            m.pack('<I', entry + 0x14, data)
+            m.string(TAG_NAMES + 64 * tag_index, name)
+            if object_type == BIPED:
+                m.pack('<ff', data + 0x400, 0.62, 0.35)  # camera heights, standing and crouching
+                m.pack('<f', data + 0x458, 0.2)
+            elif object_type == WEAPON:
+                m.pack('<h', data + 0xC, 900)  # spawn interval when placed as an item
+                m.pack('<B', data + 0x309, 8 if magazine is None else 0)  # energy weapon bit
+                m.pack('<hff', data + 986, 1, 1.2, 1.2)
+                m.pack('<ffff', data + 996, 0.1, 20.0, 0.2, 25.0)
+
+    def write_scenario(self):
+        m = self.memory
+        m.pack('<II', SCENARIO + 852, len(SPAWN_POINTS), SPAWNS)
+        for spawn_index, (x, y, z) in enumerate(SPAWN_POINTS):
+            spawn = SPAWNS + 52 * spawn_index
+            m.pack('<ffff', spawn, x, y, z, 0.0)
+            m.pack('<BBxxBBBB', spawn + 16, spawn_index % 2, 0, 12, 0, 0, 0)  # all games
+        m.pack('<iI', SCENARIO + 900, len(WEAPON_TAGS), ITEMS)
+        for item_index, tag_index in enumerate(WEAPON_TAGS):
+            item = ITEMS + 144 * item_index
+            m.pack('<B', item + 0x4, 12)
+            m.pack('<I', item + 0x5C, handle(tag_index))
+            m.pack('<fff', item + 0x40, 10.0 * item_index, 0.0, 0.5)
+
+    # objects
+
+    def create_object(self, object_type, tag_index, position, velocity=(0.0, 0.0, 0.0), owner=NONE):
+        if not self.free_objects:
+            raise ValueError(f'object table is full ({MAX_OBJECTS} objects)')
+        object_index = self.free_objects.pop()
+        address = OBJECT_POOL + OBJECT_STRIDE * object_index
+        m = self.memory
+        m.write(address, bytes(OBJECT_STRIDE))
+        m.pack('<I', address, handle(tag_index))
+        m.pack('<fff', address + 0xC, *position)
+        m.pack('<fff', address + 0x18, *velocity)
+        m.pack('<B', address + 0x64, object_type)
+        m.pack('<II', address + 0x70, owner, NONE)
+        m.pack('<i', address + 0xCC, -1)
+        m.pack('<i', address + 0x1E4, -1)
+
+        header = OBJECT_TABLE + 0x40 + 12 * object_index
+        m.pack('<HBBII', header, 0xE000 + object_index, 0, object_type, 0, address)
+        self.object_count = max(self.object_count, object_index + 1)
+        m.pack('<HH', OBJECT_TABLE + 0x2E, self.object_count, self.object_count)
+        return object_index
+
+    def delete_object(self, object_index):
+        self.memory.pack('<I', OBJECT_TABLE + 0x40 + 12 * object_index + 8, 0)
+        self.free_objects.append(object_index)
+        self.projectiles.pop(object_index, None)
+
+    def object_address(self, object_index):
+        return OBJECT_POOL + OBJECT_STRIDE * object_index
+
+    # players
+
+    def player_address(self, player_index):
+        return PLAYER_ARRAY + 0x40 + PLAYER_SIZE * player_index
+
+    def add_player(self, player_index, local_player=-1):
+        m = self.memory
+        address = self.player_address(player_index)
+        m.pack('<Hh', address, 0xE000 + player_index, local_player)
+        m.write(address + 0x4, f'Player {player_index + 1}'[:11].encode('utf-16-le').ljust(24, b'\x00'))
+        m.pack('<I', address + 0x20, player_index % 2 if self.teams else player_index)
+        m.pack('<i', address + 0x24, -1)
+        m.pack('<ii', address + 0x34, -1, -1)
+        m.pack('<i', address + 0x40, -1)
+        m.pack('<f', address + 0x6C, 1.0)
+        m.pack('<h', address + 0x96, -1)
+        self.players[player_index] = {'biped': None, 'weapons': [], 'velocity': (0.0, 0.0, 0.0), 'respawn_at': None}
+        self.respawn(player_index)
+
+    def respawn(self, player_index, position=None):
+        player = self.players[player_index]
+        m = self.memory
+        address = self.player_address(player_index)
+
+        # the old body and its weapons go away
+        if player['biped'] is not None:
+            self.delete_object(player['biped'])
+        for weapon in player['weapons']:
+            self.delete_object(weapon)
+
+        if position is None:
+            position = self.random.choice(SPAWN_POINTS)
+        biped = self.create_object(BIPED, BIPED_TAG, position)
+        biped_address = self.object_address(biped)
+        m.pack('<ffff', biped_address + 0x88, 75.0, 75.0, 1.0, 1.0)  # max health, max shields, health, shields
+        m.pack('<B', biped_address + 0x1B4, 0x41)  # no camo
+        m.pack('<fff', biped_address + 0x1EC, 1.0, 0.0, 0.0)  # aiming vector
+        m.pack('<h', biped_address + 0x2A2, 0)
+        m.pack('<BB', biped_address + 0x2CE, 2, 2)  # grenades
+        for slot in range(4):
+            m.pack('<Iff', biped_address + 0x3E0 + 16 * slot, NONE, 0.0, 0.0)
+        for node in range(19):
+            m.pack('<fff', biped_address + 0x4A8 + 0x34 * node, position[0], position[1], position[2] + 0.03 * node)
+
+        weapons = []
+        for slot, tag_index in enumerate(self.random.sample(WEAPON_TAGS, 2)):
+            weapon = self.create_object(WEAPON, tag_index, position, owner=handle(biped))
+            magazine = TAG_LIST[tag_index][2]
+            if magazine is not None:
+                m.pack('<hh', self.object_address(weapon) + 0x25E, magazine * 3, magazine)
+            m.pack('<BB', self.object_address(weapon) + 0x258, 0, 1)  # not reloading, can fire
+            m.pack('<I', biped_address + 0x2A8 + 4 * slot, handle(weapon))
+            weapons.append(weapon)
+        for slot in range(len(weapons), 4):
+            m.pack('<I', biped_address + 0x2A8 + 4 * slot, NONE)
+
+        m.pack('<II', address + 0x34, handle(biped), handle(biped))
+        m.pack('<I', address + 0x2C, 0)
+        player.update(biped=biped, weapons=weapons, respawn_at=None)
+
+    def alive(self, player_index):
+        return self.players[player_index]['respawn_at'] is None
+
+    def move_player(self, player_index, x, y, z, velocity=None):
+        """Puts a player at (x, y, z), velocity (per tick) keeps them moving on every step()"""
+
+        player = self.players[player_index]
+        if not self.alive(player_index):
+            return
+        biped_address = self.object_address(player['biped'])
+        self.memory.pack('<fff', biped_address + 0xC, x, y, z)
+        if velocity is not None:
+            player['velocity'] = velocity
+            self.memory.pack('<fff', biped_address + 0x18, *velocity)
+        for node in range(19):
+            self.memory.pack('<fff', biped_address + 0x4A8 + 0x34 * node, x, y, z + 0.03 * node)
+
+    def position(self, player_index):
+        return self.memory_read('<fff', self.object_address(self.players[player_index]['biped']) + 0xC)
+
+    def memory_read(self, fmt, address):
+        data, offset = self.memory.locate(address, struct.calcsize(fmt))
+        return struct.unpack_from(fmt, data, offset)
+
+    def fire(self, player_index, direction=None):
+        """One shot from the player's selected weapon: ammo or charge goes down and a projectile spawns"""
+
+        player = self.players[player_index]
+        if not self.alive(player_index):
+            return None
+        m = self.memory
+        weapon_address = self.object_address(player['weapons'][0])
+        tag_index = self.memory_read('<h', weapon_address)[0]
+        _, _, magazine, projectile_tag, speed = TAG_LIST[tag_index]
+
+        if magazine is None:
+            charge = self.memory_read('<f', weapon_address + 0xF0)[0]
+            m.pack('<f', weapon_address + 0xF0, max(charge - 0.01, 0.0))
+        else:
+            backpack, loaded = self.memory_read('<hh', weapon_address + 0x25E)
+            if loaded == 0:
+                # reload instead of firing
+                reloaded = min(magazine, backpack)
+                m.pack('<hh', weapon_address + 0x25E, backpack - reloaded, reloaded)
+                return None
+            m.pack('<h', weapon_address + 0x260, loaded - 1)
+
+        player_address = self.player_address(player_index)
+        shots_fired = self.memory_read('<i', player_address + 0xAE)[0]
+        m.pack('<i', player_address + 0xAE, shots_fired + 1)
+        m.pack('<I', player_address + 0x44, self.tick)
+
+        if direction is None:
+            angle = self.random.uniform(0, 2 * math.pi)
+            direction = (math.cos(angle), math.sin(angle), 0.0)
+        x, y, z = self.position(player_index)
+        velocity = tuple(speed * component for component in direction)
+        projectile = self.create_object(PROJECTILE, projectile_tag, (x, y, z + 0.6), velocity,
+                                        owner=handle(player['biped']))
+        m.pack('<f', self.object_address(projectile) + ITEM_DATUM_SIZE + 0x34, 20.0)
+        self.projectiles[projectile] = (self.game_time + self.projectile_lifetime, velocity)
+        return projectile
+
+    def damage(self, victim, attacker, amount):
+        """Records amount of damage (in health + shields units) in the victim's damage table"""
+
+        m = self.memory
+        biped_address = self.object_address(self.players[victim]['biped'])
+        table = biped_address + 0x3E0
+        slots = [self.memory_read('<IfII', table + 16 * slot) for slot in range(4)]
+        slot = next((i for i, entry in enumerate(slots) if entry[3] == handle(attacker)), None)
+        if slot is None:
+            # the oldest (or an empty) slot gets replaced
+            slot = min(range(4), key=lambda i: -1 if slots[i][0] == NONE else slots[i][0])
+            total = amount
+        else:
+            total = slots[slot][1] + amount
+        attacker_biped = self.players[attacker]['biped']
+        m.pack('<IfII', table + 16 * slot, self.tick, total,
+               handle(attacker_biped) if attacker_biped is not None else NONE, handle(attacker))
+
+        health, shields = self.memory_read('<ff', biped_address + 0x90)
+        shields -= amount / 75.0
+        if shields < 0:
+            health = max(health + shields, 0.0)
+            shields = 0.0
+        m.pack('<ff', biped_address + 0x90, health, shields)
+
+    def kill(self, victim, killer):
+        """Kills victim with whatever damage it takes, credited to killer (victim == killer is a suicide)"""
+
+        if not self.alive(victim):
+            return
+        m = self.memory
+        biped_address = self.object_address(self.players[victim]['biped'])
+        health, shields = self.memory_read('<ff', biped_address + 0x90)
+        self.damage(victim, killer, (health + shields) * 75.0)
+
+        victim_address = self.player_address(victim)
+        killer_address = self.player_address(killer)
+        if victim == killer:
+            suicides = self.memory_read('<h', victim_address + 0xAC)[0]
+            m.pack('<h', victim_address + 0xAC, suicides + 1)
+        else:
+            kills, = self.memory_read('<h', killer_address + 0x98)
+            streak, = self.memory_read('<H', killer_address + 0x92)
+            m.pack('<h', killer_address + 0x98, kills + 1)
+            m.pack('<H', killer_address + 0x92, streak + 1)
+            m.pack('<h', killer_address + 0x96, self.tick)
+            score, = self.memory_read('<i', SLAYER_SCORES + 64 + 4 * killer)
+            m.pack('<i', SLAYER_SCORES + 64 + 4 * killer, score + 1)
+            team, = self.memory_read('<I', killer_address + 0x20)
+            team_score, = self.memory_read('<i', SLAYER_SCORES + 4 * team)
+            m.pack('<i', SLAYER_SCORES + 4 * team, team_score + 1)
+
+        deaths, = self.memory_read('<h', victim_address + 0xAA)
+        m.pack('<h', victim_address + 0xAA, deaths + 1)
+        m.pack('<HHh', victim_address + 0x92, 0, 0, -1)
+        m.pack('<I', victim_address + 0x84, self.tick)
+        m.pack('<i', victim_address + 0x34, -1)  # 0x38 keeps the body's handle
+        m.pack('<I', victim_address + 0x2C, RESPAWN_TICKS)
+        m.pack('<ff', biped_address + 0x90, 0.0, 0.0)
+        self.players[victim]['respawn_at'] = self.game_time + RESPAWN_TICKS
+
+    # time
+
+    def step(self, ticks=1):
+        """
+        Moves players and projectiles, expires projectiles and respawns players, then advances game_time. Like the
+        game, game_time changes last, so a reader polling it (main_loop()) sees the tick once it's fully written.
+        """
+
+        m = self.memory
+        for _ in range(ticks):
+            self.game_time += 1
+
+            for object_index, (expires, velocity) in list(self.projectiles.items()):
+                if self.game_time >= expires:
+                    self.delete_object(object_index)
+                    continue
+                address = self.object_address(object_index)
+                x, y, z = self.memory_read('<fff', address + 0xC)
+                m.pack('<fff', address + 0xC, x + velocity[0], y + velocity[1], z + velocity[2])
+                age, = self.memory_read('<h', address + 0x6C)
+                m.pack('<h', address + 0x6C, age + 1)
+
+            for player_index, player in self.players.items():
+                if player['respawn_at'] is not None:
+                    if self.game_time >= player['respawn_at']:
+                        self.respawn(player_index)
+                    else:
+                        m.pack('<I', self.player_address(player_index) + 0x2C, player['respawn_at'] - self.game_time)
+                    continue
+                if any(player['velocity']):
+                    x, y, z = self.position(player_index)
+                    vx, vy, vz = player['velocity']
+                    self.move_player(player_index, x + vx, y + vy, z + vz)
+
+            m.pack('<I', GAME_TIME_GLOBALS + 12, self.game_time)
+
+    def simulate_tick(self, fire_chance=0.3, kill_chance=0.01, damage_chance=0.05):
+        """One tick of random play: everyone wanders, some fire, some get hurt, now and then someone dies"""
+
+        alive = [player_index for player_index in self.players if self.alive(player_index)]
+        for player_index in alive:
+            if self.random.random() < 0.05:
+                angle = self.random.uniform(0, 2 * math.pi)
+                self.players[player_index]['velocity'] = (0.07 * math.cos(angle), 0.07 * math.sin(angle), 0.0)
+                self.memory.pack('<fff', self.object_address(self.players[player_index]['biped']) + 0x18,
+                                 *self.players[player_index]['velocity'])
+            if self.random.random() < fire_chance and self.free_objects:
+                self.fire(player_index)
+        if len(alive) > 1:
+            if self.random.random() < damage_chance:
+                victim, attacker = self.random.sample(alive, 2)
+                self.damage(victim, attacker, self.random.uniform(5, 30))
+            if self.random.random() < kill_chance:
+                victim, killer = self.random.sample(alive, 2)
+                self.kill(victim, killer)
+        self.step()
@@ -0,0 +1,91 @@
+"""
+Lookups several extractors make during the same tick, done once per tick.
+
+get_game_info() resolves the same object handles (a player's biped, then its weapons), reads the same tag
+definition pointers and formats the same host addresses for debug strings, each one through read_memory() or a scan
+of the memory cache. A TickContext reads the object header table once (see object_table.py) and remembers the rest
+until clear(), which main_loop() calls at every tick boundary. get_game_info() hands it to every extractor it calls, and callers that
+don't bring one (decode_capture.py, the benchmarks) get a fresh one per call.
+
+Nothing in here is valid across ticks: objects move around the object table and get deleted, and a new map moves
+the tag instance array. bind() clears it as well if the tables moved since the last call.
+
+The memo dicts only ever get a key added with the value every thread would compute for it, so the players
+extracted on separate threads (see map_extraction() in halocaster.py) can share one context without a lock.
+"""
+
+import object_table
+
+
+class TickContext:
+
+    def __init__(self, read_u32, read_u16, read_bytes, get_host_address):
+        self.read_u32 = read_u32
+        self.read_u16 = read_u16
+        self.read_bytes = read_bytes
+        self.get_host_address = get_host_address
+        self.object_header_datum_array = None
+        self.first_object_address = 0
+        self.object_size = 12
+        self.objects = object_table.ObjectTable()
+        self.tag_instances_address = 0
+        self.tag_definitions = {}
+        self.host_addresses = {}
+        self.observer_cameras = {}
+
+    def clear(self):
+        """Forgets everything, call once per tick before extracting anything"""
+
+        self.object_header_datum_array = None
+        self.tag_definitions.clear()
+        self.host_addresses.clear()
+        self.observer_cameras.clear()
+
+    def bind(self, object_header_datum_array, tag_instances_address):
+        """Points the context at this tick's object table and tag instances, see get_game_info()"""
+
+        if object_header_datum_array == self.object_header_datum_array and tag_instances_address == self.tag_instances_address:
+            return
+        self.clear()
+        self.object_header_datum_array = object_header_datum_array
+        self.tag_instances_address = tag_instances_address
+        # *(_DWORD *)(object_header_data + 52) + 12 * (unsigned __int16)handle + 8
+        self.first_object_address = self.read_u32(object_header_datum_array + 0x34)
+        self.object_size = self.read_u16(object_header_datum_array + 0x22) or 12
+        # every slot in use, the same count get_objects() walks
+        self.objects.refresh(self.read_bytes, self.first_object_address, self.read_u16(object_header_datum_array + 0x2E),
+                             self.object_size)
+
+    def object_address(self, handle):
+        """Guest address of the object handle refers to, 0 if the handle is NONE or the object is gone"""
+        return self.objects.address(handle)
+
+    def tag_address(self, tag_index):
+        """Address of the tag instance for tag_index (the low 16 bits of a tag id)"""
+        return self.tag_instances_address + 32 * (tag_index & 0xFFFF)
+
+    def tag_definition(self, tag_index):
+        """Address of the tag's definition block, the pointer at +0x14 of its tag instance"""
+
+        tag_index &= 0xFFFF
+        address = self.tag_definitions.get(tag_index)
+        if address is None:
+            address = self.tag_definitions[tag_index] = self.read_u32(self.tag_address(tag_index) + 0x14)
+        return address
+
+    def host_address(self, address):
+        """get_host_address(), remembered for the rest of the tick"""
+
+        host_address = self.host_addresses.get(address)
+        if host_address is None:
+            host_address = self.host_addresses[address] = self.get_host_address(address)
+        return host_address
+
+    def observer_camera(self, local_player_index, read_camera):
+        """read_camera(context, local_player_index) the first time a local player's camera is asked for this tick"""
+
+        camera = self.observer_cameras.get(local_player_index)
+        if camera is None:
+            camera = self.observer_cameras[local_player_index] = read_camera(self, local_player_index)
+        return camera
+
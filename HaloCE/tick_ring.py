@@ -0,0 +1,269 @@
+"""
+Shared memory ring buffer of raw per-tick memory regions, and the lean reader process that fills it.
+
+With use_reader_process enabled in halocaster.py the work gets split across processes:
+
+    reader process      polls game_time and copies the registered regions into the ring as soon as it changes
+    main process        decodes each tick out of the ring (get_game_info), extracts events and serves websockets
+    ui process          runs the DearPyGui window
+
+so serialization, deepcopies and UI frames can no longer delay the next memory read. The reader never talks to QMP;
+the main process resolves the host address of every region and sends it a ReadPlan whenever the regions change.
+
+Ring layout (little-endian):
+
+    ring header     <8sIIQ       magic, slot count, slot size, sequence number of the newest complete slot
+    slot header     <QIIHH       sequence number (0 while being written), tick, payload size, region count, flags
+    region table    <IQI * n     guest address, host address, size
+    region data     region bytes, back to back in region table order
+
+A slot is only valid if its sequence number is the same before and after copying it out, which is how readers detect
+that the reader process lapped them mid-copy.
+
+The only flag is SLOT_TORN: game_time kept changing on every one of the reader's torn_read_retries recopies, so the
+slot may mix two ticks. It gets published anyway (with the tick it ended on) and TickSnapshot.torn tells the consumer.
+"""
+
+import multiprocessing
+import queue
+import struct
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+from pymem import Pymem
+from pymem.exception import MemoryReadError
+
+import scatter_read
+
+MAGIC = b'HCTICKR2'
+
+SLOT_TORN = 1
+
+ring_header = struct.Struct('<8sIIQ')
+slot_header = struct.Struct('<QIIHH')
+region_entry = struct.Struct('<IQI')
+
+# regions are (guest address, host address, size), game_time_host_address is where the reader polls for new ticks
+ReadPlan = namedtuple('ReadPlan', ['game_time_host_address', 'regions'])
+
+# regions are (guest address, host address, bytes), torn is whether the slot was published with SLOT_TORN
+TickSnapshot = namedtuple('TickSnapshot', ['seq', 'tick', 'regions', 'torn'])
+
+
+def slot_size_for_plan(plan, headroom=1.25):
+    """Slot size needed to hold every region in the plan, with some headroom for regions that grow later"""
+
+    payload = sum(size for _, _, size in plan.regions)
+    table = slot_header.size + region_entry.size * len(plan.regions)
+    return int((table + payload) * headroom)
+
+
+class TickRing:
+    """
+    Fixed number of fixed size slots in a multiprocessing.shared_memory block.
+
+    There is a single writer (the reader process). Any number of processes can read; a reader that falls more than
+    slot_count ticks behind just loses the ticks that were overwritten.
+    """
+
+    def __init__(self, shm, owner=False):
+        self.shm = shm
+        self.owner = owner
+        magic, self.slot_count, self.slot_size, _ = ring_header.unpack_from(shm.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f'shared memory block {shm.name} is not a tick ring')
+        self.lapped = 0
+        # torn slots read_next() handed out
+        self.torn = 0
+
+    @classmethod
+    def create(cls, slot_size, slot_count=8, name=None):
+        shm = shared_memory.SharedMemory(name=name, create=True, size=ring_header.size + slot_count * slot_size)
+        ring_header.pack_into(shm.buf, 0, MAGIC, slot_count, slot_size, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(shared_memory.SharedMemory(name=name))
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def _slot_offset(self, seq):
+        return ring_header.size + (seq % self.slot_count) * self.slot_size
+
+    def latest_seq(self):
+        return ring_header.unpack_from(self.shm.buf, 0)[3]
+
+    def write(self, tick, regions, torn=False):
+        """
+        Copies regions into the next slot. Only call this from the single writer process.
+        Regions that don't fit in the slot are left out (and logged), the decoder falls back to live reads for them.
+        torn marks the slot with SLOT_TORN.
+        """
+
+        buf = self.shm.buf
+        seq = self.latest_seq() + 1
+        offset = self._slot_offset(seq)
+
+        fitted = []
+        used = slot_header.size
+        for guest_address, host_address, data in regions:
+            needed = region_entry.size + len(data)
+            if used + needed > self.slot_size:
+                print(f'WARNING: region {guest_address:#x} ({len(data)} bytes) does not fit in a {self.slot_size} byte tick ring slot')
+                continue
+            fitted.append((guest_address, host_address, data))
+            used += needed
+
+        # invalidate the slot first so readers copying it right now can tell it changed under them
+        struct.pack_into('<Q', buf, offset, 0)
+
+        table_offset = offset + slot_header.size
+        data_offset = table_offset + region_entry.size * len(fitted)
+        payload_size = 0
+        for i, (guest_address, host_address, data) in enumerate(fitted):
+            region_entry.pack_into(buf, table_offset + region_entry.size * i, guest_address, host_address, len(data))
+            buf[data_offset:data_offset + len(data)] = data
+            data_offset += len(data)
+            payload_size += len(data)
+
+        slot_header.pack_into(buf, offset, seq, tick & 0xFFFFFFFF, payload_size, len(fitted), SLOT_TORN if torn else 0)
+        struct.pack_into('<Q', buf, 16, seq)
+        return seq
+
+    def read(self, seq):
+        """Returns the TickSnapshot for seq, or None if it hasn't been written yet or was overwritten"""
+
+        buf = self.shm.buf
+        offset = self._slot_offset(seq)
+        slot_seq, tick, payload_size, region_count, flags = slot_header.unpack_from(buf, offset)
+        if slot_seq != seq:
+            return None
+
+        table_offset = offset + slot_header.size
+        data_offset = table_offset + region_entry.size * region_count
+        regions = []
+        for i in range(region_count):
+            guest_address, host_address, size = region_entry.unpack_from(buf, table_offset + region_entry.size * i)
+            regions.append((guest_address, host_address, bytes(buf[data_offset:data_offset + size])))
+            data_offset += size
+
+        # seqlock check, the writer may have lapped us while we were copying
+        if struct.unpack_from('<Q', buf, offset)[0] != seq:
+            return None
+        return TickSnapshot(seq, tick, regions, bool(flags & SLOT_TORN))
+
+    def read_next(self, last_seq, timeout=None, is_alive=None):
+        """
+        Waits for the next slot after last_seq and returns it.
+        If we fell behind far enough to be lapped, skips ahead to the newest slot (the tick gap shows up as missed ticks).
+        """
+
+        start = time.perf_counter()
+        while True:
+            latest = self.latest_seq()
+            if latest > last_seq:
+                seq = last_seq + 1
+                if latest - seq >= self.slot_count - 1:
+                    self.lapped += latest - seq
+                    seq = latest
+                snapshot = self.read(seq)
+                if snapshot is not None:
+                    self.torn += snapshot.torn
+                    return snapshot
+                last_seq = seq
+                continue
+
+            if timeout is not None and time.perf_counter() - start > timeout:
+                return None
+            if is_alive is not None and not is_alive():
+                raise ChildProcessError('tick ring reader process exited')
+            time.sleep(0.0005)
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+torn_read_retries = 3
+
+
+def run_reader(process_id, ring_name, plan_queue, stop_event):
+    """
+    Entry point of the reader process.
+
+    Only does reads at host addresses it was given: poll game_time, and as soon as it changes copy every region
+    back to back into the ring. Everything else (decoding, events, serializing) happens in the main process.
+    """
+
+    pm = Pymem()
+    pm.open_process_from_id(process_id=process_id)
+    ring = TickRing.attach(ring_name)
+    plan = plan_queue.get()
+    reader = scatter_read.ScatterReader(process_id, fallback_read=pm.read_bytes, probe_address=plan.game_time_host_address)
+    last_game_time = None
+
+    try:
+        while not stop_event.is_set():
+            try:
+                plan = plan_queue.get_nowait()
+            except queue.Empty:
+                pass
+
+            game_time = pm.read_uint(plan.game_time_host_address) - 1
+            if game_time == last_game_time:
+                continue
+
+            # recopy if the tick changed mid-copy, if xemu outruns us every time the slot goes out marked torn
+            for _ in range(torn_read_retries + 1):
+                buffers = reader.read_many([(host_address, size) for _, host_address, size in plan.regions])
+                regions = [(guest_address, host_address, data)
+                           for (guest_address, host_address, _), data in zip(plan.regions, buffers)]
+                game_time_after = pm.read_uint(plan.game_time_host_address) - 1
+                torn = game_time_after != game_time
+                game_time = game_time_after
+                if not torn:
+                    break
+            ring.write(game_time, regions, torn)
+            last_game_time = game_time
+    except (MemoryReadError, OSError) as e:
+        print(f'reader process stopping: {e}')
+    finally:
+        reader.close()
+        ring.close()
+
+
+class ReaderProcess:
+    """Owns the tick ring, the reader process filling it, and the queue read plans are sent through"""
+
+    def __init__(self, process_id, plan, slot_count=8):
+        # spawn everywhere so it behaves the same as on Windows
+        context = multiprocessing.get_context('spawn')
+        self.plan = plan
+        self.ring = TickRing.create(slot_size_for_plan(plan), slot_count)
+        self.plan_queue = context.Queue()
+        self.stop_event = context.Event()
+        self.plan_queue.put(plan)
+        self.process = context.Process(target=run_reader, args=(process_id, self.ring.name, self.plan_queue, self.stop_event),
+                                       daemon=True, name='reader_process')
+        self.process.start()
+
+    def update_plan(self, plan):
+        """Sends the reader a new plan, only if something actually changed (e.g. a new map moved the spawns)"""
+        if plan != self.plan:
+            self.plan = plan
+            self.plan_queue.put(plan)
+
+    def read_next(self, last_seq):
+        return self.ring.read_next(last_seq, is_alive=self.process.is_alive)
+
+    def stop(self):
+        self.stop_event.set()
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.ring.close()
@@ -0,0 +1,132 @@
+"""
+Bounded guest to host translation cache, one entry per 4KB guest page.
+
+Translations never change within a page, so one int per page covers every field on it, and the least recently used
+pages get evicted once max_pages is reached. Memory use stays flat no matter how long the caster runs, unlike the old
+known_addresses dict (a dict per guest address ever read, never evicted, with gc disabled).
+
+Debug provenance (where a translation came from and which line asked for it) is opt-in, see Provenance.
+
+Both take a lock, get_game_info() can read players on several threads (extraction_workers in halocaster.py).
+"""
+
+import threading
+import traceback
+from collections import OrderedDict
+
+PAGE_SHIFT = 12
+PAGE_MASK = (1 << PAGE_SHIFT) - 1
+
+
+class TranslationCache:
+    """LRU map of guest page number to host page address"""
+
+    def __init__(self, max_pages=4096):
+        self.max_pages = max_pages
+        self.pages = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __contains__(self, address):
+        return (address >> PAGE_SHIFT) in self.pages
+
+    def lookup(self, address):
+        """Host address for a guest address, or None if its page isn't cached"""
+
+        page = address >> PAGE_SHIFT
+        with self.lock:
+            host_page = self.pages.get(page)
+            if host_page is None:
+                self.misses += 1
+                return None
+            self.pages.move_to_end(page)
+            self.hits += 1
+        return host_page + (address & PAGE_MASK)
+
+    def insert(self, address, host_address):
+        page = address >> PAGE_SHIFT
+        with self.lock:
+            self.pages[page] = host_address - (address & PAGE_MASK)
+            self.pages.move_to_end(page)
+            if len(self.pages) > self.max_pages:
+                self.pages.popitem(last=False)
+                self.evictions += 1
+
+    def items(self):
+        """(guest page number, host page address) of every cached page, least recently used first"""
+        with self.lock:
+            return list(self.pages.items())
+
+    def load(self, pages):
+        """Inserts (guest page number, host page address) pairs, e.g. from address_cache.py"""
+        with self.lock:
+            for page, host_page in pages:
+                self.pages[page] = host_page
+            while len(self.pages) > self.max_pages:
+                self.pages.popitem(last=False)
+
+    def invalidate(self, guest_start=None, guest_end=None):
+        """Forgets every page, or only the pages overlapping [guest_start, guest_end)"""
+
+        with self.lock:
+            self.invalidations += 1
+            if guest_start is None:
+                self.pages.clear()
+                return
+            first_page = guest_start >> PAGE_SHIFT
+            last_page = (guest_end - 1) >> PAGE_SHIFT
+            for page in [page for page in self.pages if first_page <= page <= last_page]:
+                del self.pages[page]
+
+    def stats(self):
+        return {
+            'pages': len(self.pages),
+            'max_pages': self.max_pages,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+
+class Provenance:
+    """
+    Side table of where translations came from, for debugging (e.g. analyze_offset_map() in halocaster.py).
+    Bounded like the cache itself, and only worth enabling while hunting down stray QMP lookups.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def record(self, address, host_address, source, stack_depth=3):
+        """
+        Remembers where address got translated, as the source line stack_depth frames up counting this one: 3 is
+        whoever called record()'s caller, 4 goes up one more past a read_u32() style wrapper.
+        """
+
+        line = traceback.extract_stack()[-stack_depth].line
+        with self.lock:
+            self.entries[address] = {
+                'host_address': host_address,
+                'source': source,
+                'line': line,
+            }
+            self.entries.move_to_end(address)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def items(self):
+        with self.lock:
+            return list(self.entries.items())
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
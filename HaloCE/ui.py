@@ -160,12 +160,14 @@ async def websocket_server(websocket, path, game_info_queue_for_ui):
             await asyncio.sleep(0.1)
 
 
+async def serve_websocket(game_info_queue_for_ui):
+    # websockets 14+ only passes the connection to the handler, and needs serve() to run inside the event loop
+    async with websockets.serve(lambda ws, path=None: websocket_server(ws, path, game_info_queue_for_ui), WEBSOCKET_HOST, WEBSOCKET_PORT):
+        await asyncio.Future()
+
+
 def start_websocket_server(game_info_queue_for_ui):
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    start_server = websockets.serve(lambda ws, path: websocket_server(ws, path, game_info_queue_for_ui), WEBSOCKET_HOST, WEBSOCKET_PORT)
-    loop.run_until_complete(start_server)
-    loop.run_forever()
+    asyncio.run(serve_websocket(game_info_queue_for_ui))
 
 
 def start_ui(game_info_queue_for_ui, write_queue_from_ui):